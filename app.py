@@ -1,11 +1,26 @@
 import os
 import streamlit as st
 import json
-import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from streamlit_helpers import extract_json, merge_graphs
+
+MODEL = "llama3-8b-8192"
+# Concurrent Groq calls; a 20-block lecture runs in a few waves instead of 41 serial calls
+MAX_PARALLEL_CALLS = int(os.environ.get("GROQ_MAX_PARALLEL_CALLS", "6"))
 
 # ---- Groq API Setup ----
-try:
+@st.cache_resource
+def get_groq_client(api_key):
+    """One client (and connection pool) shared across Streamlit reruns"""
     from groq import Groq
+    return Groq(api_key=api_key)
+
+try:
+    import groq  # noqa: F401
 
     api_key = os.environ.get("GROQ_API_KEY") or st.secrets.get("groq", {}).get("api_key")
     if not api_key:
@@ -15,7 +30,7 @@ try:
         )
         st.stop()
 
-    client = Groq(api_key=api_key)
+    client = get_groq_client(api_key)
 
 except ImportError:
     st.error("Please install Groq: pip install groq")
@@ -32,23 +47,35 @@ with open("notes.json", "r") as f:
 print(cv_json["content"])
 
 # ---- Groq Query Function ----
-def query_groq_api(messages):
+# Errors propagate so that failed calls are not cached; callers report them
+def query_groq_api(messages, json_mode=False):
+    options = {"response_format": {"type": "json_object"}} if json_mode else {}
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        temperature=1,
+        **options
+    )
+    return response.choices[0].message.content
+
+def call_safely(fn, *args):
+    """Run a cached Groq step in a worker thread, returning (result, error message)"""
     try:
-        response = client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=messages,
-            temperature=1
-        )
-        return response.choices[0].message.content
+        return fn(*args), None
     except Exception as e:
-        st.error(f"Error from Groq API: {e}")
-        return "Oops, something went wrong with the AI's response."
+        return None, f"Error from Groq API: {e}"
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 # ---- Summarize Lecture ----
-prompt = f"""
-You are an AI summarizer. 
+@st.cache_data(show_spinner=False)
+def summarize_lecture(content_hash, _content):
+    """Lecture summary, cached across reruns by the hash of the content"""
+    prompt = f"""
+You are an AI summarizer.
 
-Input: A lecture JSON containing "heading" and "text" content. Ignore diagrams. 
+Input: A lecture JSON containing "heading" and "text" content. Ignore diagrams.
 
 TASK:
 - Generate a concise, structured summary.
@@ -56,151 +83,132 @@ TASK:
 
 Input JSON:
 <<<JSON
-{json.dumps(cv_json['content'])}
+{json.dumps(_content)}
 JSON>>>
 """
-summary_text = query_groq_api([{"role": "user", "content": prompt}])
-
-try:
-    summary_json = json.loads(summary_text)
-except:
-    summary_json = {"raw": summary_text}
-
-with open("summary.json", "w") as f:
-    json.dump(summary_json, f, indent=2)
-
-st.subheader("Lecture Summary")
-st.json(summary_json)
+    summary_text = query_groq_api([{"role": "user", "content": prompt}])
+    summary = extract_json(summary_text, expect=dict)
+    return summary if summary is not None else {"raw": summary_text}
 
 # ---- Flashcards & Knowledge Graphs ----
-text_blocks = [block["text"] for block in cv_json["content"] if block["type"] in ["heading", "text"]]
-
-all_flashcards = []
-all_graphs_raw = []
-
-for block_text in text_blocks:
-    # Flashcard prompt
-    prompt_flashcards = f"""
-    Extract key concepts from the following text and create flashcards.
-    Output JSON: [{{"question": "...", "answer": "..."}}]
-    Text: {block_text} Donot include any commentary just the output json nothing else no instructions 
+@st.cache_data(show_spinner=False)
+def extract_block(block_hash, _block_text):
     """
-
-    # Knowledge graph prompt
-    prompt_knowledge = f"""
+    Flashcards and knowledge graph for one text block in a single call,
+    cached across reruns by the hash of the block text
+    """
+    prompt = f"""
 You are an information extractor. Read the text and return a SINGLE JSON object ONLY.
 
 RULES
-- Output EXACTLY one JSON object, no prose.
-- Wrap the JSON between markers: <<<JSON and JSON>>>.
+- Output EXACTLY one JSON object, no prose or commentary.
 - JSON shape:
   {{
-    "nodes": [{{"id": "string", "label": "string"}}],
-    "edges": [{{"from": "string", "to": "string"}}]
+    "flashcards": [{{"question": "string", "answer": "string"}}],
+    "graph": {{
+      "nodes": [{{"id": "string", "label": "string"}}],
+      "edges": [{{"from": "string", "to": "string"}}]
+    }}
   }}
+- Flashcards cover the key concepts of the text.
 - Create nodes only for domain concepts/headings from the text.
-- Do NOT create nodes from instructions or meta-text (e.g., "Do not include any commentary...").
+- Do NOT create nodes from instructions or meta-text.
 - Normalize IDs: lowercase, alphanumerics + underscores; unique; no spaces; short slugs of labels.
 - Merge synonyms/variants into one node (e.g., "Average Variable Cost", "AVC", "AVC_" → id "avc").
 - Edges must reference existing node IDs only.
 - Limit: max 20 nodes, max 40 edges.
 
-EXAMPLES
+EXAMPLE
 Input:
 "Average Cost (AC) and Average Variable Cost (AVC). Marginal Cost (MC) cuts both at their minima."
 Output:
-<<<JSON
 {{
-  "nodes": [
-    {{"id": "ac", "label": "Average Cost (AC)"}},
-    {{"id": "avc", "label": "Average Variable Cost (AVC)"}},
-    {{"id": "mc", "label": "Marginal Cost (MC)"}},
-    {{"id": "rule_mc_cuts_minima", "label": "MC intersects AC and AVC at minima"}}
+  "flashcards": [
+    {{"question": "Where does Marginal Cost (MC) cut AC and AVC?", "answer": "At their minima."}}
   ],
-  "edges": [
-    {{"from": "mc", "to": "rule_mc_cuts_minima"}},
-    {{"from": "ac", "to": "rule_mc_cuts_minima"}},
-    {{"from": "avc", "to": "rule_mc_cuts_minima"}}
-  ]
-}}
-JSON>>>
-
-Input:
-"AC − AVC = AFC (> 0). As output rises, AC and AVC approach but never coincide."
-Output:
-<<<JSON
-{{
-  "nodes": [
-    {{"id": "ac", "label": "Average Cost (AC)"}},
-    {{"id": "avc", "label": "Average Variable Cost (AVC)"}},
-    {{"id": "afc", "label": "Average Fixed Cost (AFC)"}},
-    {{"id": "identity_gap", "label": "AC − AVC = AFC (> 0)"}},
-    {{"id": "never_coincide", "label": "AC and AVC never coincide"}}
-  ],
-  "edges": [
-    {{"from": "ac", "to": "identity_gap"}},
-    {{"from": "avc", "to": "identity_gap"}},
-    {{"from": "afc", "to": "identity_gap"}},
-    {{"from": "identity_gap", "to": "never_coincide"}}
-  ]
+  "graph": {{
+    "nodes": [
+      {{"id": "ac", "label": "Average Cost (AC)"}},
+      {{"id": "avc", "label": "Average Variable Cost (AVC)"}},
+      {{"id": "mc", "label": "Marginal Cost (MC)"}},
+      {{"id": "rule_mc_cuts_minima", "label": "MC intersects AC and AVC at minima"}}
+    ],
+    "edges": [
+      {{"from": "mc", "to": "rule_mc_cuts_minima"}},
+      {{"from": "ac", "to": "rule_mc_cuts_minima"}},
+      {{"from": "avc", "to": "rule_mc_cuts_minima"}}
+    ]
+  }}
 }}
-JSON>>>
 
 TASK
 Text:
-{block_text}
-Return ONLY the JSON between <<<JSON and JSON>>>.
+{_block_text}
 """
+    response = query_groq_api([{"role": "user", "content": prompt}], json_mode=True)
+    parsed = extract_json(response, expect=dict)
+    if not isinstance(parsed, dict):
+        return {"flashcards": [], "graph": None, "raw": response}
+    return {
+        "flashcards": parsed.get("flashcards") or [],
+        "graph": parsed.get("graph")
+    }
 
-    # Query for flashcards
-    flashcards = query_groq_api([{"role": "user", "content": prompt_flashcards}])
-    try:
-        flashcards_json = json.loads(flashcards)
-    except:
-        flashcards_json = {"raw": flashcards}
-    all_flashcards.append(flashcards_json)
+text_blocks = [block["text"] for block in cv_json["content"] if block["type"] in ["heading", "text"]]
 
-    # Query for knowledge graph
-    graph_response = query_groq_api([{"role": "user", "content": prompt_knowledge}])
-    all_graphs_raw.append(graph_response)
+# Summary and all blocks run concurrently; cached results return immediately on reruns
+ctx = get_script_run_ctx()
+with st.spinner(f"Processing {len(text_blocks)} blocks..."):
+    with ThreadPoolExecutor(
+        max_workers=MAX_PARALLEL_CALLS,
+        initializer=add_script_run_ctx,
+        initargs=(None, ctx)
+    ) as executor:
+        summary_future = executor.submit(
+            call_safely, summarize_lecture, text_hash(json.dumps(cv_json["content"])), cv_json["content"]
+        )
+        block_outcomes = list(executor.map(
+            lambda text: call_safely(extract_block, text_hash(text), text), text_blocks
+        ))
+        summary_json, summary_error = summary_future.result()
 
-st.subheader("Flashcards")
-st.json(all_flashcards)  # nicely formatted JSON
+for error in {summary_error, *(error for _, error in block_outcomes)} - {None}:
+    st.error(error)
+
+if summary_json is None:
+    summary_json = {"raw": "Oops, something went wrong with the AI's response."}
+block_results = [result for result, _ in block_outcomes if result is not None]
+
+with open("summary.json", "w") as f:
+    json.dump(summary_json, f, indent=2)
+
+st.subheader("Lecture Summary")
+st.json(summary_json)
 
 # ---- Clean & Save Flashcards ----
 all_flashcards_clean = []
-for item in all_flashcards:
-    if isinstance(item, dict) and "raw" in item:
-        raw_text = item["raw"]
-        match = re.search(r"\[.*\]", raw_text, re.DOTALL)
-        if match:
-            try:
-                flashcards_json = json.loads(match.group(0))
-                all_flashcards_clean.extend(flashcards_json)
-            except:
-                continue
-    elif isinstance(item, list):
-        all_flashcards_clean.extend(item)
+for result in block_results:
+    all_flashcards_clean.extend(card for card in result["flashcards"] if isinstance(card, dict))
 flashcards_output = {"flashcards": all_flashcards_clean}
 
+st.subheader("Flashcards")
+st.json(all_flashcards_clean)  # nicely formatted JSON
+
 with open("output.json", "w") as f:
     json.dump(flashcards_output, f, indent=2)
 
-# ---- Clean & Save Knowledge Graphs ----
-all_graphs_clean = []
-for raw_text in all_graphs_raw:
-    match = re.search(r"\{.*\}", raw_text, re.DOTALL)
-    if match:
-        try:
-            graph_json = json.loads(match.group(0))
-            all_graphs_clean.append(graph_json)
-        except:
-            continue
-
-knowledge_graph_output = {"graphs": all_graphs_clean}
+# ---- Merge & Save Knowledge Graph ----
+# One deduplicated lecture graph; edges are parallel arrays of node indices
+knowledge_graph_output = merge_graphs([result["graph"] for result in block_results])
+merge_stats = knowledge_graph_output["stats"]
 
 with open("knowledge_graph.json", "w") as f:
-    json.dump(knowledge_graph_output, f, indent=2)
-
-st.subheader("Knowledge Graphs")
-st.json(knowledge_graph_output)
\ No newline at end of file
+    json.dump(knowledge_graph_output, f, separators=(",", ":"))
+
+st.subheader("Knowledge Graph")
+st.caption(
+    f"Merged {merge_stats['graphs']} block graphs: "
+    f"{merge_stats['input_nodes']} → {merge_stats['nodes']} nodes, "
+    f"{merge_stats['input_edges']} → {merge_stats['edges']} edges"
+)
+st.json(knowledge_graph_output)
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncIterator, Dict, Any, List, Optional
+import json
 from datetime import datetime
 
+from app.config import settings
+from app.core.cancellation import CLIENT_CLOSED_REQUEST, RequestCancelled, cancel_on_disconnect
 from app.services.groq_service import groq_service
+from app.services.llm_scheduler import Priority
 from app.models.response import ExtractResponse
 from app.utils.file_handler import save_output_json
 
@@ -11,11 +15,18 @@ router = APIRouter()
 
 @router.post("/enhance")
 async def enhance_with_groq(
+    request: Request,
     ocr_data: Dict[str, Any],
-    save_output: bool = True
+    save_output: bool = True,
+    bulk: bool = False,
+    latency_slo_ms: Optional[float] = None
 ):
     """
     Enhance existing OCR/CV data with Groq AI processing
+    
+    Set ``bulk`` for scripted or batch work so it is scheduled behind
+    interactive requests. ``latency_slo_ms`` steers the request to a model
+    tier expected to answer within that time.
     """
     try:
         # Validate input data
@@ -23,7 +34,11 @@ async def enhance_with_groq(
             raise HTTPException(status_code=400, detail="Invalid OCR data format")
         
         # Enhance with Groq AI
-        enhanced_data = await groq_service.enhance_ocr_content(ocr_data)
+        priority = Priority.BULK if bulk else Priority.INTERACTIVE
+        async with cancel_on_disconnect(request) as cancellation:
+            enhanced_data = await cancellation.run(
+                groq_service.enhance_ocr_content(ocr_data, priority, latency_slo_ms)
+            )
         
         # Save output if requested
         if save_output:
@@ -32,9 +47,67 @@ async def enhance_with_groq(
         
         return JSONResponse(content=enhanced_data)
         
+    except RequestCancelled:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Groq enhancement failed: {str(e)}")
 
+@router.post("/enhance-batch")
+async def enhance_batch_with_groq(request: Request, documents: List[Dict[str, Any]]):
+    """
+    Enhance many OCR/CV documents at once (e.g. a class's note photos)
+    
+    Short documents are packed several to a Groq completion; the results
+    come back in input order, each shaped like an ``/enhance`` response.
+    The work is scheduled behind interactive requests.
+    """
+    if not documents:
+        raise HTTPException(status_code=400, detail="No documents provided")
+    if len(documents) > settings.groq_batch_max_request_documents:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.groq_batch_max_request_documents} documents per request"
+        )
+    if any(not ocr_data or "content" not in ocr_data for ocr_data in documents):
+        raise HTTPException(status_code=400, detail="Invalid OCR data format")
+    
+    try:
+        async with cancel_on_disconnect(request) as cancellation:
+            results = await cancellation.run(groq_service.enhance_batch(documents, Priority.BULK))
+        
+        return JSONResponse(content={
+            "results": results,
+            "document_count": len(results),
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
+    except RequestCancelled:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Groq batch enhancement failed: {str(e)}")
+
+@router.post("/enhance/stream")
+async def enhance_with_groq_stream(ocr_data: Dict[str, Any], latency_slo_ms: Optional[float] = None):
+    """
+    Enhance OCR/CV data with Groq AI, streaming results as Server-Sent Events
+    
+    Emits a ``flashcard`` event as soon as each flashcard is generated and a
+    final ``complete`` event carrying the full enhanced result, or an
+    ``error`` event if Groq fails after some flashcards were sent.
+    """
+    if not ocr_data or "content" not in ocr_data:
+        raise HTTPException(status_code=400, detail="Invalid OCR data format")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        async for event in groq_service.stream_enhancement(ocr_data, latency_slo_ms=latency_slo_ms):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/health")
 async def groq_health():
     """
@@ -46,7 +119,14 @@ async def groq_health():
         return JSONResponse(content={
             "groq_available": is_available,
             "service_status": "operational" if is_available else "unavailable",
-            "model": groq_service.client.model if is_available else None,
+            "model": groq_service.model if is_available else None,
+            "cache": groq_service.cache.stats(),
+            "coalescing": groq_service.in_flight.stats(),
+            "model_routing": groq_service.router.stats(),
+            "hedging": groq_service.hedger.stats() if groq_service.hedger else {"enabled": False},
+            "fallbacks": groq_service.fallbacks,
+            "batching": groq_service.batch_totals,
+            "prompt_compaction": groq_service.compaction_totals,
             "timestamp": datetime.utcnow().isoformat()
         })
         
@@ -63,6 +143,7 @@ async def groq_health():
 
 @router.post("/generate-flashcards")
 async def generate_flashcards_only(
+    request: Request,
     text_content: str,
     course: str = "General Studies",
     topic: str = "Study Notes",
@@ -70,35 +151,37 @@ async def generate_flashcards_only(
 ):
     """
     Generate flashcards from text content using Groq AI
+    
+    Uses a flashcard-only prompt sized to ``num_cards`` (routed to the fast
+    model tier for short notes) rather than the full enhancement.
     """
+    if not text_content.strip():
+        raise HTTPException(status_code=400, detail="Text content cannot be empty")
+    if not 1 <= num_cards <= settings.groq_flashcards_max_cards:
+        raise HTTPException(
+            status_code=400,
+            detail=f"num_cards must be between 1 and {settings.groq_flashcards_max_cards}"
+        )
+    
     try:
-        if not text_content.strip():
-            raise HTTPException(status_code=400, detail="Text content cannot be empty")
-        
-        # Create simplified OCR data for flashcard generation
-        mock_ocr_data = {
-            "lecture_id": f"cards_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "course": course,
-            "topic": topic,
-            "date": datetime.today().strftime("%Y-%m-%d"),
-            "content": [
-                {"type": "text", "text": text_content}
-            ]
-        }
-        
-        # Enhance with Groq to get flashcards
-        enhanced_data = await groq_service.enhance_ocr_content(mock_ocr_data)
-        
-        # Return just the flashcards
-        flashcards = enhanced_data.get("flashcards", [])[:num_cards]
+        async with cancel_on_disconnect(request) as cancellation:
+            generated = await cancellation.run(
+                groq_service.generate_flashcards(text_content, course, topic, num_cards)
+            )
+        flashcards = generated["flashcards"]
         
         return JSONResponse(content={
             "flashcards": flashcards,
             "course": course,
             "topic": topic,
             "generated_count": len(flashcards),
+            "groq_enhanced": generated["groq_enhanced"],
+            "groq_cached": generated["groq_cached"],
+            "model": generated["model"],
             "timestamp": datetime.utcnow().isoformat()
         })
         
+    except RequestCancelled:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Flashcard generation failed: {str(e)}")
@@ -2,10 +2,16 @@
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from datetime import datetime
+import os
+
+import psutil
 
 from app.models.response import HealthResponse
 from app.config import settings
 from app.services.groq_service import groq_service
+from app.core.detector_registry import detector_registry
+from app.core.prefork import MASTER_PID_ENV, memory_report
+from app.core.admission import admission_controller
 
 router = APIRouter()
 
@@ -43,7 +49,9 @@ async def detailed_health():
             "diagram_detection": {
                 "status": "operational", 
                 "threshold": settings.diagram_detection_threshold,
-                "min_contour_area": settings.min_contour_area
+                "min_contour_area": settings.min_contour_area,
+                "default_backend": detector_registry.default_backend,
+                "backends": detector_registry.stats()
             },
             "groq_ai": {
                 "status": "available" if groq_service.is_available() else "disabled",
@@ -54,9 +62,26 @@ async def detailed_health():
                 "output_directory": settings.output_dir
             }
         },
+        "admission": {
+            "enabled": settings.admission_enabled,
+            "classes": admission_controller.stats()
+        },
         "configuration": {
             "max_file_size": "10MB",
             "allowed_formats": ["jpg", "jpeg", "png", "webp", "bmp", "tiff"],
             "spell_correction": settings.enable_spell_correction
         }
     })
+
+@router.get("/workers")
+async def worker_memory():
+    """Memory of every worker process (RSS, USS, PSS) when run by serve.py, else of this process"""
+    master_pid = os.environ.get(MASTER_PID_ENV)
+    if master_pid is None:
+        return JSONResponse(content={"mode": "single", "pid": os.getpid(), **memory_report(os.getpid(), [])})
+    
+    try:
+        worker_pids = [child.pid for child in psutil.Process(int(master_pid)).children()]
+    except psutil.NoSuchProcess:
+        worker_pids = [os.getpid()]
+    return JSONResponse(content={"mode": "prefork", "pid": os.getpid(), **memory_report(int(master_pid), worker_pids)})
@@ -0,0 +1,165 @@
+from fastapi import APIRouter, UploadFile, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional
+import json
+import uuid
+from datetime import datetime
+
+from app.config import settings
+from app.dependencies import get_processing_options, get_validated_file
+from app.api.endpoints.ocr import run_extraction, _validate_detector
+from app.models.requests import OCRRequest
+from app.services.job_runner import ProgressCallback, job_runner
+from app.services.job_store import FINISHED
+from app.utils.file_handler import save_output_json, save_upload
+
+router = APIRouter()
+
+# Longest wait between checks of a job followed over SSE; updates made by
+# this process arrive immediately, those of other workers within this time
+EVENTS_POLL_SECONDS = 1.0
+
+async def _run_extract_job(job: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Run /extract for a job's stored upload"""
+    params = job["params"]
+    # Jobs queued before options were stored run the full analysis
+    options = OCRRequest(**params.get("options", {}))
+    result = await run_extraction(job["input_path"], params["enable_groq"], params["detector"], progress, options=options)
+    if params.get("save_output"):
+        progress("saving")
+        output_filename = f"extract_job_{job['id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        await save_output_json(result, output_filename)
+    return result
+
+job_runner.register("extract", _run_extract_job)
+
+@router.post("", status_code=202)
+async def create_extract_job(
+    file: UploadFile = Depends(get_validated_file),
+    save_output: bool = True,
+    enable_groq: bool = True,
+    detector: Optional[str] = None,
+    options: OCRRequest = Depends(get_processing_options)
+):
+    """
+    Queue a combined extraction (OCR, diagrams, Groq) and return at once
+
+    Takes the same processing options as ``/api/extract``.
+
+    Follow the job with ``GET /api/jobs/{job_id}`` or its Server-Sent
+    Events stream at ``/api/jobs/{job_id}/events``.
+    """
+    detector = _validate_detector(detector)
+    job_id = uuid.uuid4().hex
+    input_path = await save_upload(file, settings.job_upload_dir, job_id)
+
+    job = job_runner.submit(
+        "extract",
+        {
+            "enable_groq": enable_groq, "detector": detector, "save_output": save_output,
+            "filename": file.filename, "options": options.model_dump(mode="json")
+        },
+        input_path,
+        job_id
+    )
+    return JSONResponse(status_code=202, content={
+        **_job_view(job),
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events"
+    })
+
+@router.get("")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """
+    Most recent jobs, without their results
+    """
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    return JSONResponse(content={
+        "jobs": [_job_view(job, include_result=False) for job in job_runner.store.list(status, limit)],
+        "runner": job_runner.stats()
+    })
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status, current stage and (once finished) the result of a job
+    """
+    return JSONResponse(content=_job_view(_get_job_or_404(job_id)))
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Follow a job as Server-Sent Events
+
+    Emits a ``progress`` event whenever the status or stage changes and a
+    final ``succeeded``, ``failed`` or ``cancelled`` event with the job.
+    """
+    _get_job_or_404(job_id)
+
+    async def event_stream() -> AsyncIterator[str]:
+        last_state = None
+        while True:
+            job = job_runner.store.get(job_id)
+            if job is None:
+                return
+            state = (job["status"], job["stage"])
+            if state != last_state:
+                last_state = state
+                progress = {"id": job_id, "status": job["status"], "stage": job["stage"]}
+                yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+            if job["status"] in FINISHED:
+                yield f"event: {job['status']}\ndata: {json.dumps(_job_view(job))}\n\n"
+                return
+            await job_runner.wait_for_update(job_id, EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job
+    """
+    _get_job_or_404(job_id)
+    return JSONResponse(content=_job_view(job_runner.cancel(job_id), include_result=False))
+
+@router.post("/{job_id}/retry")
+async def retry_job(job_id: str):
+    """
+    Queue a failed or cancelled job again
+    """
+    job = _get_job_or_404(job_id)
+    if job["status"] not in ("failed", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"Only failed or cancelled jobs can be retried (job is {job['status']})")
+    return JSONResponse(content=_job_view(job_runner.retry(job_id), include_result=False))
+
+def _get_job_or_404(job_id: str) -> Dict[str, Any]:
+    job = job_runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+def _job_view(job: Dict[str, Any], include_result: bool = True) -> Dict[str, Any]:
+    """Public fields of a job (the stored input path stays internal)"""
+    view = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "params": job["params"],
+        "created_at": _timestamp(job["created_at"]),
+        "updated_at": _timestamp(job["updated_at"]),
+        "finished_at": _timestamp(job["finished_at"])
+    }
+    if include_result:
+        view["result"] = job["result"]
+    return view
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(value).isoformat() if value is not None else None
@@ -1,22 +1,45 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 import tempfile
 import shutil
 import os
+import time
 from datetime import datetime
-from typing import Optional
+from typing import AbstractSet, Any, Callable, Dict, Optional, Tuple
 
-from app.dependencies import get_validated_file
-from app.core.imageOCR import process_image
-from app.core.diagram_detector import detect_diagrams_json
+from app.dependencies import get_processing_options, get_validated_file
+from app.core.imageOCR import OCR_SCALE_FACTOR, build_notes, correct_texts, preprocess_page, process_image, processor, read_text
+from app.core.diagram_detector import detect_connections_json, detect_diagrams_json
+from app.core.layout_analyzer import layout_analyzer
+from app.core.detector_registry import detector_registry
+from app.config import settings
+from app.models.requests import OCRRequest, ProcessingMode
 from app.models.response import OCRResponse, DiagramResponse, ExtractResponse
-from app.utils.file_handler import save_output_json, create_temp_file
+from app.utils.file_handler import save_output_json, create_temp_file, file_digest
 from app.services.groq_service import groq_service
+from app.services.llm_scheduler import Priority
+from app.services.single_flight import SingleFlight
+from app.services.llm_cache import make_cache_key
+from app.services.model_router import FULL_ARTIFACTS
+from app.services.extraction_pipeline import combine_extraction, run_extraction_stages
+from app.core.executors import (
+    decode_executor, diagram_executor, ocr_executor, preprocess_executor, run_in_executor, run_on_private_copy
+)
+from app.core.staged_pipeline import Stage, StagedPipeline
+from app.core.cancellation import CLIENT_CLOSED_REQUEST, CancellationToken, RequestCancelled, cancel_on_disconnect
+from app.core.deadline import (
+    CONNECTIONS, DEADLINE_HEADER, DECODE, DENOISE, DIAGRAMS, GROQ, OCR, PREPROCESS, SPELL_CORRECTION, UPSCALE,
+    Deadline, step_costs
+)
 
 router = APIRouter()
 
+# Byte-identical uploads processed concurrently share one OCR run
+ocr_in_flight = SingleFlight("ocr")
+
 @router.post("/ocr", response_model=OCRResponse)
 async def extract_text(
+    request: Request,
     file: UploadFile = Depends(get_validated_file),
     save_output: bool = True
 ):
@@ -28,8 +51,9 @@ async def extract_text(
         # Create temporary file
         temp_path = await create_temp_file(file)
         
-        # Process image with OCR
-        ocr_result = process_image(temp_path, output_file=None)
+        # Process image with OCR, stopping if the client disconnects
+        async with cancel_on_disconnect(request) as cancellation:
+            ocr_result = await cancellation.run(_run_ocr(temp_path))
         
         if not ocr_result:
             raise HTTPException(status_code=422, detail="Failed to process image")
@@ -41,6 +65,8 @@ async def extract_text(
         
         return OCRResponse(**ocr_result)
         
+    except RequestCancelled:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
     finally:
@@ -50,19 +76,23 @@ async def extract_text(
 
 @router.post("/diagram-detect", response_model=DiagramResponse)
 async def detect_diagrams(
+    request: Request,
     file: UploadFile = Depends(get_validated_file),
-    save_output: bool = True
+    save_output: bool = True,
+    detector: Optional[str] = None
 ):
     """
     Detect diagrams and flowcharts in uploaded image
     """
+    detector = _validate_detector(detector)
     temp_path = None
     try:
         # Create temporary file
         temp_path = await create_temp_file(file)
         
-        # Detect diagrams
-        boxes = detect_diagrams_json(temp_path)
+        # Detect diagrams, stopping if the client disconnects
+        async with cancel_on_disconnect(request) as cancellation:
+            boxes = await cancellation.run(_run_diagram_detection(temp_path, None, detector))
         
         # Create response
         response_data = {
@@ -89,6 +119,8 @@ async def detect_diagrams(
         
         return DiagramResponse(**response_data)
         
+    except RequestCancelled:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Diagram detection failed: {str(e)}")
     finally:
@@ -98,57 +130,41 @@ async def detect_diagrams(
 
 @router.post("/extract", response_model=ExtractResponse)
 async def extract_all(
+    request: Request,
     file: UploadFile = Depends(get_validated_file),
     save_output: bool = True,
-    enable_groq: bool = True
+    enable_groq: bool = True,
+    detector: Optional[str] = None,
+    options: OCRRequest = Depends(get_processing_options),
+    deadline_ms: Optional[int] = Header(
+        None, alias=DEADLINE_HEADER, gt=0,
+        description="Latency budget; optional work is skipped to fit it"
+    )
 ):
     """
     Combined OCR, diagram detection, and AI enhancement with Groq
+    
+    ``mode``, ``preprocess_image``, ``confidence_threshold``,
+    ``generate_flashcards`` and ``generate_knowledge_map`` select the work
+    done for this request; unrequested stages do not run.
+    
+    With an ``X-Deadline-Ms`` header, optional steps are skipped when the
+    budget left is too small for them; ``degradations`` lists those skipped.
     """
+    detector = _validate_detector(detector)
     temp_path = None
     try:
         # Create temporary file
         temp_path = await create_temp_file(file)
 
-        # OCR processing
-        ocr_result = process_image(temp_path, output_file=None)
-        if not ocr_result:
-            raise HTTPException(status_code=422, detail="Failed to process image with OCR")
-
-        # Diagram detection
-        boxes = detect_diagrams_json(temp_path)
-
-        # Merge OCR and diagram results
-        combined_data = {
-            "lecture_id": ocr_result.get("lecture_id", "lec_001"),
-            "course": ocr_result.get("course", "Operating Systems"),
-            "topic": ocr_result.get("topic", "Process Management"),
-            "date": ocr_result.get("date", datetime.today().strftime("%Y-%m-%d")),
-            "content": []
-        }
-
-        # Add OCR content
-        if "content" in ocr_result:
-            combined_data["content"].extend(ocr_result["content"])
-
-        # Add diagram content
-        combined_data["content"].append({
-            "type": "diagram",
-            "title": "Detected Diagram(s)",
-            "description": "Auto-detected diagrams with bounding boxes.",
-            "nodes": [],
-            "connections": [],
-            "boxes": boxes
-        })
-
-        # 🚀 NEW: Enhance with Groq AI if enabled
-        if enable_groq and groq_service.is_available():
-            print("🤖 Enhancing content with Groq AI...")
-            enhanced_data = await groq_service.enhance_ocr_content(combined_data)
-            response_data = enhanced_data
-        else:
-            print("📄 Using standard OCR/CV output (Groq disabled or unavailable)")
-            response_data = combined_data
+        # A client that disconnects stops its OCR, diagram and Groq work
+        async with cancel_on_disconnect(request) as cancellation:
+            response_data = await cancellation.run(
+                run_extraction(
+                    temp_path, enable_groq, detector,
+                    cancellation=cancellation, deadline=Deadline(deadline_ms), options=options
+                )
+            )
 
         # Save output if requested
         if save_output:
@@ -157,9 +173,435 @@ async def extract_all(
 
         return ExtractResponse(**response_data)
 
+    except RequestCancelled:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    except HTTPException:
+        # e.g. 422 when no text passed the requested confidence threshold
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Combined extraction failed: {str(e)}")
     finally:
         # Cleanup temporary file
         if temp_path and os.path.exists(temp_path):
             os.unlink(temp_path)
+
+async def run_extraction(
+    image_path: str,
+    enable_groq: bool = True,
+    detector: Optional[str] = None,
+    progress: Optional[Callable[[str], None]] = None,
+    cancellation: Optional[CancellationToken] = None,
+    deadline: Optional[Deadline] = None,
+    options: Optional[OCRRequest] = None
+) -> Dict[str, Any]:
+    """
+    OCR, diagram detection and optional Groq enhancement of one image
+
+    Shared by ``/extract`` and extraction jobs.
+
+    OCR and diagram detection of the page run side by side on their own
+    pools. With ``enable_staged_pipeline`` the page goes through the shared
+    ``extract_pipeline``, so pages of concurrent requests also overlap
+    across stages; otherwise each request runs on its own.
+
+    Args:
+        image_path: Image to process
+        enable_groq: Enhance the notes with Groq when it is available
+        detector: Resolved diagram detector backend
+        progress: Called with the name of each stage as it starts
+        cancellation: Checked between stages; cancelled work stops there
+        deadline: Latency budget; before each stage, optional work that
+            would overrun it is skipped. Without the staged pipeline the
+            preprocessing, OCR and diagram steps are planned together before
+            they start.
+        options: Per-request processing mode, thresholds and study materials
+            (defaults to the full analysis)
+
+    Returns:
+        Combined (and possibly enhanced) notes data, with the list of
+        ``degradations`` when ``deadline`` is limited
+
+    Raises:
+        HTTPException: 422 if OCR produced nothing
+        RequestCancelled: If ``cancellation`` was cancelled
+    """
+    cancellation = cancellation or CancellationToken()
+    deadline = deadline or Deadline()
+    options = options or OCRRequest()
+    page = {
+        "image_path": image_path, "enable_groq": enable_groq, "detector": detector,
+        "cancellation": cancellation, "deadline": deadline, "options": options
+    }
+    if settings.enable_staged_pipeline:
+        result = await extract_pipeline.submit(page, progress)
+        return _report_degradations(result, deadline)
+
+    report = progress or (lambda stage: None)
+
+    # Layout analysis decides which pixels each stage processes
+    report("layout")
+    text_regions, diagram_regions = _route_layout_regions(image_path)
+    cancellation.raise_if_cancelled()
+
+    # OCR and diagrams start together, so their optional steps are decided up front
+    _plan_deadline(page, "preprocess")
+    denoise = not deadline.skips(DENOISE)
+    scale_factor = settings.deadline_ocr_scale_factor if deadline.skips(UPSCALE) else OCR_SCALE_FACTOR
+    spell_correction = not deadline.skips(SPELL_CORRECTION)
+
+    async def no_ocr():
+        return build_notes([])
+
+    async def diagrams():
+        boxes = await _run_diagram_detection(image_path, diagram_regions, detector)
+        if deadline.skips(CONNECTIONS):
+            return boxes, []
+        return boxes, await _run_connection_detection(image_path, boxes, diagram_regions, detector)
+
+    async def no_diagrams():
+        return None, None
+
+    # OCR and diagram detection run concurrently on their own pools
+    report("ocr")
+    ocr_result, (boxes, connections) = await run_extraction_stages(
+        (lambda: _run_ocr(image_path, text_regions, options, denoise, scale_factor, spell_correction))
+        if _runs_ocr(options) else no_ocr,
+        diagrams if _runs_diagrams(options) else no_diagrams
+    )
+    if not ocr_result:
+        raise HTTPException(status_code=422, detail="Failed to process image with OCR")
+    cancellation.raise_if_cancelled()
+
+    # Merge OCR and diagram results
+    combined_data = combine_extraction(ocr_result, boxes, connections)
+
+    # 🚀 NEW: Enhance with Groq AI if enabled
+    _plan_deadline(page, "llm")
+    if _runs_groq(page) and not deadline.skips(GROQ):
+        print("🤖 Enhancing content with Groq AI...")
+        report("enhancing")
+        return _report_degradations(await _enhance(combined_data, options), deadline)
+
+    print("📄 Using standard OCR/CV output (Groq disabled, unavailable or over the deadline)")
+    return _report_degradations(combined_data, deadline)
+
+async def _run_ocr(
+    image_path: str,
+    regions=None,
+    options: Optional[OCRRequest] = None,
+    denoise: bool = True,
+    scale_factor: float = OCR_SCALE_FACTOR,
+    spell_correction: bool = True
+):
+    """
+    Run OCR on the OCR pool, coalescing concurrent byte-identical uploads
+
+    The shared run reads its own copy of the upload, as the request that
+    started it may delete its file (client disconnect) while coalesced
+    requests still wait for the result. ``denoise``, ``scale_factor`` and
+    ``spell_correction`` are lowered for deadline-limited requests.
+
+    Returns:
+        Structured notes data or None if processing fails
+    """
+    options = options or OCRRequest()
+    key = make_cache_key(
+        "ocr", file_digest(image_path), regions, options.preprocess_image, options.confidence_threshold,
+        denoise, scale_factor, spell_correction
+    )
+    return await ocr_in_flight.do(
+        key,
+        lambda: run_on_private_copy(
+            ocr_executor, process_image, image_path, None, regions,
+            options.preprocess_image, options.confidence_threshold, denoise, scale_factor, spell_correction
+        )
+    )
+
+async def _run_diagram_detection(image_path: str, regions, detector: str):
+    """
+    Run diagram detection on the diagram pool
+
+    Returns:
+        Detected boxes; none when the layout found no diagram regions
+    """
+    if regions == []:
+        return []
+    return await run_in_executor(diagram_executor, detect_diagrams_json, image_path, regions=regions, backend=detector)
+
+async def _run_connection_detection(image_path: str, boxes, regions, detector: str):
+    """
+    Detect lines between diagram boxes on the diagram pool
+
+    Returns:
+        Connections; none for backends other than opencv (the lite detector
+        skips line detection and mock diagrams are not real)
+    """
+    if detector != "opencv" or not boxes:
+        return []
+    return await run_in_executor(diagram_executor, detect_connections_json, image_path, boxes, regions)
+
+def _route_layout_regions(image_path: str, image=None):
+    """
+    Split the page into OCR and diagram regions when layout routing is enabled
+
+    Args:
+        image_path: Page to analyze
+        image: The page already decoded, if available
+
+    Returns:
+        Tuple of (text_regions, diagram_regions). ``None`` means "process the
+        whole page" and is returned when routing is disabled, the analysis
+        fails, or no text was found (so OCR still gets a chance on its own).
+    """
+    if not settings.enable_layout_routing:
+        return None, None
+
+    try:
+        layout = layout_analyzer.analyze(image) if image is not None else layout_analyzer.analyze_file(image_path)
+    except Exception as e:
+        print(f"⚠️ Layout analysis failed, processing full page: {e}")
+        return None, None
+
+    if not layout["text_regions"]:
+        return None, None
+
+    return layout["text_regions"], layout["diagram_regions"]
+
+def _runs_ocr(options: OCRRequest) -> bool:
+    return options.mode != ProcessingMode.DIAGRAM_ONLY
+
+def _runs_diagrams(options: OCRRequest) -> bool:
+    return options.mode != ProcessingMode.OCR_ONLY
+
+def _runs_groq(page: Dict[str, Any]) -> bool:
+    """Whether the page is enhanced with Groq (there is no text to enhance without OCR)"""
+    return page["enable_groq"] and _runs_ocr(page["options"]) and groq_service.is_available()
+
+def _requested_artifacts(options: OCRRequest) -> AbstractSet[str]:
+    """Study materials to generate for the request"""
+    skipped = set()
+    if not options.generate_flashcards:
+        skipped.add("flashcards")
+    if not options.generate_knowledge_map:
+        skipped.add("knowledge_map")
+    return FULL_ARTIFACTS - skipped
+
+async def _enhance(combined_data: Dict[str, Any], options: OCRRequest) -> Dict[str, Any]:
+    """Enhance notes with the requested study materials, recording how long it took"""
+    started = time.perf_counter()
+    enhanced = await groq_service.enhance_ocr_content(
+        combined_data, Priority.INTERACTIVE, artifacts=_requested_artifacts(options)
+    )
+    step_costs.record(GROQ, time.perf_counter() - started)
+    return enhanced
+
+def _report_degradations(result: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+    """Add the optional steps skipped for the deadline to the response"""
+    if not deadline.limited:
+        return result
+    return {**result, "degradations": deadline.degradations}
+
+# Stages of the extraction pipeline, in order
+_STAGES = ["decode", "preprocess", "ocr", "llm"]
+
+def _remaining_work(page: Dict[str, Any], stage: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Estimated cost of the work of a page from ``stage`` on
+
+    Optional steps can only be skipped before the stage deciding them
+    starts (upscaling is decided during preprocessing); after that they
+    count as committed work.
+
+    Returns:
+        Tuple of (seconds of work that will run anyway, seconds of each
+        optional step that can still be skipped)
+    """
+    deadline = page["deadline"]
+    options = page["options"]
+    ahead = _STAGES[_STAGES.index(stage):]
+    committed = 0.0
+    optional: Dict[str, float] = {}
+
+    def add(step: str, seconds: float, decided_in: str) -> None:
+        nonlocal committed
+        if deadline.skips(step):
+            return
+        if decided_in in ahead:
+            optional[step] = seconds
+        else:
+            committed += seconds
+
+    if "decode" in ahead:
+        committed += step_costs.estimate(DECODE)
+    if "preprocess" in ahead and _runs_ocr(options) and options.preprocess_image:
+        committed += step_costs.estimate(PREPROCESS)
+        add(DENOISE, step_costs.estimate(DENOISE), "preprocess")
+    if "ocr" in ahead and _runs_ocr(options):
+        # OCR cost grows with the pixel count of the upscaled page
+        full = step_costs.estimate(OCR)
+        if options.preprocess_image:
+            low = full * (settings.deadline_ocr_scale_factor / OCR_SCALE_FACTOR) ** 2
+            committed += low
+            add(UPSCALE, full - low, "preprocess")
+        else:
+            committed += full / OCR_SCALE_FACTOR ** 2
+        if settings.enable_spell_correction:
+            add(SPELL_CORRECTION, step_costs.estimate(SPELL_CORRECTION), "ocr")
+    if "ocr" in ahead and _runs_diagrams(options):
+        # Diagrams run alongside OCR; counting both keeps the estimate on the safe side
+        committed += step_costs.estimate(f"{DIAGRAMS}:{page['detector']}")
+        if page["detector"] == "opencv":
+            add(CONNECTIONS, step_costs.estimate(CONNECTIONS), "ocr")
+    if "llm" in ahead and _runs_groq(page):
+        add(GROQ, step_costs.estimate(GROQ), "llm")
+
+    return committed, optional
+
+def _plan_deadline(page: Dict[str, Any], stage: str) -> None:
+    """Skip optional work ahead of ``stage`` that would overrun the page's deadline"""
+    deadline = page["deadline"]
+    if not deadline.limited:
+        return
+    skipped = deadline.plan(*_remaining_work(page, stage))
+    if skipped:
+        print(f"⏱️ {deadline.remaining() * 1000:.0f}ms left before {stage}, skipping {', '.join(skipped)}")
+
+def _validate_detector(detector: Optional[str]) -> str:
+    """Resolve the requested diagram detector backend or reject unknown names"""
+    try:
+        return detector_registry.resolve(detector)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+
+@router.get("/extract/pipeline")
+async def extract_pipeline_stats():
+    """
+    Load of each stage of the staged /extract pipeline, its bottleneck and
+    the step cost estimates used for deadline-aware requests
+    """
+    return JSONResponse(content={
+        "enabled": settings.enable_staged_pipeline,
+        **extract_pipeline.stats(),
+        "step_costs": step_costs.stats()
+    })
+
+def _decode_stage(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode the upload and route its layout regions (decode pool)"""
+    started = time.perf_counter()
+    image = processor.validate_image(page["image_path"])
+    if image is None:
+        raise HTTPException(status_code=422, detail="Failed to process image with OCR")
+    page["cancellation"].raise_if_cancelled()
+    text_regions, diagram_regions = _route_layout_regions(page["image_path"], image)
+    step_costs.record(DECODE, time.perf_counter() - started)
+    return {**page, "image": image, "text_regions": text_regions, "diagram_regions": diagram_regions}
+
+def _preprocess_stage(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Enhance and preprocess the page for OCR (preprocess pool)"""
+    page["cancellation"].raise_if_cancelled()
+    options = page["options"]
+    # The decoded page is not needed further down; diagrams read the file
+    if not _runs_ocr(options):
+        return {**page, "image": None, "prepared": None, "scale_factor": OCR_SCALE_FACTOR}
+    if not options.preprocess_image:
+        prepared = preprocess_page(page["image"], page["text_regions"], preprocess=False)
+        return {**page, "image": None, "prepared": prepared, "scale_factor": 1.0}
+
+    _plan_deadline(page, "preprocess")
+    deadline = page["deadline"]
+    denoise = not deadline.skips(DENOISE)
+    scale_factor = settings.deadline_ocr_scale_factor if deadline.skips(UPSCALE) else OCR_SCALE_FACTOR
+
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    prepared = preprocess_page(page["image"], page["text_regions"], denoise, scale_factor, timings)
+    if denoise:
+        step_costs.record(DENOISE, timings["denoise"])
+    step_costs.record(PREPROCESS, time.perf_counter() - started - timings["denoise"])
+
+    return {**page, "image": None, "prepared": prepared, "scale_factor": scale_factor}
+
+async def _ocr_stage(page: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read the preprocessed page (OCR pool) while its diagrams are detected
+    (diagram pool), then merge the two
+
+    Both run in one stage so a page is ready for the LLM after
+    max(OCR, diagrams) instead of their sum.
+    """
+    page["cancellation"].raise_if_cancelled()
+    _plan_deadline(page, "ocr")
+    ocr_result, (boxes, connections) = await run_extraction_stages(
+        lambda: _read_page(page), lambda: _detect_page_diagrams(page)
+    )
+    if not ocr_result:
+        raise HTTPException(status_code=422, detail="Failed to process image with OCR")
+    return {**page, "prepared": None, "combined": combine_extraction(ocr_result, boxes, connections)}
+
+async def _read_page(page: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """OCR of the preprocessed page, coalescing byte-identical uploads"""
+    options = page["options"]
+    scale_factor = page["scale_factor"]
+
+    async def read():
+        started = time.perf_counter()
+        extracted = await run_in_executor(
+            ocr_executor, read_text, page["prepared"], False, scale_factor, options.confidence_threshold
+        )
+        # Recorded as the cost at the full upscale factor
+        step_costs.record(OCR, (time.perf_counter() - started) * (OCR_SCALE_FACTOR / scale_factor) ** 2)
+        if spell_correction and extracted:
+            started = time.perf_counter()
+            extracted = await run_in_executor(ocr_executor, correct_texts, extracted)
+            step_costs.record(SPELL_CORRECTION, time.perf_counter() - started)
+        return build_notes(extracted) if extracted else None
+
+    if not _runs_ocr(options):
+        return build_notes([])
+
+    spell_correction = settings.enable_spell_correction and not page["deadline"].skips(SPELL_CORRECTION)
+    key = make_cache_key(
+        "ocr", file_digest(page["image_path"]), page["text_regions"],
+        options.preprocess_image, scale_factor, spell_correction, options.confidence_threshold
+    )
+    return await ocr_in_flight.do(key, read)
+
+async def _detect_page_diagrams(page: Dict[str, Any]):
+    """
+    Diagram boxes of the page and the connections between them
+
+    Returns:
+        Tuple of (boxes, connections); (None, None) when diagrams are not requested
+    """
+    if not _runs_diagrams(page["options"]):
+        return None, None
+    detector = page["detector"]
+
+    started = time.perf_counter()
+    boxes = await _run_diagram_detection(page["image_path"], page["diagram_regions"], detector)
+    if page["diagram_regions"] != []:
+        step_costs.record(f"{DIAGRAMS}:{detector}", time.perf_counter() - started)
+
+    connections = []
+    if not page["deadline"].skips(CONNECTIONS):
+        started = time.perf_counter()
+        connections = await _run_connection_detection(page["image_path"], boxes, page["diagram_regions"], detector)
+        if detector == "opencv" and boxes:
+            step_costs.record(CONNECTIONS, time.perf_counter() - started)
+    return boxes, connections
+
+async def _llm_stage(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Enhance the combined notes with Groq when enabled and within the deadline"""
+    page["cancellation"].raise_if_cancelled()
+    _plan_deadline(page, "llm")
+    if _runs_groq(page) and not page["deadline"].skips(GROQ):
+        return await _enhance(page["combined"], page["options"])
+    return page["combined"]
+
+# Shared /extract pipeline: CPU stages on their own pools, Groq as async tasks
+extract_pipeline = StagedPipeline("extract", [
+    Stage("decode", _decode_stage, settings.pipeline_decode_workers, decode_executor, settings.pipeline_queue_size),
+    Stage("preprocess", _preprocess_stage, settings.pipeline_preprocess_workers, preprocess_executor, settings.pipeline_queue_size),
+    Stage("ocr", _ocr_stage, settings.ocr_workers, queue_size=settings.pipeline_queue_size),
+    Stage("llm", _llm_stage, settings.pipeline_llm_concurrency, queue_size=settings.pipeline_queue_size)
+])
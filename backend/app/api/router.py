@@ -1,6 +1,6 @@
 
 from fastapi import APIRouter
-from app.api.endpoints import health, ocr, groq, outputs
+from app.api.endpoints import health, ocr, groq, outputs, jobs
 
 api_router = APIRouter()
 
@@ -8,4 +8,5 @@ api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(ocr.router, prefix="", tags=["ocr"])
 api_router.include_router(groq.router, prefix="/groq", tags=["groq"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 api_router.include_router(outputs.router, prefix="/outputs", tags=["outputs"])
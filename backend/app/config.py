@@ -20,21 +20,128 @@ class Settings(BaseSettings):
     ocr_languages: List[str] = ["en"]
     ocr_confidence_threshold: float = 0.6
     enable_spell_correction: bool = True
+    ocr_workers: int = 1  # Workers in the OCR pool sharing the EasyOCR reader
+    ocr_pool: str = "thread"  # thread, or process (one EasyOCR reader per worker process)
     
     # Image Processing
     diagram_detection_threshold: int = 127
     min_contour_area: float = 500.0
+    diagram_detector_backend: str = "opencv"  # opencv, lite or mock
+    diagram_lite_max_side: int = 1024  # Longest image side processed by the lite detector
+    diagram_workers: int = 2  # Threads running diagram detection alongside OCR
     max_image_size: int = 10 * 1024 * 1024  # 10MB
-    
+
+    # Layout Analysis
+    enable_layout_routing: bool = False  # Restrict OCR/diagram stages to their layout regions
+    layout_work_width: int = 800  # Width of the downsampled page used for segmentation
+
+    # Staged Extraction Pipeline
+    enable_staged_pipeline: bool = True  # /extract as decode -> preprocess -> OCR + diagrams -> LLM stages
+    pipeline_decode_workers: int = 2
+    pipeline_preprocess_workers: int = 2
+    pipeline_llm_concurrency: int = 8  # Groq enhancements in flight at once
+    pipeline_queue_size: int = 4  # Pages waiting in front of each stage before upstream blocks
+
+    # Deadline-aware /extract (X-Deadline-Ms): optional work is skipped to fit the budget
+    deadline_cost_quantile: float = 0.9  # Quantile of recent step timings used as cost estimates
+    deadline_ocr_scale_factor: float = 1.0  # OCR upscale factor once upscaling is given up
+
     # File Storage
     output_dir: str = "outputs"
     temp_dir: str = "temp"
     
     # Groq AI Configuration
     groq_api_key: Optional[str] = None
+    groq_base_url: Optional[str] = None  # e.g. a local fake server for load tests; defaults to api.groq.com
     groq_model: str = "llama-3.3-70b-versatile"
     groq_temperature: float = 0.7
     groq_max_tokens: int = 2000
+    groq_timeout_seconds: float = 30.0  # Per-attempt timeout for one completion
+    groq_max_concurrency: int = 8  # Concurrent in-flight completions per worker
+    groq_requests_per_minute: int = 30  # Local RPM/TPM buckets per model tier, kept in sync with rate-limit headers
+    groq_tokens_per_minute: int = 12000
+    groq_max_retries: int = 3  # Retries for 429, 5xx and connection errors
+    groq_retry_base_delay: float = 0.5
+    groq_retry_max_delay: float = 20.0
+    groq_queue_timeout_seconds: float = 60.0  # Longest wait for admission before falling back
+    groq_max_connections: int = 20
+    groq_max_keepalive_connections: int = 10
+    groq_keepalive_expiry: float = 30.0
+    
+    # Map-reduce enhancement for long lectures
+    groq_map_reduce_threshold_tokens: int = 3000  # Inputs above this estimate are chunked
+    groq_chunk_tokens: int = 1500  # Token budget per chunk
+    groq_map_concurrency: int = 4  # Chunks processed concurrently per lecture
+    groq_chunk_max_tokens: int = 900
+    groq_reduce_max_tokens: int = 400
+
+    # Model routing: short single-topic notes go to the fast model, everything else to groq_model
+    groq_fast_model: Optional[str] = "llama-3.1-8b-instant"  # None sends every request to groq_model
+    groq_fast_temperature: float = 0.5
+    groq_fast_max_tokens: int = 1500
+    groq_fast_max_input_tokens: int = 400  # Doubled for flashcard/summary-only requests
+    groq_fast_max_sections: int = 1  # Inputs with more headings are multi-topic lectures
+    groq_fast_expected_latency_ms: float = 1500.0  # Latency estimates until enough calls are observed
+    groq_expected_latency_ms: float = 6000.0
+    groq_latency_slo_ms: Optional[float] = None  # Default latency target for enhancement requests
+
+    # Request hedging: duplicate a completion that runs longer than usual and keep the first answer
+    groq_hedging_enabled: bool = False
+    groq_hedge_quantile: float = 0.9  # Hedge after this quantile of recent latencies per tier
+    groq_hedge_initial_delay_ms: float = 5000.0  # Threshold until enough calls are observed
+    groq_hedge_min_delay_ms: float = 500.0
+    groq_hedge_budget_per_minute: int = 6  # Most extra calls spent on hedges per minute
+
+    # Batched enhancement: short documents share one completion (/api/groq/enhance-batch)
+    groq_batch_max_documents: int = 8  # Documents packed into one completion
+    groq_batch_max_input_tokens: int = 2000  # Combined notes per batched completion
+    groq_batch_doc_max_tokens: int = 400  # Larger documents are enhanced individually
+    groq_batch_tokens_per_document: int = 600  # Completion budget per packed document
+    groq_batch_max_request_documents: int = 100  # Most documents accepted per request
+
+    # Flashcard-only generation (/api/groq/generate-flashcards)
+    groq_flashcard_tokens: int = 60  # Completion budget per requested card
+    groq_flashcards_max_cards: int = 20
+
+    # Prompt compaction of OCR text before it is sent to the LLM
+    prompt_compaction_enabled: bool = True
+    prompt_token_budget: int = 12000  # Least reliable blocks are cut beyond this estimate
+    prompt_near_duplicate_threshold: float = 0.8  # Shingle Jaccard similarity for duplicate lines
+    prompt_boilerplate_min_repeats: int = 3  # Short lines repeated this often across pages are headers/footers
+    prompt_min_confidence: float = 0.2  # Text blocks below this OCR confidence are dropped
+    
+    # LLM Response Cache
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "cache/llm_responses.sqlite3"
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_memory_entries: int = 256
+    llm_cache_max_entries: int = 10000
+    
+    # Background jobs (/api/jobs); the job table lives in DATABASE_URL
+    job_workers: int = 2  # Jobs run concurrently per process
+    job_upload_dir: str = "uploads/jobs"  # Job input images, kept until the job is purged
+    job_heartbeat_seconds: float = 10.0
+    job_stale_seconds: float = 60.0  # Running jobs without a heartbeat this long are queued again
+    job_retention_seconds: int = 7 * 24 * 3600  # Finished jobs are deleted after this
+    
+    # Admission control: heavy requests are rejected with 503 + Retry-After
+    # once their expected wait exceeds the SLO of their endpoint class
+    admission_enabled: bool = True
+    admission_ocr_slo_seconds: float = 30.0  # /api/ocr and /api/extract
+    admission_ocr_service_seconds: float = 5.0  # Initial estimate, refined from completed requests
+    admission_diagram_slo_seconds: float = 10.0  # /api/diagram-detect
+    admission_diagram_service_seconds: float = 1.0
+    admission_llm_slo_seconds: float = 30.0  # POST /api/groq/*
+    admission_llm_service_seconds: float = 4.0
+    
+    # Preforked production server (serve.py)
+    server_workers: int = 4
+    worker_max_requests: int = 0  # Recycle a worker after this many requests (0 = never)
+    worker_max_requests_jitter: int = 50
+    worker_max_age_seconds: float = 0  # Recycle workers older than this (0 = never)
+    worker_max_memory_mb: float = 0  # Recycle a worker whose own (unshared) memory passes this (0 = never)
+    worker_graceful_timeout: float = 30.0  # Time a recycled worker gets to finish its requests
+    worker_memory_report_seconds: float = 300.0
     
     # CORS Configuration
     cors_origins: List[str] = ["*"]
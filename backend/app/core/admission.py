@@ -0,0 +1,226 @@
+"""
+Admission Control
+
+Rejects heavy requests up front with ``503`` and ``Retry-After`` once the
+work already admitted for their endpoint class (OCR, diagrams, LLM) would
+make them wait longer than that class's latency SLO. During a classroom
+burst clients get a fast, honest answer instead of timing out while the
+backend keeps processing requests nobody is waiting for.
+
+The expected wait of a new request is estimated from the requests in
+flight for its class, the class's capacity (the workers serving it) and
+a moving average of its service time:
+
+    wait = max(0, in_flight - capacity + 1) / capacity * service_time
+
+Service time is learned from completed requests, discounting the time
+they spent queued behind others. Light routes (health, outputs, job
+status, ...) are never tracked or rejected.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+OCR = "ocr"
+DIAGRAM = "diagram"
+LLM = "llm"
+LIGHT = "light"
+
+# (class, method, path prefix); the first match wins, anything else is light
+ROUTE_CLASSES: List[Tuple[str, str, str]] = [
+    (OCR, "POST", "/api/ocr"),
+    (OCR, "POST", "/api/extract"),
+    (DIAGRAM, "POST", "/api/diagram-detect"),
+    (LLM, "POST", "/api/groq/")
+]
+
+
+def classify_request(method: str, path: str) -> str:
+    """Endpoint class of a request"""
+    for endpoint_class, route_method, prefix in ROUTE_CLASSES:
+        if method == route_method and path.startswith(prefix):
+            return endpoint_class
+    return LIGHT
+
+
+@dataclass
+class ClassPolicy:
+    capacity: int  # Requests of the class served at once
+    slo_seconds: float  # Longest acceptable expected wait
+    service_seconds: float  # Initial service time estimate, refined by observations
+
+
+@dataclass
+class _ClassState:
+    policy: ClassPolicy
+    service_seconds: float
+    in_flight: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    completed: int = 0
+
+
+@dataclass
+class Ticket:
+    """An admitted request; pass it back to ``release`` when it finishes"""
+    endpoint_class: str
+    ahead: int  # Requests it had to wait for when admitted
+    started_at: float
+
+
+class AdmissionController:
+    """Per-class in-flight accounting and wait-based admission"""
+
+    # Weight of the newest observation in the service time average
+    SMOOTHING = 0.2
+
+    def __init__(self, policies: Dict[str, ClassPolicy], clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            policies: Capacity, SLO and initial service time by endpoint class
+            clock: Time source, injectable for tests
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._classes = {name: _ClassState(policy, policy.service_seconds) for name, policy in policies.items()}
+
+    def try_admit(self, endpoint_class: str) -> Tuple[Optional[Ticket], float]:
+        """
+        Admit a request unless its expected wait exceeds the class SLO
+
+        Returns:
+            Tuple of (ticket, expected wait in seconds); the ticket is None
+            when the request is rejected. Classes without a policy are
+            always admitted.
+        """
+        state = self._classes.get(endpoint_class)
+        if state is None:
+            return Ticket(endpoint_class, 0, self._clock()), 0.0
+        with self._lock:
+            ahead = self._ahead(state)
+            wait = self._expected_wait(state, ahead)
+            if wait > state.policy.slo_seconds:
+                state.rejected += 1
+                return None, wait
+            state.in_flight += 1
+            state.admitted += 1
+        return Ticket(endpoint_class, ahead, self._clock()), wait
+
+    def release(self, ticket: Ticket, learn: bool = True) -> None:
+        """
+        Record a finished request
+
+        Args:
+            ticket: Returned by ``try_admit``
+            learn: Update the service time estimate from this request
+                (off for errors, which are usually much faster than real work)
+        """
+        state = self._classes.get(ticket.endpoint_class)
+        if state is None:
+            return
+        duration = self._clock() - ticket.started_at
+        with self._lock:
+            state.in_flight -= 1
+            state.completed += 1
+            if not learn:
+                return
+            # The request queued behind ``ahead`` others served ``capacity`` at a time
+            service = duration / (1 + ticket.ahead / state.policy.capacity)
+            state.service_seconds += self.SMOOTHING * (service - state.service_seconds)
+
+    def retry_after(self, endpoint_class: str, wait: float) -> int:
+        """Seconds until enough admitted work has drained for a retry to fit the SLO"""
+        slo = self._classes[endpoint_class].policy.slo_seconds
+        return max(1, math.ceil(wait - slo))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    "in_flight": state.in_flight,
+                    "capacity": state.policy.capacity,
+                    "queued": max(0, state.in_flight - state.policy.capacity),
+                    "service_seconds": round(state.service_seconds, 3),
+                    "expected_wait_seconds": round(self._expected_wait(state, self._ahead(state)), 3),
+                    "slo_seconds": state.policy.slo_seconds,
+                    "admitted": state.admitted,
+                    "rejected": state.rejected,
+                    "completed": state.completed
+                }
+                for name, state in self._classes.items()
+            }
+
+    @staticmethod
+    def _ahead(state: _ClassState) -> int:
+        """Requests a new arrival has to wait for before a worker is free"""
+        return max(0, state.in_flight - state.policy.capacity + 1)
+
+    @staticmethod
+    def _expected_wait(state: _ClassState, ahead: int) -> float:
+        return ahead / state.policy.capacity * state.service_seconds
+
+
+class AdmissionMiddleware:
+    """ASGI middleware rejecting heavy requests the controller does not admit"""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint_class = classify_request(scope["method"], scope["path"])
+        if endpoint_class == LIGHT:
+            await self.app(scope, receive, send)
+            return
+
+        ticket, wait = self.controller.try_admit(endpoint_class)
+        if ticket is None:
+            retry_after = self.controller.retry_after(endpoint_class, wait)
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: expected wait {wait:.1f}s")
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "detail": f"Server busy: expected wait for {endpoint_class} requests is {wait:.0f}s",
+                    "endpoint_class": endpoint_class,
+                    "retry_after_seconds": retry_after
+                },
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.controller.release(ticket, learn=status < 400)
+
+
+# Global controller; capacities follow the worker pools serving each class
+admission_controller = AdmissionController({
+    OCR: ClassPolicy(settings.ocr_workers, settings.admission_ocr_slo_seconds, settings.admission_ocr_service_seconds),
+    DIAGRAM: ClassPolicy(settings.diagram_workers, settings.admission_diagram_slo_seconds, settings.admission_diagram_service_seconds),
+    LLM: ClassPolicy(settings.groq_max_concurrency, settings.admission_llm_slo_seconds, settings.admission_llm_service_seconds)
+})
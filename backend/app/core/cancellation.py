@@ -0,0 +1,110 @@
+"""
+Request Cancellation
+
+When a client disconnects (the frontend aborts, a tab is closed), the work
+for its request should stop instead of running OCR, diagram detection and
+Groq calls to completion for nobody.
+
+A ``CancellationToken`` is cancelled by a watcher that notices the HTTP
+disconnect. Work run through ``token.run`` is cancelled with it: pending
+awaits are interrupted, queued executor jobs are withdrawn from their pools
+and pending LLM calls leave the scheduler queue. Blocking steps running on
+worker threads cannot be interrupted, so multi-step code also checks the
+token between steps with ``raise_if_cancelled``.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Optional, Set, TypeVar
+
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status logged for requests whose client went away (nginx convention)
+CLIENT_CLOSED_REQUEST = 499
+
+
+class RequestCancelled(Exception):
+    """The work was abandoned because its token was cancelled"""
+
+
+class CancellationToken:
+    """Cancellation flag for one request, shared by the steps doing its work"""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._tasks: Set[asyncio.Future] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Flag the token and cancel the work running through ``run``"""
+        if self.cancelled:
+            return
+        self.reason = reason
+        for task in list(self._tasks):
+            task.cancel()
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Stop between steps of cancelled work
+
+        Raises:
+            RequestCancelled: If the token has been cancelled
+        """
+        if self.cancelled:
+            raise RequestCancelled(self.reason)
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """
+        Await work as a task that is cancelled together with the token
+
+        Raises:
+            RequestCancelled: If the token is cancelled before or during the work
+        """
+        if self.cancelled:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise RequestCancelled(self.reason)
+        task = asyncio.ensure_future(awaitable)
+        self._tasks.add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self.cancelled and task.cancelled():
+                raise RequestCancelled(self.reason) from None
+            raise
+        finally:
+            self._tasks.discard(task)
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request) -> AsyncIterator[CancellationToken]:
+    """
+    Token that is cancelled when the client of ``request`` disconnects
+
+    Use it once the request body has been read (FastAPI has already done
+    so for ``UploadFile`` and JSON body parameters): the watcher consumes
+    further ASGI messages, of which only ``http.disconnect`` remains.
+    """
+    token = CancellationToken()
+
+    async def watch() -> None:
+        while True:
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                logger.info(f"Client disconnected from {request.url.path}, cancelling its work")
+                token.cancel("client disconnected")
+                return
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield token
+    finally:
+        watcher.cancel()
@@ -0,0 +1,160 @@
+"""
+Deadline-Aware Degradation
+
+A client can send a latency budget with ``X-Deadline-Ms``. Before each
+stage of the extraction pipeline the remaining budget is compared with
+the estimated cost of the work still ahead, and optional steps are given
+up, in ``DEGRADATION_ORDER``, until the rest is expected to fit:
+
+- ``denoise``: NL-means denoising before OCR
+- ``upscale``: OCR at a lower upscale factor (cost grows with pixel count)
+- ``spell_correction``: spell checking of the OCR text
+- ``connections``: line detection between the detected diagram boxes
+- ``groq``: Groq enhancement; the plain OCR/CV notes are returned
+
+Costs are a high quantile of recent timings of each step, learned from all
+extraction requests, so plans follow the actual load of the server. The
+degradations applied are reported in the response.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+# Steps whose timings are learned
+DECODE = "decode"
+PREPROCESS = "preprocess"
+OCR = "ocr"
+DIAGRAMS = "diagrams"
+
+# Optional steps, in the order they are given up when the budget is short
+DENOISE = "denoise"
+UPSCALE = "upscale"
+SPELL_CORRECTION = "spell_correction"
+CONNECTIONS = "connections"
+GROQ = "groq"
+DEGRADATION_ORDER: List[str] = [DENOISE, UPSCALE, SPELL_CORRECTION, CONNECTIONS, GROQ]
+
+# Cost estimates (seconds) until enough timings are observed. OCR is
+# normalized to the full upscale factor; diagrams are keyed by backend.
+DEFAULT_STEP_SECONDS: Dict[str, float] = {
+    DECODE: 0.05,
+    PREPROCESS: 0.3,
+    DENOISE: 1.5,
+    OCR: 4.0,
+    SPELL_CORRECTION: 0.5,
+    f"{DIAGRAMS}:opencv": 0.3,
+    CONNECTIONS: 0.2,
+    f"{DIAGRAMS}:lite": 0.1,
+    GROQ: 4.0
+}
+
+
+class StepCosts:
+    """Recent timings of pipeline steps and their cost estimates"""
+
+    # Timings needed before a step's default estimate is replaced
+    MIN_SAMPLES = 5
+
+    def __init__(self, defaults: Dict[str, float], quantile: float = 0.9, window: int = 100):
+        """
+        Args:
+            defaults: Estimates (seconds) used until a step has enough timings
+            quantile: Quantile of recent timings used as the estimate
+            window: Timings kept per step
+        """
+        self.defaults = defaults
+        self.quantile = quantile
+        self.window = window
+        self._timings: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, step: str, seconds: float) -> None:
+        with self._lock:
+            self._timings.setdefault(step, deque(maxlen=self.window)).append(seconds)
+
+    def estimate(self, step: str) -> float:
+        """Expected seconds of a step (0 for steps never seen and without a default)"""
+        with self._lock:
+            recent = list(self._timings.get(step, ()))
+        if len(recent) < self.MIN_SAMPLES:
+            return self.defaults.get(step, 0.0)
+        return float(np.quantile(recent, self.quantile))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = set(self.defaults) | set(self._timings)
+            samples = {step: len(self._timings.get(step, ())) for step in steps}
+        return {
+            step: {"estimate_ms": round(self.estimate(step) * 1000, 1), "samples": samples[step]}
+            for step in sorted(steps)
+        }
+
+
+class Deadline:
+    """Latency budget of one request and the optional steps it gave up"""
+
+    def __init__(self, budget_ms: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            budget_ms: Budget from the request; None for no deadline
+            clock: Time source, injectable for tests
+        """
+        self.budget_ms = budget_ms
+        self._clock = clock
+        self._started = clock()
+        self._skipped: List[str] = []
+
+    @property
+    def limited(self) -> bool:
+        return self.budget_ms is not None
+
+    @property
+    def degradations(self) -> List[str]:
+        """Skipped steps, in the order they were given up"""
+        return list(self._skipped)
+
+    def remaining(self) -> float:
+        """Seconds left of the budget (may be negative once it is overrun)"""
+        if not self.limited:
+            return math.inf
+        return self.budget_ms / 1000 - (self._clock() - self._started)
+
+    def skips(self, step: str) -> bool:
+        return step in self._skipped
+
+    def plan(self, committed: float, optional: Dict[str, float]) -> List[str]:
+        """
+        Give up optional steps until the work ahead fits the remaining budget
+
+        Args:
+            committed: Estimated seconds of the work ahead that will run anyway
+            optional: Estimated seconds of each optional step ahead that can
+                still be skipped
+
+        Returns:
+            Steps skipped by this call
+        """
+        total = committed + sum(optional.values())
+        remaining = self.remaining()
+        skipped = []
+        for step in DEGRADATION_ORDER:
+            if total <= remaining:
+                break
+            if step in optional and not self.skips(step):
+                self._skipped.append(step)
+                skipped.append(step)
+                total -= optional[step]
+        return skipped
+
+
+# Global cost estimates shared by every extraction request
+step_costs = StepCosts(DEFAULT_STEP_SECONDS, quantile=settings.deadline_cost_quantile)
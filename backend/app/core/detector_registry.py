@@ -0,0 +1,139 @@
+"""
+Diagram Detector Registry
+
+Pluggable registry of diagram detection backends. Each backend is created
+once on first use and reused for every request, and every call is timed so
+backends can be compared (A/B) in production by switching
+``diagram_detector_backend`` or passing ``detector`` per request.
+
+A backend is any object with a
+``detect_boxes(image_path, regions=None) -> List[Dict[str, Any]]`` method
+returning boxes shaped like ``DiagramBox`` (x, y, w, h, shape, confidence).
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import BackendTimings
+
+logger = get_logger(__name__)
+
+
+class DetectorRegistry:
+    """Registry of named, lazily created singleton diagram detectors"""
+
+    def __init__(self, default_backend: str):
+        self.default_backend = default_backend
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._descriptions: Dict[str, str] = {}
+        self._instances: Dict[str, Any] = {}
+        self._timings: Dict[str, BackendTimings] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], description: str = "") -> None:
+        """
+        Register a detector backend
+
+        Args:
+            name: Backend name used in settings and requests
+            factory: Zero-argument callable creating the detector
+            description: Human readable description for health output
+        """
+        self._factories[name] = factory
+        self._descriptions[name] = description
+        self._timings.setdefault(name, BackendTimings())
+
+    def names(self) -> List[str]:
+        """Names of all registered backends"""
+        return list(self._factories)
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        """
+        Resolve a requested backend name, falling back to the default
+
+        Raises:
+            KeyError: If the backend is not registered
+        """
+        name = name or self.default_backend
+        if name not in self._factories:
+            raise KeyError(f"Unknown diagram detector '{name}'. Available: {', '.join(self.names())}")
+        return name
+
+    def get(self, name: Optional[str] = None) -> Any:
+        """Get the shared instance of a backend, creating it on first use"""
+        name = self.resolve(name)
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._factories[name]()
+                    self._instances[name] = instance
+                    logger.info(f"Diagram detector backend '{name}' initialized")
+        return instance
+
+    def detect(
+        self,
+        image_path: str,
+        regions: Optional[List[Dict[str, Any]]] = None,
+        backend: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Detect diagram boxes with the selected backend and record its timing
+
+        Args:
+            image_path: Path to the image file
+            regions: Optional layout diagram regions to restrict detection to
+            backend: Backend name (defaults to the configured backend)
+
+        Returns:
+            List of diagram boxes
+        """
+        name = self.resolve(backend)
+        detector = self.get(name)
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            return detector.detect_boxes(image_path, regions)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._timings[name].record((time.perf_counter() - started) * 1000, failed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-backend timing statistics"""
+        return {
+            name: {
+                "description": self._descriptions[name],
+                "loaded": name in self._instances,
+                **self._timings[name].snapshot()
+            }
+            for name in self._factories
+        }
+
+
+def _create_opencv_detector():
+    from app.core.diagram_detector import DiagramDetector
+    return DiagramDetector()
+
+
+def _create_lite_detector():
+    from app.core.diagram_detector import FastDiagramDetector
+    return FastDiagramDetector()
+
+
+def _create_mock_detector():
+    from app.core.diagramDetector import MockDiagramDetector
+    return MockDiagramDetector()
+
+
+# Global detector registry
+detector_registry = DetectorRegistry(default_backend=settings.diagram_detector_backend)
+detector_registry.register("opencv", _create_opencv_detector, "Contour and Hough line detector")
+detector_registry.register("lite", _create_lite_detector, "Downsampled contour-only fast path")
+detector_registry.register("mock", _create_mock_detector, "Static sample diagrams for development")
@@ -1,9 +1,9 @@
 """
 Diagram Detection Module
 
-This module handles detection and analysis of diagrams, charts, and 
-visual elements in uploaded images. This is where your existing 
-diagramDetector.py functionality should be integrated.
+Mock diagram detector and layout analysis entry point. The mock backend
+returns static sample diagrams and is registered in the detector registry
+as ``mock``; real detection lives in ``app.core.diagram_detector``.
 """
 
 from typing import List, Dict, Any, Tuple
@@ -14,18 +14,45 @@ import numpy as np
 
 from app.core.logging import get_logger
 from app.core.config import get_settings
-from app.models.responses import KnowledgeMapNode, KnowledgeMapEdge, KnowledgeMapGraph
+from app.models.response import KnowledgeMapNode, KnowledgeMapEdge, KnowledgeMapData
+from app.core.layout_analyzer import layout_analyzer
+from app.core.detector_registry import detector_registry
 
 logger = get_logger(__name__)
 settings = get_settings()
 
 
-class DiagramDetector:
-    """Detector for diagrams, charts, and visual elements in images"""
+class MockDiagramDetector:
+    """Mock detector returning sample diagrams, for development and A/B baselines"""
     
     def __init__(self):
         self.confidence_threshold = 0.7
-        logger.info("Diagram Detector initialized")
+        logger.info("Mock Diagram Detector initialized")
+    
+    def detect_boxes(self, image_path: str, regions: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Detect diagrams and return their elements as bounding boxes
+        
+        Args:
+            image_path: Path to the image file
+            regions: Ignored by the mock backend
+            
+        Returns:
+            List of boxes in the ``DiagramBox`` format
+        """
+        boxes = []
+        for diagram in self.detect_diagrams(image_path):
+            for element in diagram.get("elements", []):
+                x1, y1, x2, y2 = element["bbox"]
+                boxes.append({
+                    "x": x1,
+                    "y": y1,
+                    "w": x2 - x1,
+                    "h": y2 - y1,
+                    "shape": element["type"],
+                    "confidence": diagram["confidence"]
+                })
+        return boxes
     
     def detect_diagrams(self, image_path: str) -> List[Dict[str, Any]]:
         """
@@ -38,15 +65,12 @@ class DiagramDetector:
             List of detected diagram elements
             
         Note:
-            This is a placeholder - integrate your existing diagramDetector.py logic here
+            Returns static sample diagrams; use the "opencv" or "lite"
+            registry backends for real detection
         """
         try:
             logger.info(f"Detecting diagrams in: {image_path}")
             
-            # TODO: Replace this with your actual diagram detection implementation
-            # Your diagramDetector.py logic should go here
-            
-            # For now, return mock data
             diagrams = self._generate_mock_diagrams()
             
             logger.info(f"Detected {len(diagrams)} diagram elements")
@@ -59,8 +83,6 @@ class DiagramDetector:
     def _generate_mock_diagrams(self) -> List[Dict[str, Any]]:
         """
         Generate mock diagram data for testing
-        
-        TODO: Remove this method once your diagram detection implementation is integrated
         """
         return [
             {
@@ -154,7 +176,7 @@ class DiagramDetector:
             logger.error(f"Error detecting connections in {image_path}: {str(e)}")
             raise
     
-    def generate_knowledge_graph(self, diagrams: List[Dict[str, Any]], text_data: List[Dict[str, Any]] = None) -> KnowledgeMapGraph:
+    def generate_knowledge_graph(self, diagrams: List[Dict[str, Any]], text_data: List[Dict[str, Any]] = None) -> KnowledgeMapData:
         """
         Generate a knowledge graph from detected diagrams and text
         
@@ -163,7 +185,7 @@ class DiagramDetector:
             text_data: Optional text data from OCR
             
         Returns:
-            KnowledgeMapGraph object
+            KnowledgeMapData object
         """
         try:
             nodes = []
@@ -182,12 +204,12 @@ class DiagramDetector:
                     # Add edges from connections
                     if "connections" in diagram:
                         for connection in diagram["connections"]:
-                            edges.append(KnowledgeMapEdge(
-                                from_node=connection["from"],
-                                to=connection["to"]
-                            ))
+                            edges.append(KnowledgeMapEdge(**{
+                                "from": connection["from"],
+                                "to": connection["to"]
+                            }))
             
-            return KnowledgeMapGraph(nodes=nodes, edges=edges)
+            return KnowledgeMapData(nodes=nodes, edges=edges)
             
         except Exception as e:
             logger.error(f"Error generating knowledge graph: {str(e)}")
@@ -201,44 +223,28 @@ class DiagramDetector:
             image_path: Path to the image file
             
         Returns:
-            Layout analysis results
+            Layout analysis results with title/text regions and diagram
+            regions as [x1, y1, x2, y2] boxes
         """
         try:
-            # TODO: Implement layout analysis
-            # This could detect text regions, diagram regions, etc.
-            
-            return {
-                "layout_type": "mixed",
-                "text_regions": [
-                    {"bbox": [50, 50, 300, 100], "type": "title"},
-                    {"bbox": [50, 350, 400, 450], "type": "description"}
-                ],
-                "diagram_regions": [
-                    {"bbox": [100, 120, 350, 320], "type": "flowchart"}
-                ]
-            }
+            return layout_analyzer.analyze_file(image_path)
             
         except Exception as e:
             logger.error(f"Error analyzing layout of {image_path}: {str(e)}")
             raise
 
 
-# Global diagram detector instance
-diagram_detector = DiagramDetector()
-
-
 def detect_diagrams_in_image(image_path: str) -> List[Dict[str, Any]]:
     """
-    Main function to detect diagrams in an image
-    
-    This function should integrate your existing diagramDetector.py functionality
+    Detect sample diagrams in an image using the shared mock backend
     """
-    return diagram_detector.detect_diagrams(image_path)
+    return detector_registry.get("mock").detect_diagrams(image_path)
 
 
-def generate_knowledge_map_from_image(image_path: str, text_data: List[Dict[str, Any]] = None) -> KnowledgeMapGraph:
+def generate_knowledge_map_from_image(image_path: str, text_data: List[Dict[str, Any]] = None) -> KnowledgeMapData:
     """
     Generate knowledge map from image analysis
     """
-    diagrams = diagram_detector.detect_diagrams(image_path)
-    return diagram_detector.generate_knowledge_graph(diagrams, text_data)
+    detector = detector_registry.get("mock")
+    diagrams = detector.detect_diagrams(image_path)
+    return detector.generate_knowledge_graph(diagrams, text_data)
@@ -0,0 +1,59 @@
+"""
+Worker Pools
+
+Dedicated executors for CPU-heavy stages so they never run on the event
+loop. The OCR pool defaults to a single worker, which keeps calls into the
+shared EasyOCR reader serialized while the loop stays responsive. With
+``ocr_pool = "process"`` OCR runs in worker processes instead, each with
+its own reader: more memory, but OCR of several pages truly in parallel.
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.config import settings
+from app.utils.file_handler import private_copy
+
+# OCR pool (EasyOCR / torch)
+if settings.ocr_pool == "process":
+    ocr_executor: Executor = ProcessPoolExecutor(max_workers=settings.ocr_workers)
+else:
+    ocr_executor = ThreadPoolExecutor(max_workers=settings.ocr_workers, thread_name_prefix="ocr")
+
+# Diagram detection pool (OpenCV releases the GIL)
+diagram_executor = ThreadPoolExecutor(max_workers=settings.diagram_workers, thread_name_prefix="diagram")
+
+# Image decoding and OCR preprocessing pools of the staged /extract pipeline
+decode_executor = ThreadPoolExecutor(max_workers=settings.pipeline_decode_workers, thread_name_prefix="decode")
+preprocess_executor = ThreadPoolExecutor(max_workers=settings.pipeline_preprocess_workers, thread_name_prefix="preprocess")
+
+
+async def run_in_executor(executor: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking function on an executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_on_private_copy(executor: Executor, fn: Callable[..., Any], file_path: str, *args: Any, **kwargs: Any) -> Any:
+    """
+    Run ``fn(copy, *args, **kwargs)`` on an executor with a private copy of ``file_path``
+
+    For executions shared by several requests (single-flight), which can
+    outlive the request whose upload they read: that request deletes its
+    file once it stops waiting, e.g. when its client disconnects. The copy
+    is removed when the job finishes or is withdrawn from the pool, not
+    when an awaiting task is cancelled while the job still runs.
+    """
+    copy_path = private_copy(file_path)
+    future = executor.submit(functools.partial(fn, copy_path, *args, **kwargs))
+    future.add_done_callback(lambda _: _remove(copy_path))
+    return await asyncio.wrap_future(future)
+
+
+def _remove(path: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
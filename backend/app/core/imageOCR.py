@@ -2,11 +2,13 @@ import cv2
 import easyocr
 import json
 import os
+import time
 from datetime import datetime
 from spellchecker import SpellChecker
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from app.config import settings
 from app.core.image_processor import ImageProcessor
+from app.core.layout_analyzer import crop_region
 
 # Initialize OCR reader
 try:
@@ -20,6 +22,12 @@ spell = SpellChecker()
 # Initialize image processor
 processor = ImageProcessor()
 
+# Upscaling applied before OCR; result bboxes are in this scaled space
+OCR_SCALE_FACTOR = 2.0
+
+# Margin kept around layout regions so glyph edges are not clipped
+REGION_PADDING = 8
+
 def correct_spelling(text: str) -> str:
     """
     Correct spelling errors in extracted text
@@ -46,12 +54,28 @@ def correct_spelling(text: str) -> str:
     
     return " ".join(corrected)
 
-def extract_text_with_confidence(image_path: str) -> List[Dict[str, Any]]:
+def extract_text_with_confidence(
+    image_path: str,
+    regions: Optional[List[Dict[str, Any]]] = None,
+    preprocess: bool = True,
+    confidence_threshold: Optional[float] = None,
+    denoise: bool = True,
+    scale_factor: float = OCR_SCALE_FACTOR,
+    spell_correction: bool = True
+) -> List[Dict[str, Any]]:
     """
     Extract text with confidence scores
     
     Args:
         image_path: Path to the image file
+        regions: Optional layout text regions ({"bbox": [x1, y1, x2, y2]});
+            when given, only these parts of the page are processed
+        preprocess: Enhance and upscale the image before OCR
+        confidence_threshold: Minimum confidence of kept text
+            (defaults to ``settings.ocr_confidence_threshold``)
+        denoise: Apply NL-means denoising when preprocessing
+        scale_factor: Upscaling applied when preprocessing
+        spell_correction: Correct the spelling of the text
         
     Returns:
         List of extracted text with confidence scores
@@ -61,12 +85,127 @@ def extract_text_with_confidence(image_path: str) -> List[Dict[str, Any]]:
     if image is None:
         return []
     
-    # Enhance image quality
-    enhanced = processor.enhance_image_quality(image)
+    scale_factor = scale_factor if preprocess else 1.0
+    prepared = preprocess_page(image, regions, denoise, scale_factor, preprocess=preprocess)
+    return read_text(prepared, spell_correction, scale_factor, confidence_threshold)
+
+def preprocess_page(
+    image,
+    regions: Optional[List[Dict[str, Any]]] = None,
+    denoise: bool = True,
+    scale_factor: float = OCR_SCALE_FACTOR,
+    timings: Optional[Dict[str, float]] = None,
+    preprocess: bool = True
+) -> List[Tuple[Any, Tuple[int, int]]]:
+    """
+    Enhance and preprocess a decoded page (or its layout regions) for OCR
+    
+    Args:
+        image: Decoded page image
+        regions: Optional layout text regions ({"bbox": [x1, y1, x2, y2]})
+        denoise: Apply NL-means denoising
+        scale_factor: Upscaling applied before OCR
+        timings: Optional dict receiving the seconds spent denoising
+            under "denoise"
+        preprocess: When False, the page (or its regions) is returned as
+            decoded; read it with ``scale_factor=1.0``
+        
+    Returns:
+        List of (preprocessed image, origin) pairs, where origin is the
+        position of the region in the full page
+    """
+    timings = {} if timings is None else timings
+    timings.setdefault("denoise", 0.0)
+    
+    def prepare(part):
+        return _preprocess(part, denoise, scale_factor, timings) if preprocess else part
+    
+    if not regions:
+        return [(prepare(image), (0, 0))]
+    
+    prepared = []
+    for region in regions:
+        crop, origin = crop_region(image, region["bbox"], pad=REGION_PADDING)
+        if crop.size == 0:
+            continue
+        prepared.append((prepare(crop), origin))
+    
+    return prepared
+
+def read_text(
+    prepared: List[Tuple[Any, Tuple[int, int]]],
+    spell_correction: bool = True,
+    scale_factor: float = OCR_SCALE_FACTOR,
+    confidence_threshold: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run OCR on images returned by ``preprocess_page``
+    
+    Args:
+        prepared: List of (preprocessed image, origin) pairs
+        spell_correction: Correct the spelling of the text (see ``correct_texts``)
+        scale_factor: Upscaling the images were preprocessed with
+        confidence_threshold: Minimum confidence of kept text
+            (defaults to ``settings.ocr_confidence_threshold``)
+        
+    Returns:
+        List of extracted text with confidence scores
+    """
+    extracted_texts = []
+    for processed, origin in prepared:
+        extracted_texts.extend(_read_processed(processed, origin, scale_factor, confidence_threshold))
+    
+    return correct_texts(extracted_texts) if spell_correction else extracted_texts
+
+def correct_texts(extracted_texts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Spell-correct text blocks returned by ``read_text(..., spell_correction=False)``
+    
+    Args:
+        extracted_texts: Text blocks with confidence scores
+        
+    Returns:
+        Corrected text blocks; blocks left empty are dropped
+    """
+    corrected = []
+    for item in extracted_texts:
+        text = correct_spelling(item["text"])
+        if text:
+            corrected.append({**item, "text": text})
+    
+    return corrected
+
+def _preprocess(image, denoise: bool = True, scale_factor: float = OCR_SCALE_FACTOR, timings: Optional[Dict[str, float]] = None):
+    """Enhance image quality and preprocess an image or page region for OCR"""
+    # Enhance image quality (NL-means denoising dominates its cost)
+    started = time.perf_counter()
+    enhanced = processor.enhance_image_quality(image, denoise=denoise)
+    if denoise and timings is not None:
+        timings["denoise"] += time.perf_counter() - started
     
     # Preprocess for OCR
-    processed = processor.preprocess_for_ocr(enhanced)
+    return processor.preprocess_for_ocr(enhanced, scale_factor=scale_factor)
+
+def _read_processed(
+    processed,
+    origin: Tuple[int, int] = (0, 0),
+    scale_factor: float = OCR_SCALE_FACTOR,
+    confidence_threshold: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run OCR on a preprocessed image or page region
     
+    Args:
+        processed: Output of ``_preprocess``
+        origin: Position of the region in the full page, used to map
+            bounding boxes back to page coordinates
+        scale_factor: Upscaling ``processed`` was preprocessed with;
+            bounding boxes are returned in ``OCR_SCALE_FACTOR`` space
+        confidence_threshold: Minimum confidence of kept text
+        
+    Returns:
+        List of extracted text, not yet spell-corrected, with confidence scores
+    """
     # Run OCR with confidence scores
     try:
         results = reader.readtext(
@@ -81,14 +220,22 @@ def extract_text_with_confidence(image_path: str) -> List[Dict[str, Any]]:
         # Fallback for older EasyOCR versions
         results = reader.readtext(processed, detail=True, paragraph=True)
     
+    offset_x = origin[0] * OCR_SCALE_FACTOR
+    offset_y = origin[1] * OCR_SCALE_FACTOR
+    ratio = OCR_SCALE_FACTOR / scale_factor
+    if confidence_threshold is None:
+        confidence_threshold = settings.ocr_confidence_threshold
+    
     # Process results
     extracted_texts = []
     for bbox, text, confidence in results:
-        if confidence >= settings.ocr_confidence_threshold:
-            corrected_text = correct_spelling(text.strip())
-            if corrected_text:
+        if confidence >= confidence_threshold:
+            text = text.strip()
+            if text:
+                if origin != (0, 0) or ratio != 1:
+                    bbox = [[int(x * ratio + offset_x), int(y * ratio + offset_y)] for x, y in bbox]
                 extracted_texts.append({
-                    "text": corrected_text,
+                    "text": text,
                     "confidence": float(confidence),
                     "bbox": bbox
                 })
@@ -118,13 +265,60 @@ def classify_content_type(text: str) -> str:
     
     return "text"
 
-def process_image(image_path: str, output_file: Optional[str] = "notes.json") -> Optional[Dict[str, Any]]:
+def build_notes(extracted_texts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Structured notes from extracted text blocks
+    
+    Args:
+        extracted_texts: Output of ``read_text``
+        
+    Returns:
+        Notes data with default lecture metadata
+    """
+    notes_data = {
+        "lecture_id": "lec_001",
+        "course": "Operating Systems",
+        "topic": "Process Management",
+        "date": datetime.today().strftime("%Y-%m-%d"),
+        "content": []
+    }
+    
+    # Process extracted texts
+    for item in extracted_texts:
+        text = item["text"]
+        content_type = classify_content_type(text)
+        
+        notes_data["content"].append({
+            "type": content_type,
+            "text": text,
+            "confidence": item["confidence"]
+        })
+    
+    return notes_data
+
+def process_image(
+    image_path: str,
+    output_file: Optional[str] = "notes.json",
+    regions: Optional[List[Dict[str, Any]]] = None,
+    preprocess: bool = True,
+    confidence_threshold: Optional[float] = None,
+    denoise: bool = True,
+    scale_factor: float = OCR_SCALE_FACTOR,
+    spell_correction: bool = True
+) -> Optional[Dict[str, Any]]:
     """
     Process image and extract structured notes
     
     Args:
         image_path: Path to the image file
         output_file: Output JSON file path (None to skip saving)
+        regions: Optional layout text regions to restrict OCR to
+        preprocess: Enhance and upscale the image before OCR
+        confidence_threshold: Minimum confidence of kept text
+            (defaults to ``settings.ocr_confidence_threshold``)
+        denoise: Apply NL-means denoising when preprocessing
+        scale_factor: Upscaling applied when preprocessing
+        spell_correction: Correct the spelling of the text
         
     Returns:
         Structured notes data or None if processing fails
@@ -134,7 +328,9 @@ def process_image(image_path: str, output_file: Optional[str] = "notes.json") ->
         return None
     
     # Extract text with confidence
-    extracted_texts = extract_text_with_confidence(image_path)
+    extracted_texts = extract_text_with_confidence(
+        image_path, regions, preprocess, confidence_threshold, denoise, scale_factor, spell_correction
+    )
     
     if not extracted_texts:
         print("⚠️ No text detected in the image")
@@ -145,24 +341,7 @@ def process_image(image_path: str, output_file: Optional[str] = "notes.json") ->
         print(f"- {item['text']} (confidence: {item['confidence']:.2f})")
     
     # Create structured notes
-    notes_data = {
-        "lecture_id": "lec_001",
-        "course": "Operating Systems",
-        "topic": "Process Management",
-        "date": datetime.today().strftime("%Y-%m-%d"),
-        "content": []
-    }
-    
-    # Process extracted texts
-    for item in extracted_texts:
-        text = item["text"]
-        content_type = classify_content_type(text)
-        
-        notes_data["content"].append({
-            "type": content_type,
-            "text": text,
-            "confidence": item["confidence"]
-        })
+    notes_data = build_notes(extracted_texts)
     
     # Save to file if output_file is specified
     if output_file:
@@ -9,6 +9,9 @@ class ImageProcessor:
     def __init__(self):
         self.diagram_threshold = settings.diagram_detection_threshold
         self.min_contour_area = settings.min_contour_area
+        
+        # Preallocated once and reused for every image
+        self.ocr_dilate_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
     
     def preprocess_for_ocr(self, image: np.ndarray, scale_factor: float = 2.0) -> np.ndarray:
         """
@@ -39,8 +42,7 @@ class ImageProcessor:
         )
         
         # Dilation to connect broken handwriting
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-        thresh = cv2.dilate(thresh, kernel, iterations=1)
+        thresh = cv2.dilate(thresh, self.ocr_dilate_kernel, iterations=1)
         
         return thresh
     
@@ -68,18 +70,21 @@ class ImageProcessor:
         
         return gray, thresh
     
-    def enhance_image_quality(self, image: np.ndarray) -> np.ndarray:
+    def enhance_image_quality(self, image: np.ndarray, denoise: bool = True) -> np.ndarray:
         """
         Enhance image quality for better processing
         
         Args:
             image: Input image
+            denoise: Apply NL-means denoising (the most expensive step)
             
         Returns:
             Enhanced image
         """
         # Denoise
-        if len(image.shape) == 3:
+        if not denoise:
+            denoised = image
+        elif len(image.shape) == 3:
             denoised = cv2.fastNlMeansDenoisingColored(image, None, 10, 10, 7, 21)
         else:
             denoised = cv2.fastNlMeansDenoising(image, None, 10, 7, 21)
@@ -0,0 +1,39 @@
+"""
+Latency Metrics
+
+Rolling latency statistics shared by the diagram detector registry, the
+model router and the LLM scheduler.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict
+
+import numpy as np
+
+
+class BackendTimings:
+    """Rolling latency statistics of one backend, model tier or queue"""
+
+    def __init__(self, window: int = 500):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, failed: bool = False) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.recent.append(elapsed_ms)
+        if failed:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = np.array(self.recent) if self.recent else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+            "p50_ms": round(float(np.percentile(recent, 50)), 2) if recent is not None else None,
+            "p95_ms": round(float(np.percentile(recent, 95)), 2) if recent is not None else None,
+            "max_ms": round(float(recent.max()), 2) if recent is not None else None
+        }
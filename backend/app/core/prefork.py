@@ -0,0 +1,364 @@
+"""
+Preforking Server
+
+Production launcher: the master process imports the app once (EasyOCR and
+torch weights, the spell dictionary, ...) and then forks workers that all
+serve from one shared listening socket. Forked workers share the master's
+memory pages copy-on-write, so N workers cost far less than N separate
+model loads. ``gc.freeze()`` before forking keeps the garbage collector
+from writing to (and thereby copying) the inherited objects.
+
+The master supervises the workers: dead workers are replaced, and workers
+are recycled gracefully after a number of requests, after a maximum age
+or once their own (unshared) memory passes a limit. SIGHUP recycles every
+worker, one at a time. Per-worker memory (RSS, USS, PSS) is logged
+periodically and on SIGUSR1.
+"""
+
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Set in workers to the master's PID, so a worker can report on its siblings
+MASTER_PID_ENV = "EDUBRIDGE_PREFORK_MASTER"
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / (1024 * 1024), 1) if value is not None else None
+
+
+def process_memory(pid: int) -> Dict[str, Any]:
+    """
+    Memory of one process in MB
+
+    ``uss`` is memory used by this process alone, ``pss`` splits shared
+    pages between the processes sharing them and ``shared`` is RSS - USS.
+    USS, PSS and shared are None where the platform does not report them.
+
+    Raises:
+        psutil.NoSuchProcess: If the process is gone
+    """
+    process = psutil.Process(pid)
+    rss = process.memory_info().rss
+    uss = pss = None
+    try:
+        full = process.memory_full_info()
+        uss = full.uss
+        pss = getattr(full, "pss", None)
+    except psutil.AccessDenied:
+        pass
+    return {
+        "pid": pid,
+        "rss_mb": _mb(rss),
+        "uss_mb": _mb(uss),
+        "pss_mb": _mb(pss),
+        "shared_mb": _mb(rss - uss) if uss is not None else None
+    }
+
+
+def memory_report(master_pid: int, worker_pids: Sequence[int]) -> Dict[str, Any]:
+    """
+    Memory of a master and its workers
+
+    ``workers_pss_mb`` is what the workers really cost together, while
+    ``workers_rss_mb`` is roughly what as many separate processes would
+    use; ``sharing_ratio`` (PSS / RSS) shows how much copy-on-write saves.
+    """
+    workers = []
+    for pid in worker_pids:
+        try:
+            workers.append(process_memory(pid))
+        except psutil.NoSuchProcess:
+            continue
+
+    def total(key: str) -> Optional[float]:
+        values = [worker[key] for worker in workers]
+        return round(sum(values), 1) if values and None not in values else None
+
+    rss, pss = total("rss_mb"), total("pss_mb")
+    try:
+        master = process_memory(master_pid)
+    except psutil.NoSuchProcess:
+        master = None
+    return {
+        "master": master,
+        "workers": workers,
+        "workers_rss_mb": rss,
+        "workers_uss_mb": total("uss_mb"),
+        "workers_pss_mb": pss,
+        "sharing_ratio": round(pss / rss, 3) if rss and pss is not None else None
+    }
+
+
+@dataclass
+class WorkerLimits:
+    """When the master recycles a worker (0 disables a limit)"""
+    max_requests: int = 0
+    max_requests_jitter: int = 0  # Random extra requests, so workers do not all restart together
+    max_age_seconds: float = 0
+    max_memory_mb: float = 0  # Memory of the worker alone (USS, or RSS where USS is unavailable)
+
+
+def recycle_reason(age_seconds: float, memory: Dict[str, Any], limits: WorkerLimits) -> Optional[str]:
+    """Why a worker should be recycled, or None to keep it"""
+    if limits.max_age_seconds and age_seconds >= limits.max_age_seconds:
+        return f"age {age_seconds:.0f}s"
+    own_mb = memory["uss_mb"] if memory["uss_mb"] is not None else memory["rss_mb"]
+    if limits.max_memory_mb and own_mb >= limits.max_memory_mb:
+        return f"memory {own_mb:.0f}MB"
+    return None
+
+
+@dataclass
+class _Worker:
+    index: int
+    started_at: float
+
+
+class PreforkServer:
+    """Master process forking and supervising uvicorn workers"""
+
+    # Seconds between supervision passes of the master
+    TICK = 0.5
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: int = 4,
+        limits: Optional[WorkerLimits] = None,
+        graceful_timeout: float = 30.0,
+        report_interval: float = 300.0,
+        check_interval: float = 10.0,
+        pre_fork: Sequence[Callable[[], None]] = (),
+        post_fork: Sequence[Callable[[], None]] = (),
+        log_level: str = "info"
+    ):
+        """
+        Args:
+            app: ASGI application, already imported so workers inherit it
+            host: Interface to listen on
+            port: Port to listen on
+            workers: Worker processes to keep running
+            limits: When workers are recycled
+            graceful_timeout: Time a stopping worker gets to finish its requests
+            report_interval: Seconds between memory reports (0 disables them)
+            check_interval: Seconds between worker age/memory checks
+            pre_fork: Called once in the master before the first fork
+                (e.g. closing database connections)
+            post_fork: Called in every worker right after the fork
+                (e.g. reopening them)
+            log_level: uvicorn log level of the workers
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.limits = limits or WorkerLimits()
+        self.graceful_timeout = graceful_timeout
+        self.report_interval = report_interval
+        self.check_interval = check_interval
+        self.pre_fork = list(pre_fork)
+        self.post_fork = list(post_fork)
+        self.log_level = log_level
+
+        self._socket: Optional[socket.socket] = None
+        self._workers: Dict[int, _Worker] = {}
+        self._retiring: Dict[int, float] = {}  # pid -> time after which it is killed
+        self._recycle_queue: List[int] = []
+        self._stopping = False
+        self._report_requested = False
+
+    def run(self) -> int:
+        """Fork the workers and supervise them until SIGTERM or SIGINT"""
+        self._socket = self._bind()
+        for hook in self.pre_fork:
+            hook()
+        # Objects loaded so far are never collected; leaving their GC headers
+        # alone keeps the pages holding them shared with the workers
+        gc.collect()
+        gc.freeze()
+        os.environ[MASTER_PID_ENV] = str(os.getpid())
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_recycle_all)
+        signal.signal(signal.SIGUSR1, self._handle_report)
+
+        for index in range(self.workers):
+            self._spawn(index)
+        logger.info(f"Master {os.getpid()} serving http://{self.host}:{self.port} with {self.workers} workers")
+
+        next_check = next_report = time.monotonic()
+        while not self._stopping:
+            self._reap()
+            now = time.monotonic()
+            if now >= next_check:
+                self._check_workers()
+                next_check = now + self.check_interval
+            self._advance_recycling()
+            if self._report_requested or (self.report_interval and now >= next_report):
+                self._report_requested = False
+                self._log_memory()
+                next_report = now + (self.report_interval or float("inf"))
+            time.sleep(self.TICK)
+
+        self._shutdown()
+        return 0
+
+    def worker_pids(self) -> List[int]:
+        return list(self._workers)
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker(index)
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        self._workers[pid] = _Worker(index, time.monotonic())
+        logger.info(f"Started worker {index} (pid {pid})")
+        return pid
+
+    def _run_worker(self, index: int) -> None:
+        """Body of a forked worker: serve until uvicorn exits"""
+        import uvicorn
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(signum, signal.SIG_DFL)
+        for hook in self.post_fork:
+            hook()
+
+        max_requests = None
+        if self.limits.max_requests:
+            max_requests = self.limits.max_requests + random.randint(0, self.limits.max_requests_jitter)
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            limit_max_requests=max_requests,
+            timeout_graceful_shutdown=self.graceful_timeout
+        )
+        uvicorn.Server(config).run(sockets=[self._socket])
+
+    def _reap(self) -> None:
+        """Collect exited workers and replace those that were not retired"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self._workers.pop(pid, None)
+            retired = self._retiring.pop(pid, None) is not None
+            if worker is None or retired or self._stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            uptime = time.monotonic() - worker.started_at
+            if code == 0:
+                # uvicorn exits by itself after limit_max_requests
+                logger.info(f"Worker {worker.index} (pid {pid}) exited after {uptime:.0f}s, replacing it")
+            else:
+                logger.error(f"Worker {worker.index} (pid {pid}) died with code {code}, replacing it")
+                if uptime < 2:
+                    # Do not spin if workers crash at startup
+                    time.sleep(1)
+            self._spawn(worker.index)
+
+    def _check_workers(self) -> None:
+        """Queue workers past their age or memory limit for recycling"""
+        now = time.monotonic()
+        for pid, worker in list(self._workers.items()):
+            if pid in self._retiring or pid in self._recycle_queue:
+                continue
+            try:
+                memory = process_memory(pid)
+            except psutil.NoSuchProcess:
+                continue
+            reason = recycle_reason(now - worker.started_at, memory, self.limits)
+            if reason:
+                logger.info(f"Recycling worker {worker.index} (pid {pid}): {reason}")
+                self._recycle_queue.append(pid)
+
+    def _advance_recycling(self) -> None:
+        """Retire queued workers one at a time and kill those that overran the grace period"""
+        now = time.monotonic()
+        for pid, deadline in list(self._retiring.items()):
+            if now >= deadline:
+                logger.warning(f"Worker pid {pid} did not stop in time, killing it")
+                self._kill(pid, signal.SIGKILL)
+
+        while self._recycle_queue and not self._retiring:
+            pid = self._recycle_queue.pop(0)
+            if pid in self._workers:
+                self._retire(pid)
+
+    def _retire(self, pid: int) -> None:
+        """Start a replacement first, then let the worker finish its requests and exit"""
+        self._spawn(self._workers[pid].index)
+        self._retiring[pid] = time.monotonic() + self.graceful_timeout + 5
+        self._kill(pid, signal.SIGTERM)
+
+    def _shutdown(self) -> None:
+        logger.info(f"Stopping {len(self._workers)} workers")
+        for pid in self._workers:
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in self._workers:
+            self._kill(pid, signal.SIGKILL)
+        self._socket.close()
+
+    def _log_memory(self) -> None:
+        report = memory_report(os.getpid(), self.worker_pids())
+        for worker in report["workers"]:
+            logger.info(
+                f"Worker pid {worker['pid']}: RSS {worker['rss_mb']}MB, "
+                f"USS {worker['uss_mb']}MB, shared {worker['shared_mb']}MB"
+            )
+        logger.info(
+            f"Workers total: RSS {report['workers_rss_mb']}MB, PSS {report['workers_pss_mb']}MB "
+            f"(sharing ratio {report['sharing_ratio']})"
+        )
+
+    @staticmethod
+    def _kill(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_recycle_all(self, signum, frame) -> None:
+        self._recycle_queue.extend(pid for pid in self._workers if pid not in self._recycle_queue)
+
+    def _handle_report(self, signum, frame) -> None:
+        self._report_requested = True
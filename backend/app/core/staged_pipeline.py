@@ -0,0 +1,239 @@
+"""
+Staged Pipeline Executor
+
+Runs a multi-step job as a chain of stages joined by bounded queues. Each
+stage has its own workers (threads, processes or async tasks), so while
+one request is in OCR the next is being decoded and a third waits on the
+LLM. Sustained throughput approaches that of the slowest stage instead of
+the sum of all stages.
+
+Queues are bounded: a worker that finishes an item waits until the next
+stage has room for it, so a slow stage pushes back all the way to
+``submit`` instead of letting work pile up in memory. Per-stage metrics
+(utilization, queue wait, time blocked by the next stage) show which
+stage is the bottleneck.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.executors import run_in_executor
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline
+
+    ``fn`` takes the item produced by the previous stage and returns the
+    item for the next one. With an ``executor`` it is a blocking function
+    run there (a process pool needs ``fn`` and the items to be picklable);
+    without one it is a coroutine function run on the event loop.
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    concurrency: int = 1
+    executor: Optional[Executor] = None
+    queue_size: Optional[int] = None  # Items waiting for this stage; defaults to 2 x concurrency
+
+
+@dataclass
+class StageMetrics:
+    processed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    busy: int = 0
+    busy_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+
+
+@dataclass
+class _Item:
+    value: Any
+    future: asyncio.Future
+    progress: Optional[Callable[[str], None]]
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class StagedPipeline:
+    """Stages connected by bounded queues, each with its own workers"""
+
+    def __init__(self, name: str, stages: List[Stage]):
+        """
+        Args:
+            name: Used in logs and stats
+            stages: Steps in the order items pass through them
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.name = name
+        self.stages = stages
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._metrics: List[StageMetrics] = []
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        self._submit_blocked_seconds = 0.0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Create the queues and start every stage's workers"""
+        if self._tasks and self._loop is asyncio.get_running_loop():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queues = [asyncio.Queue(maxsize=stage.queue_size or 2 * stage.concurrency) for stage in self.stages]
+        self._metrics = [StageMetrics() for _ in self.stages]
+        self._started_at = time.perf_counter()
+        self._stopped_at = None
+        self._submit_blocked_seconds = 0.0
+        self._tasks = [
+            asyncio.create_task(self._worker(index))
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.concurrency)
+        ]
+        logger.info(
+            f"Pipeline {self.name} started: "
+            + ", ".join(f"{stage.name} x{stage.concurrency}" for stage in self.stages)
+        )
+
+    async def stop(self) -> None:
+        """Stop the workers; items still in the pipeline are cancelled"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._tasks:
+            self._stopped_at = time.perf_counter()
+        self._tasks = []
+        for queue in self._queues:
+            while not queue.empty():
+                queue.get_nowait().future.cancel()
+
+    async def submit(self, value: Any, progress: Optional[Callable[[str], None]] = None) -> Any:
+        """
+        Push an item through every stage and return the last stage's output
+
+        Waits for room in the first queue when the pipeline is saturated.
+
+        Args:
+            value: Input of the first stage
+            progress: Called with a stage's name when the item enters it
+
+        Raises:
+            Whatever the failing stage raised; later stages are skipped
+        """
+        await self.start()
+        item = _Item(value, self._loop.create_future(), progress)
+        blocked_since = time.perf_counter()
+        await self._queues[0].put(item)
+        self._submit_blocked_seconds += time.perf_counter() - blocked_since
+        return await item.future
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-stage load and the current bottleneck (since the last start)"""
+        uptime = 0.0
+        if self._started_at is not None:
+            uptime = (self._stopped_at or time.perf_counter()) - self._started_at
+        stages = []
+        for index, stage in enumerate(self.stages):
+            metrics = self._metrics[index] if self._metrics else StageMetrics()
+            done = metrics.processed + metrics.failed
+            capacity = uptime * stage.concurrency
+            stages.append({
+                "name": stage.name,
+                "concurrency": stage.concurrency,
+                "queued": self._queues[index].qsize() if self._queues else 0,
+                "queue_size": stage.queue_size or 2 * stage.concurrency,
+                "busy": metrics.busy,
+                "processed": metrics.processed,
+                "failed": metrics.failed,
+                "cancelled": metrics.cancelled,
+                "utilization": round(metrics.busy_seconds / capacity, 3) if capacity else 0.0,
+                "avg_service_ms": round(metrics.busy_seconds / done * 1000, 1) if done else None,
+                "avg_wait_ms": round(metrics.wait_seconds / done * 1000, 1) if done else None,
+                "blocked_seconds": round(metrics.blocked_seconds, 3)
+            })
+        busiest = max(stages, key=lambda s: s["utilization"])
+        return {
+            "name": self.name,
+            "started": self.started,
+            "uptime_seconds": round(uptime, 1),
+            "submit_blocked_seconds": round(self._submit_blocked_seconds, 3),
+            "bottleneck": busiest["name"] if busiest["utilization"] > 0 else None,
+            "stages": stages
+        }
+
+    @staticmethod
+    async def _run_stage(stage: Stage, value: Any) -> Any:
+        if stage.executor is not None:
+            return await run_in_executor(stage.executor, stage.fn, value)
+        return await stage.fn(value)
+
+    async def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        queue = self._queues[index]
+        metrics = self._metrics[index]
+        is_last = index == len(self.stages) - 1
+
+        while True:
+            item = await queue.get()
+            metrics.wait_seconds += time.perf_counter() - item.enqueued_at
+            if item.future.done():
+                # The submitter gave up (e.g. a cancelled job); skip the work
+                metrics.cancelled += 1
+                continue
+            if item.progress is not None:
+                item.progress(stage.name)
+
+            metrics.busy += 1
+            started = time.perf_counter()
+            work = asyncio.ensure_future(self._run_stage(stage, item.value))
+            # A submitter that gives up (client disconnect, cancelled job)
+            # also cancels the work in progress, withdrawing queued pool jobs
+            item.future.add_done_callback(lambda future, work=work: work.cancel() if future.cancelled() else None)
+            try:
+                await asyncio.wait({work})
+            except asyncio.CancelledError:
+                work.cancel()
+                item.future.cancel()
+                raise
+            finally:
+                metrics.busy -= 1
+                metrics.busy_seconds += time.perf_counter() - started
+
+            if work.cancelled():
+                metrics.cancelled += 1
+                continue
+            if work.exception() is not None:
+                metrics.failed += 1
+                if not item.future.done():
+                    item.future.set_exception(work.exception())
+                continue
+            result = work.result()
+
+            metrics.processed += 1
+            if is_last:
+                if not item.future.done():
+                    item.future.set_result(result)
+                continue
+
+            # Backpressure: wait here while the next stage is full
+            item.value = result
+            item.enqueued_at = time.perf_counter()
+            try:
+                await self._queues[index + 1].put(item)
+            except asyncio.CancelledError:
+                item.future.cancel()
+                raise
+            metrics.blocked_seconds += time.perf_counter() - item.enqueued_at
+            item.enqueued_at = time.perf_counter()
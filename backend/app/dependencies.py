@@ -1,10 +1,11 @@
 
-from fastapi import Depends, HTTPException, UploadFile, File
+from fastapi import Depends, HTTPException, Query, UploadFile, File
 from typing import Optional
 import os
 from pathlib import Path
 
 from app.config import settings
+from app.models.requests import OCRRequest, ProcessingMode
 
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
@@ -47,6 +48,47 @@ async def get_validated_file(file: UploadFile = File(...)) -> UploadFile:
     
     return file
 
+# OCRRequest language codes and the EasyOCR languages they stand for
+EASYOCR_LANGUAGES = {
+    "eng": "en", "spa": "es", "fra": "fr", "deu": "de", "ita": "it", "por": "pt", "rus": "ru",
+    "chi_sim": "ch_sim", "chi_tra": "ch_tra", "jpn": "ja", "kor": "ko", "ara": "ar", "hin": "hi",
+    "tha": "th", "vie": "vi"
+}
+
+async def get_processing_options(
+    mode: ProcessingMode = ProcessingMode.FULL_ANALYSIS,
+    language: str = "eng",
+    confidence_threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+    generate_flashcards: bool = True,
+    generate_knowledge_map: bool = True,
+    preprocess_image: bool = True
+) -> OCRRequest:
+    """
+    Per-request processing options from query parameters
+    
+    Returns:
+        Validated options
+        
+    Raises:
+        HTTPException: If the language is unknown or its OCR model is not loaded
+    """
+    if language not in EASYOCR_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language code: {language}")
+    if EASYOCR_LANGUAGES[language] not in settings.ocr_languages:
+        raise HTTPException(
+            status_code=400,
+            detail=f"OCR language '{language}' is not loaded. Configured: {', '.join(settings.ocr_languages)}"
+        )
+    
+    return OCRRequest(
+        mode=mode,
+        language=language,
+        confidence_threshold=confidence_threshold,
+        generate_flashcards=generate_flashcards,
+        generate_knowledge_map=generate_knowledge_map,
+        preprocess_image=preprocess_image
+    )
+
 def get_settings():
     """Get application settings"""
     return settings
@@ -30,10 +30,10 @@ class OCRRequest(BaseModel):
     )
     
     confidence_threshold: Optional[float] = Field(
-        default=0.6,
+        default=None,
         ge=0.0,
         le=1.0,
-        description="Minimum confidence threshold for OCR results"
+        description="Minimum confidence threshold for OCR results (defaults to the server setting)"
     )
     
     generate_flashcards: bool = Field(
@@ -77,6 +77,8 @@ class ExtractResponse(BaseModel):
     
     # Optional AI enhancements
     groq_enhanced: Optional[bool] = Field(None, description="Whether enhanced by Groq AI")
+    groq_cached: Optional[bool] = Field(None, description="Whether the enhancement was served from cache")
+    prompt_compaction: Optional[Dict[str, Any]] = Field(None, description="Prompt token savings from OCR text compaction")
     flashcards: Optional[List[FlashCard]] = Field(None, description="Generated flashcards")
     summary: Optional[str] = Field(None, description="Content summary")
     key_concepts: Optional[List[str]] = Field(None, description="Key concepts")
@@ -84,6 +86,9 @@ class ExtractResponse(BaseModel):
     knowledge_map: Optional[KnowledgeMapData] = Field(None, description="Knowledge map")
     difficulty_level: Optional[str] = Field(None, description="Difficulty level")
     estimated_study_time: Optional[str] = Field(None, description="Estimated study time")
+    
+    # Deadline-aware processing (X-Deadline-Ms)
+    degradations: Optional[List[str]] = Field(None, description="Optional steps skipped to meet the deadline")
 
 class HealthResponse(BaseModel):
     """Health check response"""
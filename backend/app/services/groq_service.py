@@ -3,78 +3,815 @@ Groq AI Service for processing OCR/CV JSON data
 Transforms raw extracted data into educational content
 """
 
-import json
+import asyncio
+import functools
 import logging
-from typing import Dict, List, Any, Optional
-from groq import Groq
+import time
+from typing import AbstractSet, AsyncIterator, Dict, List, Any, Optional, Tuple
+
+import httpx
+from groq import AsyncGroq
 from app.config import settings
+from app.services.llm_cache import LLMResponseCache, make_cache_key, normalize_text
+from app.services.llm_scheduler import LLMScheduler, Priority
+from app.services.model_router import FULL_ARTIFACTS, ModelRouter, ModelTier, is_overload_error
+from app.services.prompt_compactor import PromptCompactor
+from app.services.request_hedger import RequestHedger
+from app.services.single_flight import SingleFlight
+from app.services.text_chunker import estimate_tokens, split_into_chunks
+from app.utils.json_extract import extract_json
+from app.utils.json_stream import JSONArrayStreamParser
 
 logger = logging.getLogger(__name__)
 
+EDUCATIONAL_SYSTEM_PROMPT = "You are an educational AI assistant that creates high-quality learning materials from student notes."
+
 class GroqService:
     """Service for processing educational content with Groq AI"""
     
     def __init__(self):
-        """Initialize Groq client with API key"""
+        """Initialize the shared async Groq client with API key"""
+        self.model = settings.groq_model
+        self.temperature = settings.groq_temperature
+        self.max_tokens = settings.groq_max_tokens
+        
+        # Changes whenever the prompt template does, invalidating cached results
+        template_data = {"course": "{course}", "topic": "{topic}"}
+        self.prompt_version = make_cache_key(
+            EDUCATIONAL_SYSTEM_PROMPT,
+            self._create_educational_prompt("{text}", template_data),
+            self._create_flashcards_prompt("{text}", template_data, 0),
+            self._create_chunk_prompt("{text}", template_data, 1, 2),
+            self._create_reduce_prompt(["{summary}"], ["{concept}"], template_data),
+            self._create_batch_prompt([("{text}", template_data)]),
+            settings.groq_chunk_tokens,
+            settings.groq_map_reduce_threshold_tokens
+        )[:12]
+        
+        self.cache = LLMResponseCache(
+            path=settings.llm_cache_path if settings.llm_cache_enabled else None,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_memory_entries=settings.llm_cache_memory_entries,
+            max_disk_entries=settings.llm_cache_max_entries
+        )
+        
+        # Identical concurrent enhancements share one upstream call
+        self.in_flight = SingleFlight("groq")
+        
+        # Picks the model per request: short single-topic notes go to the
+        # fast tier, long multi-topic lectures to groq_model
+        fast_tier = None
+        if settings.groq_fast_model and settings.groq_fast_model != self.model:
+            fast_tier = ModelTier(
+                name="fast",
+                model=settings.groq_fast_model,
+                max_tokens=settings.groq_fast_max_tokens,
+                temperature=settings.groq_fast_temperature,
+                expected_latency_ms=settings.groq_fast_expected_latency_ms,
+                scheduler=self._create_scheduler()
+            )
+        self.router = ModelRouter(
+            quality=ModelTier(
+                name="quality",
+                model=self.model,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                expected_latency_ms=settings.groq_expected_latency_ms,
+                scheduler=self._create_scheduler()
+            ),
+            fast=fast_tier,
+            fast_max_input_tokens=settings.groq_fast_max_input_tokens,
+            fast_max_sections=settings.groq_fast_max_sections
+        )
+        
+        # Duplicates unusually slow completions to cut tail latency
+        self.hedger = RequestHedger(
+            quantile=settings.groq_hedge_quantile,
+            initial_delay_ms=settings.groq_hedge_initial_delay_ms,
+            min_delay_ms=settings.groq_hedge_min_delay_ms,
+            budget_per_minute=settings.groq_hedge_budget_per_minute
+        ) if settings.groq_hedging_enabled else None
+        
+        # Shrinks OCR text (duplicates, boilerplate, noise) before prompting
+        self.compactor = PromptCompactor(
+            token_budget=settings.prompt_token_budget,
+            near_duplicate_threshold=settings.prompt_near_duplicate_threshold,
+            boilerplate_min_repeats=settings.prompt_boilerplate_min_repeats,
+            min_confidence=settings.prompt_min_confidence
+        )
+        self.compaction_totals = {"requests": 0, "original_tokens": 0, "compacted_tokens": 0}
+        
+        # How often mock content was served instead of an enhancement, by reason
+        self.fallbacks = {"unavailable": 0, "no_text": 0, "error": 0}
+        
+        # Batched completions, the documents they covered and documents retried alone
+        self.batch_totals = {"batches": 0, "documents": 0, "individual_fallbacks": 0}
+        
         if not settings.groq_api_key:
             logger.warning("Groq API key not configured - service will use mock responses")
             self.client = None
         else:
             try:
-                self.client = Groq(api_key=settings.groq_api_key)
+                self.client = AsyncGroq(
+                    api_key=settings.groq_api_key,
+                    base_url=settings.groq_base_url,
+                    timeout=settings.groq_timeout_seconds,
+                    # Retries are owned by the scheduler, which honours rate-limit headers
+                    max_retries=0,
+                    http_client=self._create_http_client()
+                )
                 logger.info("Groq client initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize Groq client: {e}")
                 self.client = None
     
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """Keep-alive connection pool sized for concurrent completions"""
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.groq_max_connections,
+                max_keepalive_connections=settings.groq_max_keepalive_connections,
+                keepalive_expiry=settings.groq_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(settings.groq_timeout_seconds, connect=10.0),
+            follow_redirects=True
+        )
+    
+    def _create_scheduler(self) -> LLMScheduler:
+        """
+        Scheduler for one model: admits calls by priority within the
+        concurrency and rate limits, retrying 429s and transient errors
+        """
+        return LLMScheduler(
+            requests_per_minute=settings.groq_requests_per_minute,
+            tokens_per_minute=settings.groq_tokens_per_minute,
+            max_concurrency=settings.groq_max_concurrency,
+            max_retries=settings.groq_max_retries,
+            base_delay=settings.groq_retry_base_delay,
+            max_delay=settings.groq_retry_max_delay,
+            queue_timeout=settings.groq_queue_timeout_seconds
+        )
+    
     def is_available(self) -> bool:
         """Check if Groq service is available"""
         return self.client is not None
     
-    async def enhance_ocr_content(self, ocr_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def aclose(self) -> None:
+        """Close pooled connections (called on application shutdown)"""
+        if self.client is not None:
+            await self.client.close()
+    
+    async def _chat_completion(
+        self,
+        tiers: List[ModelTier],
+        priority: Priority = Priority.INTERACTIVE,
+        **kwargs
+    ) -> Tuple[Any, ModelTier]:
+        """
+        Create a chat completion without blocking the event loop
+        
+        The call goes through the tier's scheduler, which admits it by
+        priority within the rate limits and retries rate-limited attempts.
+        Each attempt has its own timeout. The raw response is requested so
+        the scheduler can read the rate-limit headers. A tier that is still
+        overloaded after its retries hands the call to the next tier. With
+        hedging enabled, a call slower than usual for its tier is duplicated
+        (through the same scheduler) and the first answer wins.
+        
+        Args:
+            tiers: Model tiers in order of preference (see ``ModelRouter.route``)
+            priority: Scheduling lane
+            kwargs: Completion arguments; model, temperature and max_tokens
+                default to the tier's
+            
+        Returns:
+            The parsed completion and the tier that served it
+        """
+        for index, tier in enumerate(tiers):
+            request = {"model": tier.model, "temperature": tier.temperature, "max_tokens": tier.max_tokens, **kwargs}
+            estimated_tokens = self._estimate_request_tokens(request["messages"], request["max_tokens"])
+            started = time.perf_counter()
+            submit = functools.partial(
+                tier.scheduler.submit, functools.partial(self._create_completion, request), estimated_tokens, priority
+            )
+            try:
+                if self.hedger is not None:
+                    raw_response = await self.hedger.run(
+                        tier.name, submit, lambda: not tier.scheduler.saturated(estimated_tokens)
+                    )
+                else:
+                    raw_response = await submit()
+                response = await raw_response.parse()
+            except Exception as e:
+                tier.record((time.perf_counter() - started) * 1000, failed=True)
+                if index + 1 < len(tiers) and is_overload_error(e):
+                    self.router.record_spillover(tier, tiers[index + 1], e)
+                    continue
+                raise
+            usage = getattr(response, "usage", None)
+            tier.scheduler.settle(estimated_tokens, getattr(usage, "total_tokens", None), getattr(raw_response, "headers", None))
+            tier.record((time.perf_counter() - started) * 1000, usage)
+            return response, tier
+    
+    async def _create_completion(self, request: Dict[str, Any]):
+        """One upstream attempt, bounded by the per-attempt timeout"""
+        return await asyncio.wait_for(
+            self.client.chat.completions.with_raw_response.create(**request),
+            timeout=settings.groq_timeout_seconds
+        )
+    
+    def _route(
+        self,
+        text_content: str,
+        content: Optional[List[Dict[str, Any]]] = None,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS,
+        latency_slo_ms: Optional[float] = None
+    ) -> List[ModelTier]:
+        """
+        Model tiers for a completion over ``text_content``
+        
+        Args:
+            text_content: Notes included in the prompt
+            content: OCR items of the notes; their headings count as sections
+            artifacts: Study materials the completion has to produce
+            latency_slo_ms: Latency target (defaults to ``groq_latency_slo_ms``)
+        """
+        input_tokens = estimate_tokens(text_content)
+        sections = sum(1 for item in content or [] if item.get("type") == "heading")
+        return self.router.route(
+            input_tokens,
+            max(1, sections),
+            artifacts,
+            latency_slo_ms if latency_slo_ms is not None else settings.groq_latency_slo_ms,
+            estimated_tokens=input_tokens + self.max_tokens
+        )
+    
+    @staticmethod
+    def _estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Prompt plus completion tokens a request may count against the TPM limit"""
+        return max_tokens + sum(estimate_tokens(message["content"]) for message in messages)
+    
+    @staticmethod
+    def _messages(prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": EDUCATIONAL_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    async def enhance_ocr_content(
+        self,
+        ocr_data: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        latency_slo_ms: Optional[float] = None,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> Dict[str, Any]:
         """
         Enhance OCR content with AI-generated educational materials
         
         Args:
             ocr_data: Raw OCR data with extracted text and diagrams
+            priority: Scheduling lane (interactive requests go before bulk work)
+            latency_slo_ms: Latency target used to pick the model tier
+            artifacts: Study materials to generate; the others are neither
+                asked of the model nor returned
             
         Returns:
             Enhanced data with flashcards, summaries, and structured content
         """
         if not self.is_available():
             logger.info("Groq not available, returning enhanced mock data")
-            return self._generate_mock_enhanced_content(ocr_data)
+            return self._fallback(ocr_data, "unavailable", artifacts)
         
+        return await self._enhance(ocr_data, priority, latency_slo_ms, artifacts=artifacts)
+    
+    async def _enhance(
+        self,
+        ocr_data: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        latency_slo_ms: Optional[float] = None,
+        compaction: Optional[Dict[str, Any]] = None,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> Dict[str, Any]:
+        """Enhance one document with its own completion, reusing ``compaction`` if given"""
         try:
-            # Extract text content for processing
-            text_content = self._extract_text_from_ocr(ocr_data)
+            # Extract and compact text content for processing
+            if compaction is None:
+                compaction = self._compact_ocr_content(ocr_data)
+            text_content = compaction["text"]
+            prompt_data = {**ocr_data, "content": compaction["items"]}
             
             if not text_content.strip():
                 logger.warning("No text content found in OCR data")
-                return self._generate_mock_enhanced_content(ocr_data)
+                return self._fallback(ocr_data, "no_text", artifacts)
             
-            # Generate enhanced content using Groq
-            enhanced_content = await self._process_with_groq(text_content, ocr_data)
+            # Reuse a previous enhancement of the same notes when available
+            cache_key = self._enhancement_cache_key(text_content, ocr_data, artifacts)
+            enhanced_content = await self.cache.aget(cache_key) if settings.llm_cache_enabled else None
+            cached = enhanced_content is not None
             
-            # Merge with original OCR data
-            result = {
-                **ocr_data,
-                "groq_enhanced": True,
-                "flashcards": enhanced_content.get("flashcards", []),
-                "summary": enhanced_content.get("summary", ""),
-                "key_concepts": enhanced_content.get("key_concepts", []),
-                "study_questions": enhanced_content.get("study_questions", []),
-                "knowledge_map": enhanced_content.get("knowledge_map", {}),
-                "difficulty_level": enhanced_content.get("difficulty_level", "intermediate"),
-                "estimated_study_time": enhanced_content.get("estimated_study_time", "15-20 minutes")
-            }
+            if not cached:
+                # Generate enhanced content using Groq, coalescing identical requests
+                enhanced_content = await self.in_flight.do(
+                    cache_key,
+                    lambda: self._process_and_cache(cache_key, text_content, prompt_data, priority, latency_slo_ms, artifacts)
+                )
             
+            result = self._merge_enhancement(ocr_data, enhanced_content, cached, artifacts)
+            result["prompt_compaction"] = compaction["stats"]
             logger.info(f"Successfully enhanced content with {len(result.get('flashcards', []))} flashcards")
             return result
             
         except Exception as e:
             logger.error(f"Error enhancing content with Groq: {e}")
-            return self._generate_mock_enhanced_content(ocr_data)
+            return self._fallback(ocr_data, "error", artifacts)
+    
+    async def enhance_batch(
+        self,
+        documents: List[Dict[str, Any]],
+        priority: Priority = Priority.BULK
+    ) -> List[Dict[str, Any]]:
+        """
+        Enhance many documents, packing short ones into shared completions
+        
+        Uncached documents up to ``groq_batch_doc_max_tokens`` are packed,
+        up to ``groq_batch_max_documents`` and ``groq_batch_max_input_tokens``
+        per completion, into one prompt with a delimiter and an id per
+        document; the instructions are sent once per batch instead of once
+        per document, and identical documents are sent once. The response is
+        split back by id and each result is cached under a batch key, as the
+        packed prompt asks for less than a single enhancement. Documents
+        missing from the response, batches that fail, and larger documents
+        are enhanced individually.
+        
+        Args:
+            documents: OCR data of each document
+            priority: Scheduling lane (bulk by default)
+        
+        Returns:
+            Enhanced data per document, in input order
+        """
+        if not self.is_available():
+            return [self._fallback(ocr_data, "unavailable") for ocr_data in documents]
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        individual: List[Tuple[int, Optional[Dict[str, Any]]]] = []
+        repeats: List[Tuple[int, Dict[str, Any], str]] = []
+        packable: List[Dict[str, Any]] = []
+        packed: Dict[str, Optional[Dict[str, Any]]] = {}
+        for index, ocr_data in enumerate(documents):
+            if estimate_tokens(self._extract_text_from_ocr(ocr_data)) > settings.groq_batch_doc_max_tokens:
+                individual.append((index, None))
+                continue
+        
+            compaction = self._compact_ocr_content(ocr_data)
+            text_content = compaction["text"]
+            single_key = self._enhancement_cache_key(text_content, ocr_data)
+            if not text_content.strip() or (settings.llm_cache_enabled and await self.cache.aget(single_key) is not None):
+                # Empty documents fall back and single enhancements are served without a call
+                individual.append((index, compaction))
+                continue
+            cache_key = self._enhancement_cache_key(text_content, ocr_data, batched=True)
+            cached = await self.cache.aget(cache_key) if settings.llm_cache_enabled else None
+            if cached is not None:
+                results[index] = self._merge_enhancement(ocr_data, cached, True)
+                results[index]["prompt_compaction"] = compaction["stats"]
+                continue
+            if cache_key in packed:
+                # Served with the first copy's result once it is enhanced
+                repeats.append((index, compaction, cache_key))
+                continue
+            packed[cache_key] = None
+            packable.append({
+                "index": index,
+                "text": text_content,
+                "tokens": estimate_tokens(text_content),
+                "ocr_data": ocr_data,
+                "prompt_data": {**ocr_data, "content": compaction["items"]},
+                "compaction": compaction,
+                "cache_key": cache_key
+            })
+        
+        async def enhance_one(index: int, compaction: Optional[Dict[str, Any]]) -> None:
+            results[index] = await self._enhance(documents[index], priority, compaction=compaction)
+        
+        async def enhance_packed(batch: List[Dict[str, Any]]) -> None:
+            contents: Dict[str, Dict[str, Any]] = {}
+            if len(batch) > 1:
+                try:
+                    contents = await self._complete_batch(batch, priority)
+                    self.batch_totals["batches"] += 1
+                    self.batch_totals["documents"] += len(contents)
+                except Exception as e:
+                    logger.warning(f"Batched enhancement of {len(batch)} documents failed: {e}")
+        
+            retries = []
+            for position, document in enumerate(batch):
+                content = contents.get(self._batch_document_id(position))
+                if content is None:
+                    if len(batch) > 1:
+                        self.batch_totals["individual_fallbacks"] += 1
+                    retries.append(enhance_one(document["index"], document["compaction"]))
+                    continue
+                if settings.llm_cache_enabled:
+                    await self.cache.aset(document["cache_key"], content)
+                packed[document["cache_key"]] = content
+                result = self._merge_enhancement(document["ocr_data"], content, False)
+                result["prompt_compaction"] = document["compaction"]["stats"]
+                results[document["index"]] = result
+            await asyncio.gather(*retries)
+        
+        await asyncio.gather(
+            *(enhance_packed(batch) for batch in self._pack_batches(packable)),
+            *(enhance_one(index, compaction) for index, compaction in individual)
+        )
+        retries = []
+        for index, compaction, cache_key in repeats:
+            if packed[cache_key] is None:
+                # The first copy was enhanced individually and is cached under its single key
+                retries.append(enhance_one(index, compaction))
+                continue
+            results[index] = self._merge_enhancement(documents[index], packed[cache_key], True)
+            results[index]["prompt_compaction"] = compaction["stats"]
+        await asyncio.gather(*retries)
+        return results
+    
+    @staticmethod
+    def _pack_batches(documents: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group documents in order, within the per-batch document and token limits"""
+        batches: List[List[Dict[str, Any]]] = []
+        batch_tokens = 0
+        for document in documents:
+            if (not batches
+                    or len(batches[-1]) >= settings.groq_batch_max_documents
+                    or batch_tokens + document["tokens"] > settings.groq_batch_max_input_tokens):
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append(document)
+            batch_tokens += document["tokens"]
+        return batches
+    
+    @staticmethod
+    def _batch_document_id(position: int) -> str:
+        return f"doc{position + 1}"
+    
+    async def _complete_batch(self, batch: List[Dict[str, Any]], priority: Priority) -> Dict[str, Dict[str, Any]]:
+        """
+        Run one completion over several documents
+        
+        Returns:
+            Study material by document id, for the documents the response
+            covered with at least a flashcard list and a summary
+        """
+        prompt = self._create_batch_prompt([(document["text"], document["prompt_data"]) for document in batch])
+        response, tier = await self._complete_json(
+            prompt,
+            self._route("\n".join(document["text"] for document in batch)),
+            priority,
+            max_tokens=settings.groq_batch_tokens_per_document * len(batch)
+        )
+        
+        ids = {self._batch_document_id(position) for position in range(len(batch))}
+        contents = {}
+        for entry in response.get("documents", []):
+            if not isinstance(entry, dict) or str(entry.get("id")) not in ids:
+                continue
+            if isinstance(entry.get("flashcards"), list) and isinstance(entry.get("summary"), str):
+                contents[str(entry["id"])] = {key: value for key, value in entry.items() if key != "id"}
+        logger.info(f"Batched enhancement covered {len(contents)}/{len(batch)} documents ({tier.name} tier)")
+        return contents
+    
+    async def generate_flashcards(
+        self,
+        text_content: str,
+        course: str = "General Studies",
+        topic: str = "Study Notes",
+        num_cards: int = 5,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> Dict[str, Any]:
+        """
+        Generate flashcards only, without the rest of the study material
+        
+        The prompt asks for exactly ``num_cards`` cards and ``max_tokens`` is
+        sized from that number; flashcard-only requests are routed to the
+        fast model for inputs up to twice the usual size. Long texts, which
+        need chunking, and fallbacks go through ``enhance_ocr_content``
+        instead.
+        
+        Args:
+            text_content: Notes to generate flashcards from
+            course: Course name used as context
+            topic: Topic used as context
+            num_cards: Number of flashcards to generate
+            priority: Scheduling lane
+            
+        Returns:
+            Dictionary with ``flashcards``, ``groq_enhanced``, ``groq_cached`` and ``model``
+        """
+        ocr_data = {
+            "course": course,
+            "topic": topic,
+            "content": [{"type": "text", "text": text_content}]
+        }
+        if not self.is_available() or estimate_tokens(text_content) > settings.groq_map_reduce_threshold_tokens:
+            enhanced = await self.enhance_ocr_content(ocr_data, priority)
+            return {
+                "flashcards": enhanced.get("flashcards", [])[:num_cards],
+                "groq_enhanced": enhanced["groq_enhanced"],
+                "groq_cached": enhanced.get("groq_cached", False),
+                "model": self.model if enhanced["groq_enhanced"] else None
+            }
+        
+        cache_key = make_cache_key(
+            "flashcards",
+            self.prompt_version,
+            normalize_text(text_content),
+            course,
+            topic,
+            num_cards,
+            self.router.version()
+        )
+        content = await self.cache.aget(cache_key) if settings.llm_cache_enabled else None
+        cached = content is not None
+        
+        try:
+            if not cached:
+                content = await self.in_flight.do(
+                    cache_key,
+                    lambda: self._generate_flashcards_and_cache(cache_key, text_content, ocr_data, num_cards, priority)
+                )
+        except Exception as e:
+            logger.error(f"Error generating flashcards with Groq: {e}")
+            return {
+                "flashcards": self._fallback(ocr_data, "error")["flashcards"][:num_cards],
+                "groq_enhanced": False,
+                "groq_cached": False,
+                "model": None
+            }
+        
+        return {
+            "flashcards": content["flashcards"],
+            "groq_enhanced": True,
+            "groq_cached": cached,
+            "model": content.get("model")
+        }
+    
+    async def _generate_flashcards_and_cache(
+        self,
+        cache_key: str,
+        text_content: str,
+        ocr_data: Dict[str, Any],
+        num_cards: int,
+        priority: Priority
+    ) -> Dict[str, Any]:
+        """Run the flashcard-only completion and store the cards in the cache"""
+        prompt = self._create_flashcards_prompt(text_content, ocr_data, num_cards)
+        response, tier = await self._complete_json(
+            prompt,
+            self._route(text_content, artifacts={"flashcards"}),
+            priority,
+            max_tokens=settings.groq_flashcard_tokens * num_cards + 20
+        )
+        flashcards = [
+            card for card in response.get("flashcards", [])
+            if isinstance(card, dict) and card.get("question") and card.get("answer")
+        ][:num_cards]
+        if not flashcards:
+            raise ValueError("Completion did not contain any flashcards")
+        
+        content = {"flashcards": flashcards, "model": tier.model}
+        if settings.llm_cache_enabled:
+            await self.cache.aset(cache_key, content)
+        return content
+    
+    async def stream_enhancement(
+        self,
+        ocr_data: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        latency_slo_ms: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Enhance OCR content, yielding flashcards as soon as each one is generated
+        
+        Yields ``{"event": "flashcard", "data": card}`` per flashcard and then
+        ``{"event": "complete", "data": result}`` with the same result
+        ``enhance_ocr_content`` would return. Cached results, long
+        (map-reduce) inputs and fallbacks are not streamed from the model;
+        their flashcards are emitted together. A stream is not moved to the
+        other model tier once it has started. If it fails after flashcards
+        were emitted, it ends with ``{"event": "error", "data": {"error": ...,
+        "flashcards_emitted": n}}`` instead; earlier failures fall back.
+        
+        Args:
+            ocr_data: Raw OCR data with extracted text and diagrams
+            priority: Scheduling lane
+            latency_slo_ms: Latency target used to pick the model tier
+        """
+        compaction = self._compact_ocr_content(ocr_data)
+        text_content = compaction["text"]
+        streamable = (
+            self.is_available()
+            and text_content.strip()
+            and estimate_tokens(text_content) <= settings.groq_map_reduce_threshold_tokens
+        )
+        
+        result = None
+        if streamable:
+            cache_key = self._enhancement_cache_key(text_content, ocr_data)
+            cached_content = await self.cache.aget(cache_key) if settings.llm_cache_enabled else None
+            if cached_content is not None:
+                result = self._merge_enhancement(ocr_data, cached_content, True)
+                result["prompt_compaction"] = compaction["stats"]
+            else:
+                emitted = 0
+                tier = self._route(text_content, compaction["items"], latency_slo_ms=latency_slo_ms)[0]
+                try:
+                    async for kind, payload in self._stream_with_groq(text_content, ocr_data, tier, priority):
+                        if kind == "flashcard":
+                            emitted += 1
+                            yield {"event": "flashcard", "data": payload}
+                        else:
+                            if settings.llm_cache_enabled:
+                                await self.cache.aset(cache_key, payload)
+                            result = self._merge_enhancement(ocr_data, payload, False)
+                            result["prompt_compaction"] = compaction["stats"]
+                except Exception as e:
+                    logger.error(f"Error streaming enhancement from Groq: {e}")
+                    if emitted:
+                        # The client already holds model cards that a fallback would not match
+                        yield {"event": "error", "data": {"error": str(e), "flashcards_emitted": emitted}}
+                        return
+                    result = self._fallback(ocr_data, "error")
+                
+                if emitted:
+                    yield {"event": "complete", "data": result}
+                    return
+        else:
+            result = await self.enhance_ocr_content(ocr_data, priority, latency_slo_ms)
+        
+        for card in result.get("flashcards", []):
+            yield {"event": "flashcard", "data": card}
+        yield {"event": "complete", "data": result}
+    
+    async def _stream_with_groq(
+        self,
+        text_content: str,
+        ocr_data: Dict[str, Any],
+        tier: ModelTier,
+        priority: Priority
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream one completion, yielding ("flashcard", card) as cards close
+        and finally ("content", enhanced_content)
+        
+        The scheduler holds the caller's slot for the whole stream. Deltas are
+        handed over through a queue so they can be parsed while it is held.
+        """
+        messages = self._messages(self._create_educational_prompt(text_content, ocr_data))
+        deltas: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        parser = JSONArrayStreamParser("flashcards")
+        
+        async def consume():
+            # JSON mode is not available with streaming on Groq; the parser
+            # skips any text around the object instead
+            raw_response = await self.client.chat.completions.with_raw_response.create(
+                model=tier.model,
+                messages=messages,
+                temperature=tier.temperature,
+                max_tokens=tier.max_tokens,
+                stream=True
+            )
+            async for chunk in await raw_response.parse():
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    deltas.put_nowait(delta)
+                # Groq reports the usage of a stream in its last chunk
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    used_tokens.append(getattr(usage, "total_tokens", None))
+            return raw_response
+        
+        async def call():
+            return await asyncio.wait_for(consume(), timeout=settings.groq_timeout_seconds)
+        
+        used_tokens: List[Optional[int]] = []
+        estimated_tokens = self._estimate_request_tokens(messages, tier.max_tokens)
+        started = time.perf_counter()
+        task = asyncio.ensure_future(tier.scheduler.submit(call, estimated_tokens, priority))
+        task.add_done_callback(lambda _: deltas.put_nowait(None))
+        try:
+            while (delta := await deltas.get()) is not None:
+                for card in parser.feed(delta):
+                    yield "flashcard", card
+            raw_response = await task
+            if used_tokens:
+                tier.scheduler.settle(estimated_tokens, used_tokens[-1], getattr(raw_response, "headers", None))
+        finally:
+            if not task.done():
+                task.cancel()
+            failed = not task.done() or task.cancelled() or task.exception() is not None
+            tier.record((time.perf_counter() - started) * 1000, failed=failed)
+        
+        # A stream cut off by max_tokens leaves no complete document; repair the raw text
+        content = extract_json(parser.document() or parser.text, expect=dict)
+        if content is None:
+            raise ValueError("Streamed completion did not contain a JSON object")
+        yield "content", content
+    
+    def _merge_enhancement(
+        self,
+        ocr_data: Dict[str, Any],
+        enhanced_content: Dict[str, Any],
+        cached: bool,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> Dict[str, Any]:
+        """Merge generated study material with the original OCR data"""
+        return self._only_artifacts({
+            **ocr_data,
+            "groq_enhanced": True,
+            "groq_cached": cached,
+            "flashcards": enhanced_content.get("flashcards", []),
+            "summary": enhanced_content.get("summary", ""),
+            "key_concepts": enhanced_content.get("key_concepts", []),
+            "study_questions": enhanced_content.get("study_questions", []),
+            "knowledge_map": enhanced_content.get("knowledge_map", {}),
+            "difficulty_level": enhanced_content.get("difficulty_level", "intermediate"),
+            "estimated_study_time": enhanced_content.get("estimated_study_time", "15-20 minutes")
+        }, artifacts)
+    
+    def _fallback(self, ocr_data: Dict[str, Any], reason: str, artifacts: AbstractSet[str] = FULL_ARTIFACTS) -> Dict[str, Any]:
+        """Serve mock content and count why"""
+        self.fallbacks[reason] += 1
+        return self._only_artifacts(self._generate_mock_enhanced_content(ocr_data), artifacts)
+    
+    @staticmethod
+    def _only_artifacts(result: Dict[str, Any], artifacts: AbstractSet[str]) -> Dict[str, Any]:
+        """Drop the study materials that were not requested"""
+        return {key: value for key, value in result.items() if key not in FULL_ARTIFACTS - artifacts}
+    
+    async def _process_and_cache(
+        self,
+        cache_key: str,
+        text_content: str,
+        ocr_data: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        latency_slo_ms: Optional[float] = None,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> Dict[str, Any]:
+        """Run the Groq enhancement and store the result in the cache"""
+        if estimate_tokens(text_content) > settings.groq_map_reduce_threshold_tokens:
+            enhanced_content = await self._process_map_reduce(ocr_data, priority, latency_slo_ms, artifacts)
+        else:
+            enhanced_content = await self._process_with_groq(text_content, ocr_data, priority, latency_slo_ms, artifacts)
+        if settings.llm_cache_enabled:
+            await self.cache.aset(cache_key, enhanced_content)
+        return enhanced_content
+    
+    def _enhancement_cache_key(
+        self,
+        text_content: str,
+        ocr_data: Dict[str, Any],
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS,
+        batched: bool = False
+    ) -> str:
+        """Cache key for an enhancement request (``batched`` for results of the packed batch prompt)"""
+        parts = [
+            "enhance",
+            self.prompt_version,
+            normalize_text(text_content),
+            ocr_data.get("course", "General Studies"),
+            ocr_data.get("topic", "Unknown Topic"),
+            self.router.version()
+        ]
+        # Full enhancements keep the keys they were cached under
+        if artifacts != FULL_ARTIFACTS:
+            parts.append(sorted(artifacts))
+        if batched:
+            parts.append("batch")
+        return make_cache_key(*parts)
+    
+    def _compact_ocr_content(self, ocr_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prompt text and items for the OCR content, compacted unless disabled
+        
+        Returns:
+            Dictionary with ``items``, ``text`` and per-request token ``stats``
+        """
+        if not settings.prompt_compaction_enabled:
+            items = [item for item in ocr_data.get("content", [])
+                     if item.get("type") in ["text", "heading"] and item.get("text")]
+            return {"items": items, "text": self._extract_text_from_ocr(ocr_data), "stats": None}
+        
+        compaction = self.compactor.compact(ocr_data.get("content", []))
+        stats = compaction["stats"]
+        self.compaction_totals["requests"] += 1
+        self.compaction_totals["original_tokens"] += stats["original_tokens"]
+        self.compaction_totals["compacted_tokens"] += stats["compacted_tokens"]
+        if stats["tokens_saved"]:
+            logger.info(
+                f"Prompt compaction saved {stats['tokens_saved']} of {stats['original_tokens']} tokens "
+                f"(dropped {stats['blocks_dropped']})"
+            )
+        return compaction
     
     def _extract_text_from_ocr(self, ocr_data: Dict[str, Any]) -> str:
         """Extract all text content from OCR data"""
@@ -86,60 +823,202 @@ class GroqService:
         
         return "\n".join(texts)
     
-    async def _process_with_groq(self, text_content: str, ocr_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _process_with_groq(
+        self,
+        text_content: str,
+        ocr_data: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        latency_slo_ms: Optional[float] = None,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> Dict[str, Any]:
         """Process content using Groq AI"""
         
         # Create prompt for educational content generation
-        prompt = self._create_educational_prompt(text_content, ocr_data)
+        prompt = self._create_educational_prompt(text_content, ocr_data, artifacts)
+        tiers = self._route(text_content, ocr_data.get("content", []), artifacts, latency_slo_ms)
         
         try:
-            # Call Groq API
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",  # Use Groq's latest model
-                messages=[
-                    {"role": "system", "content": "You are an educational AI assistant that creates high-quality learning materials from student notes."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000,
-                response_format={"type": "json_object"}
-            )
-            
-            # Parse response
-            result = json.loads(response.choices[0].message.content)
-            logger.info("Successfully processed content with Groq AI")
+            result, tier = await self._complete_json(prompt, tiers, priority)
+            logger.info(f"Successfully processed content with Groq AI ({tier.name} tier, {tier.model})")
             return result
             
         except Exception as e:
             logger.error(f"Groq API call failed: {e}")
             raise
     
-    def _create_educational_prompt(self, text_content: str, ocr_data: Dict[str, Any]) -> str:
-        """Create prompt for Groq AI processing"""
+    async def _complete_json(
+        self,
+        prompt: str,
+        tiers: List[ModelTier],
+        priority: Priority = Priority.INTERACTIVE,
+        max_tokens: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], ModelTier]:
+        """
+        Run one JSON-mode completion and parse the response
+        
+        Returns:
+            The decoded object and the tier that produced it
+        """
+        options = {"max_tokens": max_tokens} if max_tokens else {}
+        response, tier = await self._chat_completion(
+            tiers,
+            priority,
+            messages=self._messages(prompt),
+            response_format={"type": "json_object"},
+            **options
+        )
+        content = extract_json(response.choices[0].message.content, expect=dict)
+        if content is None:
+            raise ValueError("Completion did not contain a JSON object")
+        return content, tier
+    
+    async def _process_map_reduce(
+        self,
+        ocr_data: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        latency_slo_ms: Optional[float] = None,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> Dict[str, Any]:
+        """
+        Enhance long content by processing chunks concurrently (map), merging
+        their artifacts locally and summarizing the section summaries (reduce)
+        
+        Latency is close to the slowest chunk plus one short reduce call
+        rather than the sum over all chunks.
+        """
+        chunks = split_into_chunks(ocr_data.get("content", []), settings.groq_chunk_tokens)
+        logger.info(f"Map-reduce enhancement over {len(chunks)} chunks")
+        
+        semaphore = asyncio.Semaphore(settings.groq_map_concurrency)
+        
+        async def map_chunk(index: int, chunk: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    prompt = self._create_chunk_prompt(chunk, ocr_data, index + 1, len(chunks), artifacts)
+                    tiers = self._route(chunk, artifacts=artifacts, latency_slo_ms=latency_slo_ms)
+                    partial, _ = await self._complete_json(prompt, tiers, priority, settings.groq_chunk_max_tokens)
+                    return partial
+                except Exception as e:
+                    logger.warning(f"Chunk {index + 1}/{len(chunks)} failed: {e}")
+                    return None
+        
+        partials = await asyncio.gather(*(map_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+        partials = [p for p in partials if p]
+        if not partials:
+            raise RuntimeError("All map-reduce chunks failed")
+        
+        result = self._merge_chunk_results(partials)
+        section_summaries = [p.get("section_summary", "") for p in partials if p.get("section_summary")]
+        
+        try:
+            reduced, _ = await self._complete_json(
+                self._create_reduce_prompt(section_summaries, result["key_concepts"], ocr_data),
+                self._route(
+                    "\n".join(section_summaries),
+                    artifacts={"summary", "study_questions"},
+                    latency_slo_ms=latency_slo_ms
+                ),
+                priority,
+                settings.groq_reduce_max_tokens
+            )
+        except Exception as e:
+            logger.warning(f"Reduce step failed, joining section summaries: {e}")
+            reduced = {"summary": " ".join(section_summaries[:3])}
+        
+        result["summary"] = reduced.get("summary", "")
+        result["difficulty_level"] = reduced.get("difficulty_level", "intermediate")
+        result["estimated_study_time"] = reduced.get("estimated_study_time", f"{10 * len(chunks)} minutes")
+        result["study_questions"] = self._dedupe_strings(
+            reduced.get("study_questions", []) + result["study_questions"]
+        )[:6]
+        return result
+    
+    def _merge_chunk_results(self, partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge and deduplicate per-chunk flashcards, concepts and map fragments"""
+        flashcards = []
+        seen_questions = set()
+        for partial in partials:
+            for card in partial.get("flashcards", []):
+                key = self._normalize_key(card.get("question", ""))
+                if key and key not in seen_questions:
+                    seen_questions.add(key)
+                    flashcards.append(card)
+        
+        # Knowledge map nodes are merged by normalized label; edges are remapped
+        nodes, edges = [], []
+        node_ids: Dict[str, str] = {}
+        seen_edges = set()
+        for partial in partials:
+            fragment = partial.get("knowledge_map") or {}
+            local_ids: Dict[str, str] = {}
+            for node in fragment.get("nodes", []):
+                label_key = self._normalize_key(node.get("label") or node.get("id", ""))
+                if not label_key:
+                    continue
+                if label_key not in node_ids:
+                    node_ids[label_key] = label_key.replace(" ", "_")
+                    nodes.append({**node, "id": node_ids[label_key]})
+                local_ids[node.get("id")] = node_ids[label_key]
+            for edge in fragment.get("edges", []):
+                source, target = local_ids.get(edge.get("from")), local_ids.get(edge.get("to"))
+                if source and target and source != target and (source, target) not in seen_edges:
+                    seen_edges.add((source, target))
+                    edges.append({**edge, "from": source, "to": target})
+        
+        return {
+            "flashcards": flashcards,
+            "key_concepts": self._dedupe_strings(
+                [c for p in partials for c in p.get("key_concepts", [])]
+            )[:10],
+            "study_questions": self._dedupe_strings(
+                [q for p in partials for q in p.get("study_questions", [])]
+            ),
+            "knowledge_map": {"nodes": nodes, "edges": edges}
+        }
+    
+    @staticmethod
+    def _normalize_key(text: str) -> str:
+        """Lowercase alphanumeric form used to detect duplicates"""
+        return " ".join("".join(c if c.isalnum() else " " for c in text.lower()).split())
+    
+    def _dedupe_strings(self, values: List[str]) -> List[str]:
+        """Remove duplicate strings (case and punctuation insensitive), keeping order"""
+        seen, unique = set(), []
+        for value in values:
+            key = self._normalize_key(value) if isinstance(value, str) else None
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(value)
+        return unique
+    
+    def _create_educational_prompt(
+        self,
+        text_content: str,
+        ocr_data: Dict[str, Any],
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> str:
+        """Create prompt for Groq AI processing, asking only for ``artifacts``"""
         
         course = ocr_data.get("course", "General Studies")
         topic = ocr_data.get("topic", "Unknown Topic")
         
-        prompt = f"""
-        I have extracted the following text from a student's handwritten notes for {course} on the topic of {topic}:
-
-        EXTRACTED TEXT:
-        {text_content}
-
-        Please create comprehensive educational content based on these notes. Return a JSON object with the following structure:
-
-        {{
+        fields = {
+            "flashcards": """
             "flashcards": [
-                {{"question": "Question based on the content", "answer": "Clear, concise answer", "category": "concept/definition/calculation/etc"}},
+                {"question": "Question based on the content", "answer": "Clear, concise answer", "category": "concept/definition/calculation/etc"},
                 // Generate 4-8 flashcards covering key concepts
-            ],
-            "summary": "2-3 sentence summary of the main concepts covered",
-            "key_concepts": ["concept1", "concept2", "concept3"], // 3-5 key terms or ideas
+            ],""",
+            "summary": """
+            "summary": "2-3 sentence summary of the main concepts covered",""",
+            "key_concepts": """
+            "key_concepts": ["concept1", "concept2", "concept3"], // 3-5 key terms or ideas""",
+            "study_questions": """
             "study_questions": [
                 "Discussion question 1",
                 "Analysis question 2", 
                 "Application question 3"
-            ], // 3-4 deeper study questions
+            ], // 3-4 deeper study questions""",
+            "knowledge_map": f"""
             "knowledge_map": {{
                 "nodes": [
                     {{"id": "main_topic", "label": "{topic}", "type": "main"}},
@@ -150,21 +1029,176 @@ class GroqService:
                     {{"from": "main_topic", "to": "concept1", "label": "includes"}},
                     {{"from": "main_topic", "to": "concept2", "label": "includes"}}
                 ]
-            }},
+            }},"""
+        }
+        structure = "".join(field for name, field in fields.items() if name in artifacts)
+        guidelines = [
+            ("flashcards", "Make flashcards clear and testable"),
+            (None, "Ensure content is academically accurate"),
+            (None, "Use appropriate terminology for the subject"),
+            ("knowledge_map", "Create meaningful connections in the knowledge map"),
+            (None, "Estimate realistic study time")
+        ]
+        guideline_lines = "\n".join(
+            f"        - {line}" for artifact, line in guidelines if artifact is None or artifact in artifacts
+        )
+        
+        prompt = f"""
+        I have extracted the following text from a student's handwritten notes for {course} on the topic of {topic}:
+
+        EXTRACTED TEXT:
+        {text_content}
+
+        Please create comprehensive educational content based on these notes. Return a JSON object with the following structure:
+
+        {{{structure}
             "difficulty_level": "beginner/intermediate/advanced",
             "estimated_study_time": "X-Y minutes"
         }}
 
         Guidelines:
-        - Make flashcards clear and testable
-        - Ensure content is academically accurate
-        - Use appropriate terminology for the subject
-        - Create meaningful connections in the knowledge map
-        - Estimate realistic study time
+{guideline_lines}
         """
         
         return prompt
     
+    def _create_flashcards_prompt(self, text_content: str, ocr_data: Dict[str, Any], num_cards: int) -> str:
+        """Create the minimal prompt for flashcard-only generation"""
+        
+        course = ocr_data.get("course", "General Studies")
+        topic = ocr_data.get("topic", "Study Notes")
+        
+        return f"""
+        Notes for {course}, topic {topic}:
+
+        {text_content}
+
+        Write {num_cards} flashcards on the key facts in these notes. Return only this JSON object:
+
+        {{"flashcards": [{{"question": "...", "answer": "short answer", "category": "concept/definition/calculation/etc"}}]}}
+        """
+    
+    def _create_chunk_prompt(
+        self,
+        chunk_text: str,
+        ocr_data: Dict[str, Any],
+        index: int,
+        total: int,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS
+    ) -> str:
+        """Create the map prompt for one section of a long lecture"""
+        
+        course = ocr_data.get("course", "General Studies")
+        topic = ocr_data.get("topic", "Unknown Topic")
+        
+        # Section summaries and key concepts feed the reduce step, so they are always asked for
+        fields = [
+            ("flashcards", """"flashcards": [
+                {"question": "Question based on the content", "answer": "Clear, concise answer", "category": "concept/definition/calculation/etc"}
+            ]""", "// 2-5 flashcards"),
+            (None, '"section_summary": "1-2 sentence summary of this part"', None),
+            (None, '"key_concepts": ["concept1", "concept2"]', "// 2-4 key terms"),
+            ("study_questions", '"study_questions": ["Question 1"]', "// 1-2 questions"),
+            ("knowledge_map", """"knowledge_map": {
+                "nodes": [{"id": "concept1", "label": "Key Concept 1", "type": "concept"}],
+                "edges": [{"from": "concept1", "to": "concept2", "label": "relates to"}]
+            }""", None)
+        ]
+        fields = [(body, comment) for artifact, body, comment in fields if artifact is None or artifact in artifacts]
+        structure = "\n".join(
+            "            " + body + ("," if position < len(fields) - 1 else "") + (f" {comment}" if comment else "")
+            for position, (body, comment) in enumerate(fields)
+        )
+        
+        return f"""
+        The following is part {index} of {total} of a student's notes for {course} on the topic of {topic}:
+
+        EXTRACTED TEXT:
+        {chunk_text}
+
+        Create study material for THIS PART ONLY. Return a JSON object with the following structure:
+
+        {{
+{structure}
+        }}
+
+        Guidelines:
+        - Only use facts present in this part
+        - Use the full concept name as the node label
+        """
+    
+    def _create_reduce_prompt(self, section_summaries: List[str], key_concepts: List[str], ocr_data: Dict[str, Any]) -> str:
+        """Create the reduce prompt combining per-section summaries"""
+        
+        course = ocr_data.get("course", "General Studies")
+        topic = ocr_data.get("topic", "Unknown Topic")
+        summaries = "\n".join(f"- {summary}" for summary in section_summaries)
+        
+        return f"""
+        These are summaries of consecutive sections of a {course} lecture on {topic}:
+
+        {summaries}
+
+        Key concepts: {", ".join(key_concepts)}
+
+        Return a JSON object:
+
+        {{
+            "summary": "2-3 sentence summary of the whole lecture",
+            "study_questions": ["Question connecting several sections"], // 2-3 questions
+            "difficulty_level": "beginner/intermediate/advanced",
+            "estimated_study_time": "X-Y minutes"
+        }}
+        """
+    
+    def _create_batch_prompt(self, documents: List[Tuple[str, Dict[str, Any]]]) -> str:
+        """Create one prompt covering several short documents, each delimited and identified"""
+        
+        sections = []
+        for position, (text_content, ocr_data) in enumerate(documents):
+            document_id = self._batch_document_id(position)
+            sections.append(
+                f"=== DOCUMENT {document_id} ===\n"
+                f"Course: {ocr_data.get('course', 'General Studies')}\n"
+                f"Topic: {ocr_data.get('topic', 'Unknown Topic')}\n"
+                f"{text_content}\n"
+                f"=== END {document_id} ==="
+            )
+        documents_text = "\n\n".join(sections)
+        
+        return f"""
+        Below are {len(documents)} separate sets of a student's handwritten notes. Each set starts with
+        "=== DOCUMENT <id> ===" and ends with "=== END <id> ===". Treat every set independently.
+
+        {documents_text}
+
+        Create study material for EACH set. Return a JSON object with one entry per set:
+
+        {{
+            "documents": [
+                {{
+                    "id": "doc1",
+                    "flashcards": [
+                        {{"question": "Question based on the content", "answer": "Clear, concise answer", "category": "concept/definition/calculation/etc"}}
+                    ], // 3-5 flashcards
+                    "summary": "1-2 sentence summary",
+                    "key_concepts": ["concept1", "concept2"], // 2-4 key terms
+                    "study_questions": ["Question 1", "Question 2"], // 2-3 questions
+                    "knowledge_map": {{
+                        "nodes": [{{"id": "main_topic", "label": "Topic", "type": "main"}}],
+                        "edges": [{{"from": "main_topic", "to": "concept1", "label": "includes"}}]
+                    }},
+                    "difficulty_level": "beginner/intermediate/advanced",
+                    "estimated_study_time": "X-Y minutes"
+                }}
+            ]
+        }}
+
+        Guidelines:
+        - Use each set's id exactly as given
+        - Only use facts from the set itself
+        """
+    
     def _generate_mock_enhanced_content(self, ocr_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate mock enhanced content when Groq is not available"""
         
@@ -0,0 +1,230 @@
+"""
+Background Job Runner
+
+Async workers that take queued jobs from the ``JobStore`` and run the
+handler registered for their kind, recording stage progress as they go.
+Requests that create jobs return immediately; clients follow a job by
+polling it or by waiting for updates (``wait_for_update``), so long
+extractions no longer depend on the HTTP connection staying open.
+
+Running jobs send heartbeats through the store. Jobs of a worker that
+stopped sending them (crash, restart) are queued again, and a job
+cancelled from another process is noticed on the next heartbeat.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+from app.core.config import get_settings
+from app.services.job_store import JobStore, sqlite_path_from_url
+
+logger = logging.getLogger(__name__)
+
+# A handler runs one job: handler(job, progress) -> result, where
+# progress(stage) records the stage the job has reached
+ProgressCallback = Callable[[str], None]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]
+
+
+class JobRunner:
+    """Run persisted jobs on a fixed number of async workers"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 60.0,
+        retention_seconds: float = 7 * 24 * 3600
+    ):
+        """
+        Args:
+            store: Where jobs are persisted
+            workers: Jobs run concurrently by this process
+            poll_interval: Longest wait before checking the store for new jobs
+            heartbeat_interval: How often running jobs are marked alive
+            stale_after: Running jobs without a heartbeat for this long are queued again
+            retention_seconds: Finished jobs (and their input files) are deleted after this
+        """
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.retention_seconds = retention_seconds
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: list = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._updates: Dict[str, asyncio.Event] = {}
+        self._stopping = False
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Set the handler for jobs of ``kind``"""
+        self._handlers[kind] = handler
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Recover jobs of dead workers, purge old ones and start the workers"""
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._maintain()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info(f"Job runner started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running are queued again"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        kind: str,
+        params: Dict[str, Any],
+        input_path: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Persist a new job and wake a worker"""
+        if kind not in self._handlers:
+            raise KeyError(f"No handler registered for job kind '{kind}'")
+        job = self.store.create(kind, params, input_path, job_id)
+        self.notify()
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job, or interrupt a running one in this process"""
+        job = self.store.request_cancel(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        self._publish(job_id)
+        return job
+
+    def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Queue a failed or cancelled job again"""
+        job = self.store.retry(job_id)
+        self.notify()
+        self._publish(job_id)
+        return job
+
+    def notify(self) -> None:
+        """Wake an idle worker (new or retried job)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_for_update(self, job_id: str, timeout: float) -> None:
+        """Return when the job changes in this process, or after ``timeout`` seconds"""
+        event = self._updates.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "workers": self.workers,
+            "running": len(self._running),
+            "jobs": self.store.counts()
+        }
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            # Cleared before looking so a job submitted meanwhile is not missed
+            self._wakeup.clear()
+            job = self.store.claim_next()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        """Run one claimed job to a final state"""
+        job_id = job["id"]
+        handler = self._handlers.get(job["kind"])
+        if handler is None:
+            self.store.fail(job_id, f"No handler registered for job kind '{job['kind']}'")
+            self._publish(job_id)
+            return
+
+        def progress(stage: str) -> None:
+            self.store.set_stage(job_id, stage)
+            self._publish(job_id)
+
+        task = asyncio.create_task(handler(job, progress))
+        self._running[job_id] = task
+        self._publish(job_id)
+        try:
+            result = await asyncio.shield(task)
+            self.store.succeed(job_id, result)
+            logger.info(f"Job {job_id} ({job['kind']}) succeeded")
+        except asyncio.CancelledError:
+            if self._stopping:
+                # Shutdown: let the next process run it
+                task.cancel()
+                self.store.requeue(job_id)
+                raise
+            self.store.mark_cancelled(job_id)
+            logger.info(f"Job {job_id} ({job['kind']}) cancelled")
+        except Exception as e:
+            logger.warning(f"Job {job_id} ({job['kind']}) failed: {e}")
+            self.store.fail(job_id, str(e) or type(e).__name__)
+        finally:
+            self._running.pop(job_id, None)
+            self._publish(job_id)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                for job_id in self.store.heartbeat(list(self._running)):
+                    task = self._running.get(job_id)
+                    if task is not None:
+                        logger.info(f"Job {job_id} cancelled from another process")
+                        task.cancel()
+                self._maintain()
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+
+    def _maintain(self) -> None:
+        """Queue jobs of dead workers again and delete expired ones"""
+        recovered = self.store.recover(self.stale_after)
+        if recovered:
+            logger.warning(f"Queued {recovered} interrupted jobs again")
+            self.notify()
+        for job in self.store.purge(self.retention_seconds):
+            if job["input_path"] and os.path.exists(job["input_path"]):
+                os.unlink(job["input_path"])
+
+    def _publish(self, job_id: str) -> None:
+        """Wake everyone waiting for updates of ``job_id``"""
+        event = self._updates.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+
+# Global runner over the jobs table in DATABASE_URL
+job_runner = JobRunner(
+    JobStore(sqlite_path_from_url(get_settings().DATABASE_URL)),
+    workers=settings.job_workers,
+    heartbeat_interval=settings.job_heartbeat_seconds,
+    stale_after=settings.job_stale_seconds,
+    retention_seconds=settings.job_retention_seconds
+)
@@ -0,0 +1,290 @@
+"""
+Persistent Job Store
+
+SQLite table of background jobs (e.g. long extractions) so they outlive
+the HTTP request that created them and survive restarts. A job moves
+through queued -> running -> succeeded / failed / cancelled; failed and
+cancelled jobs can be queued again.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def sqlite_path_from_url(url: str) -> str:
+    """
+    SQLite file path from a database URL
+
+    ``sqlite:///./edubridge.db`` -> ``./edubridge.db``,
+    ``sqlite:////var/data/jobs.db`` -> ``/var/data/jobs.db`` and
+    ``sqlite://`` or ``sqlite:///:memory:`` -> ``:memory:``.
+
+    Raises:
+        ValueError: For URLs of other databases
+    """
+    scheme, separator, rest = url.partition("://")
+    if not separator or scheme.split("+")[0] != "sqlite":
+        raise ValueError(f"Only sqlite:// database URLs are supported, got {url!r}")
+    path = rest[1:] if rest.startswith("/") else rest
+    return path or ":memory:"
+
+
+class JobStore:
+    """Jobs persisted in SQLite, safe to use from several threads"""
+
+    def __init__(self, path: str = ":memory:", clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: SQLite database file (``:memory:`` for a throwaway store)
+            clock: Time source, injectable for tests
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._path = path
+        self._db = self._connect()
+
+    def create(
+        self,
+        kind: str,
+        params: Dict[str, Any],
+        input_path: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Queue a new job (with a new ID unless ``job_id`` is given) and return it"""
+        now = self._clock()
+        job_id = job_id or uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, params, input_path, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params), input_path, now, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally only those with ``status``"""
+        query, args = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Mark the oldest queued job as running and return it"""
+        now = self._clock()
+        with self._transaction():
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (RUNNING, now, row["id"])
+            )
+        return self.get(row["id"])
+
+    def heartbeat(self, job_ids: List[str]) -> List[str]:
+        """
+        Mark running jobs as alive
+
+        Returns:
+            Those of ``job_ids`` whose cancellation has been requested
+        """
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET updated_at = ? WHERE status = ? AND id IN ({placeholders})",
+                (self._clock(), RUNNING, *job_ids)
+            )
+            rows = self._db.execute(
+                f"SELECT id FROM jobs WHERE cancel_requested = 1 AND status = ? AND id IN ({placeholders})",
+                (RUNNING, *job_ids)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        self._update(job_id, "stage = ?", (stage,), only_status=RUNNING)
+
+    def succeed(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._finish(job_id, SUCCEEDED, result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, FAILED, error=error)
+
+    def mark_cancelled(self, job_id: str) -> None:
+        self._finish(job_id, CANCELLED)
+
+    def request_cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job: queued jobs immediately, running ones are flagged for the runner
+
+        Returns:
+            The updated job, or None if it does not exist
+        """
+        now = self._clock()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, now, now, job_id, QUEUED)
+            )
+            self._db.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?",
+                (now, job_id, RUNNING)
+            )
+        return self.get(job_id)
+
+    def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Queue a failed or cancelled job again
+
+        Returns:
+            The updated job, or None if it does not exist
+        """
+        now = self._clock()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, error = NULL, cancel_requested = 0, "
+                "finished_at = NULL, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (QUEUED, now, job_id, FAILED, CANCELLED)
+            )
+        return self.get(job_id)
+
+    def requeue(self, job_id: str) -> None:
+        """Put a running job back in the queue (e.g. when its worker shuts down)"""
+        self._update(job_id, "status = ?, stage = NULL", (QUEUED,), only_status=RUNNING)
+
+    def recover(self, stale_seconds: float) -> int:
+        """
+        Handle running jobs whose worker stopped sending heartbeats (e.g. a crash)
+
+        Jobs whose cancellation was requested are marked cancelled; the
+        others are queued again.
+
+        Returns:
+            Number of jobs queued again
+        """
+        now = self._clock()
+        cutoff = now - stale_seconds
+        with self._transaction():
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, updated_at = ? "
+                "WHERE status = ? AND cancel_requested = 1 AND updated_at < ?",
+                (CANCELLED, now, now, RUNNING, cutoff)
+            )
+            return self._db.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, updated_at = ? WHERE status = ? AND updated_at < ?",
+                (QUEUED, now, RUNNING, cutoff)
+            ).rowcount
+
+    def purge(self, older_than_seconds: float) -> List[Dict[str, Any]]:
+        """
+        Delete finished jobs older than the retention period
+
+        Returns:
+            The deleted jobs, so their input files can be removed
+        """
+        cutoff = self._clock() - older_than_seconds
+        placeholders = ", ".join("?" for _ in FINISHED)
+        condition = f"status IN ({placeholders}) AND finished_at < ?"
+        with self._transaction():
+            rows = self._db.execute(f"SELECT * FROM jobs WHERE {condition}", (*FINISHED, cutoff)).fetchall()
+            self._db.execute(f"DELETE FROM jobs WHERE {condition}", (*FINISHED, cutoff))
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs by status"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        """Close the connection (e.g. in a server's master process before it forks workers)"""
+        with self._lock:
+            self._db.close()
+
+    def reopen(self) -> None:
+        """Open a fresh connection (e.g. in a forked worker); SQLite connections must not cross a fork"""
+        with self._lock:
+            self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._path != ":memory:":
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        if self._path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+        db.row_factory = sqlite3.Row
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, stage TEXT, "
+            "params TEXT NOT NULL, input_path TEXT, result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, cancel_requested INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, finished_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Write transaction, also exclusive against other processes sharing the file"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        self._update(
+            job_id,
+            "status = ?, result = ?, error = ?, finished_at = ?",
+            (status, result, error, self._clock()),
+            only_status=RUNNING
+        )
+
+    def _update(self, job_id: str, assignments: str, args: tuple, only_status: str) -> None:
+        """Apply ``assignments`` if the job is still in ``only_status``"""
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND status = ?",
+                (*args, self._clock(), job_id, only_status)
+            )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
@@ -0,0 +1,248 @@
+"""
+LLM Response Cache
+
+Two-level cache for LLM results: an in-memory LRU in front of a SQLite
+table on disk. Entries expire after a TTL and both levels are bounded in
+size, evicting the least recently used entries first.
+
+Async code uses ``aget``/``aset``: memory hits are served on the event
+loop, while SQLite reads and writes run on a worker thread.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys: Unicode NFKC and collapsed whitespace"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable SHA-256 key over JSON-serializable key parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """In-memory LRU backed by SQLite, with TTL and size-based eviction"""
+
+    # Disk eviction runs every this many writes to amortize its cost
+    EVICTION_INTERVAL = 50
+
+    def __init__(
+        self,
+        path: Optional[str],
+        ttl_seconds: float,
+        max_memory_entries: int,
+        max_disk_entries: int,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            path: SQLite database file (None for a memory-only cache)
+            ttl_seconds: Lifetime of an entry
+            max_memory_entries: Size of the in-memory LRU
+            max_disk_entries: Maximum rows kept on disk
+            clock: Time source, injectable for tests
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._clock = clock
+
+        self._memory: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._path = path
+        self._db = self._connect() if path else None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk store, or return None (memory only) if that fails"""
+        try:
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            return db
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache disk store unavailable, using memory only: {e}")
+            return None
+
+    def close(self) -> None:
+        """Close the disk store (e.g. in a server's master process before it forks workers)"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def reopen(self) -> None:
+        """Open a fresh disk store connection (e.g. in a forked worker)"""
+        with self._lock:
+            if self._path:
+                self._db = self._connect()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response
+
+        Returns:
+            A copy of the cached value, or None on a miss or expired entry
+        """
+        value = self._memory_get(key)
+        return value if value is not None else self._load(key)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response in both cache levels"""
+        self._store(key, self._remember_new(key, value))
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """``get`` for async callers; the disk lookup on a memory miss runs on a thread"""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self._load, key)
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        """``set`` for async callers; the memory level is updated at once, the disk on a thread"""
+        entry = self._remember_new(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._store, key, entry)
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """A copy of a live memory entry, or None"""
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            self.memory_hits += 1
+            return copy.deepcopy(value)
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a memory miss on disk, remembering what is found"""
+        now = self._clock()
+        with self._lock:
+            value, expires_at = self._disk_get(key, now)
+            if value is not None:
+                self._remember(key, value, expires_at)
+                self.hits += 1
+                self.disk_hits += 1
+                return copy.deepcopy(value)
+
+            self.misses += 1
+            return None
+
+    def _remember_new(self, key: str, value: Dict[str, Any]) -> Tuple[Dict[str, Any], float, float]:
+        """Put a new value in the memory level; returns (value, expires_at, now) for the disk write"""
+        now = self._clock()
+        entry = (copy.deepcopy(value), now + self.ttl_seconds, now)
+        with self._lock:
+            self._remember(key, entry[0], entry[1])
+        return entry
+
+    def _store(self, key: str, entry: Tuple[Dict[str, Any], float, float]) -> None:
+        """Write an entry to SQLite, evicting from time to time"""
+        value, expires_at, now = entry
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+                )
+                self._writes += 1
+                if self._writes % self.EVICTION_INTERVAL == 0:
+                    self._evict_disk(now)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Remove all entries from both levels"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate counters and current sizes"""
+        lookups = self.hits + self.misses
+        disk_entries = None
+        if self._db is not None:
+            with self._lock:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries
+        }
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        """Insert into the memory LRU, evicting the least recently used entry"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Read a live entry from SQLite and refresh its access time"""
+        if self._db is None:
+            return None, 0.0
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, 0.0
+            value, expires_at = row
+            if expires_at <= now:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None, 0.0
+            self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(value), expires_at
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None, 0.0
+
+    def _evict_disk(self, now: float) -> None:
+        """Drop expired rows, then the least recently used rows over the size limit"""
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
@@ -0,0 +1,374 @@
+"""
+Rate-limit-aware LLM request scheduler
+
+Sits in front of the Groq client. Calls are admitted in priority order
+(interactive requests before bulk work) once a concurrency slot is free
+and the requests-per-minute and tokens-per-minute buckets have capacity.
+Each call reserves its prompt plus ``max_tokens``. Buckets are kept in
+sync with the ``x-ratelimit-*`` response headers, minus what calls still
+in flight have reserved; responses without those headers refund the
+completion tokens they did not use once their usage is known. Rate-limited
+or transient failures are retried with jittered exponential backoff.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import re
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+
+from groq import APIConnectionError, APIStatusError, APITimeoutError
+
+from app.core.metrics import BackendTimings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class Priority(IntEnum):
+    """Scheduling lanes; lower values are admitted first"""
+    INTERACTIVE = 0
+    BULK = 1
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset duration into seconds
+
+    Accepts plain seconds ("12", "0.5") and Go-style durations as sent
+    by Groq ("2m59.56s", "7.66s", "120ms").
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding ``capacity`` units per period"""
+
+    def __init__(self, capacity: float, period_seconds: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period_seconds
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        """Return units that were taken but not used"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, remaining: float) -> None:
+        """Set the level to what the server reports as remaining"""
+        self._refill()
+        self.level = min(self.capacity, remaining)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class LLMScheduler:
+    """Priority admission, rate limiting and retries for upstream LLM calls"""
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        queue_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            requests_per_minute: Request budget (RPM bucket capacity)
+            tokens_per_minute: Token budget (TPM bucket capacity)
+            max_concurrency: Maximum calls in flight at once
+            max_retries: Retries after the first attempt for retryable errors
+            base_delay: First backoff delay in seconds
+            max_delay: Upper bound for a single backoff delay
+            queue_timeout: Longest wait for admission per attempt (None waits forever)
+            clock: Monotonic time source, injectable for tests
+        """
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+
+        self._waiting: List[Tuple[int, int, float, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+        # Units taken by admitted calls whose responses have not arrived yet
+        self._reserved = {"requests": 0.0, "tokens": 0.0}
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self.queue_wait = {priority: BackendTimings() for priority in Priority}
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> T:
+        """
+        Run ``call`` once admitted, retrying rate-limited and transient failures
+
+        If the call returns an object with ``headers`` (a raw response),
+        the rate-limit headers are used to correct the local buckets; pass
+        them to ``settle`` as well.
+
+        Args:
+            call: Zero-argument coroutine function making one upstream request
+            estimated_tokens: Prompt plus completion token estimate
+            priority: Scheduling lane
+
+        Returns:
+            The result of the first successful attempt
+        """
+        attempt = 0
+        while True:
+            await self._acquire(priority, estimated_tokens)
+            retry_after = None
+            try:
+                try:
+                    response = await call()
+                except asyncio.CancelledError:
+                    # Abandoned mid-flight (e.g. the losing copy of a hedge): give its quota back
+                    self.requests.give(1)
+                    self.tokens.give(min(estimated_tokens, self.tokens.capacity))
+                    raise
+                finally:
+                    # From here on the server's figures include this attempt
+                    self._unreserve(estimated_tokens)
+                self.observe_headers(getattr(response, "headers", None))
+                return response
+            except Exception as e:
+                retry_after = self._handle_error(e)
+                if retry_after is None or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+            finally:
+                self._release()
+
+            attempt += 1
+            self.retries += 1
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"LLM call failed, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def observe_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """
+        Sync the buckets with ``x-ratelimit-remaining-*`` headers
+
+        The server has not seen calls still in flight yet, so their
+        reservations are subtracted from its figures.
+        """
+        if not headers:
+            return
+        for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{name}")
+            if remaining is None:
+                continue
+            try:
+                bucket.sync(float(remaining) - self._reserved[name])
+            except ValueError:
+                continue
+
+    def settle(
+        self,
+        estimated_tokens: float,
+        used_tokens: Optional[int],
+        headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """
+        Refund the part of a call's token reservation it did not use
+
+        Nothing is refunded when the response reported the remaining tokens:
+        ``observe_headers`` already set the bucket from the server's count,
+        which includes the call's real usage.
+
+        Args:
+            estimated_tokens: The estimate the call was submitted with
+            used_tokens: ``usage.total_tokens`` of the response (None if unknown)
+            headers: Headers of the response
+        """
+        if used_tokens is None or self._reports_remaining_tokens(headers):
+            return
+        unused = min(estimated_tokens, self.tokens.capacity) - used_tokens
+        if unused > 0:
+            self.tokens.give(unused)
+            self._dispatch()
+
+    def saturated(self, estimated_tokens: float = 0.0) -> bool:
+        """Whether a new call would have to wait for admission"""
+        return (
+            self._active >= self.max_concurrency
+            or any(not future.done() for *_, future in self._waiting)
+            or self._paused_until > self._clock()
+            or self.requests.delay(1) > 0
+            or self.tokens.delay(estimated_tokens) > 0
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue, bucket and retry counters"""
+        return {
+            "active": self._active,
+            "queued": sum(1 for *_, future in self._waiting if not future.done()),
+            "max_concurrency": self.max_concurrency,
+            "requests_available": round(self.requests.level, 2),
+            "tokens_available": round(self.tokens.level, 2),
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "queue_wait": {priority.name.lower(): timings.snapshot() for priority, timings in self.queue_wait.items()}
+        }
+
+    async def _acquire(self, priority: Priority, estimated_tokens: float) -> None:
+        """Wait for admission in priority order"""
+        started = self._clock()
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (int(priority), next(self._sequence), estimated_tokens, future))
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.CancelledError:
+            # Admitted just as the caller went away: hand the slot back
+            if future.done() and not future.cancelled():
+                self._unreserve(estimated_tokens)
+                self._release()
+            raise
+        finally:
+            self.queue_wait[priority].record((self._clock() - started) * 1000, failed=not future.done() or future.cancelled())
+
+    @staticmethod
+    def _reports_remaining_tokens(headers: Optional[Mapping[str, str]]) -> bool:
+        try:
+            return bool(headers) and float(headers.get("x-ratelimit-remaining-tokens")) >= 0
+        except (TypeError, ValueError):
+            return False
+
+    def _unreserve(self, estimated_tokens: float) -> None:
+        self._reserved["requests"] -= 1
+        self._reserved["tokens"] -= min(estimated_tokens, self.tokens.capacity)
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiters from the head of the queue while capacity allows"""
+        while self._waiting:
+            _, _, estimated_tokens, future = self._waiting[0]
+            if future.done():
+                heapq.heappop(self._waiting)
+                continue
+            if self._active >= self.max_concurrency:
+                return
+
+            delay = max(
+                self._paused_until - self._clock(),
+                self.requests.delay(1),
+                self.tokens.delay(estimated_tokens)
+            )
+            if delay > 0:
+                self._schedule_wakeup(delay)
+                return
+
+            heapq.heappop(self._waiting)
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+            self._reserved["requests"] += 1
+            self._reserved["tokens"] += min(estimated_tokens, self.tokens.capacity)
+            self._active += 1
+            future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _handle_error(self, error: Exception) -> Optional[float]:
+        """
+        Classify a failed attempt
+
+        Returns:
+            Seconds the server asked us to wait (0.0 if unspecified) for
+            retryable errors, or None if the error should not be retried
+        """
+        if isinstance(error, APITimeoutError):
+            return None
+        if isinstance(error, APIConnectionError):
+            return 0.0
+        if not isinstance(error, APIStatusError) or error.status_code not in self.RETRYABLE_STATUS:
+            return None
+
+        headers = error.response.headers
+        retry_after = parse_duration(headers.get("retry-after")) or 0.0
+        if error.status_code == 429:
+            self.rate_limited += 1
+            self.observe_headers(headers)
+            reset = max(
+                retry_after,
+                self._window_reset(headers, "requests"),
+                self._window_reset(headers, "tokens")
+            )
+            # Hold every lane until the server-side window resets
+            self._paused_until = max(self._paused_until, self._clock() + reset)
+            retry_after = reset
+        return retry_after
+
+    @staticmethod
+    def _window_reset(headers: Mapping[str, str], name: str) -> float:
+        """Seconds until an exhausted rate-limit window resets (0 if not exhausted)"""
+        if headers.get(f"x-ratelimit-remaining-{name}") != "0":
+            return 0.0
+        return parse_duration(headers.get(f"x-ratelimit-reset-{name}")) or 0.0
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Exponential backoff with jitter, never shorter than ``retry_after``"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(delay / 2, delay)
+        return max(delay, retry_after or 0.0)
@@ -0,0 +1,170 @@
+"""
+Latency-tiered model routing for Groq completions
+
+Picks a model per request from the input size, the number of sections
+(topics), the requested artifacts and an optional latency SLO: short
+single-topic notes go to a small, fast model and long multi-topic
+lectures to the large one. Groq rate limits are per model, so each tier
+has its own scheduler and a request spills over to the other tier when
+its preferred tier is saturated or fails with an overload error.
+Per-tier latency and token usage are recorded to tune the thresholds.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import AbstractSet, Any, Dict, List, Optional
+
+import numpy as np
+from groq import APIConnectionError, APIStatusError
+
+from app.core.metrics import BackendTimings
+from app.services.llm_scheduler import LLMScheduler
+
+logger = logging.getLogger(__name__)
+
+FULL_ARTIFACTS = frozenset({"flashcards", "summary", "key_concepts", "study_questions", "knowledge_map"})
+# Artifacts that need little reasoning across the whole input; requests
+# for only these may send twice as much input to the fast tier
+LIGHT_ARTIFACTS = frozenset({"flashcards", "summary", "key_concepts"})
+
+# Observed latencies replace the configured estimate after this many calls
+MIN_LATENCY_SAMPLES = 20
+
+OVERLOAD_STATUS = {429, 500, 502, 503, 504}
+
+
+def is_overload_error(error: Exception) -> bool:
+    """Rate limits, server errors and timeouts: worth retrying on another model"""
+    if isinstance(error, (asyncio.TimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in OVERLOAD_STATUS
+
+
+@dataclass
+class ModelTier:
+    """One model with its generation defaults, scheduler and usage metrics"""
+    name: str
+    model: str
+    max_tokens: int
+    temperature: float
+    expected_latency_ms: float  # Used until enough calls have been observed
+    scheduler: LLMScheduler
+    latency: BackendTimings = field(default_factory=BackendTimings)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def estimated_latency_ms(self) -> float:
+        """p95 of recent calls, or the configured estimate while there are too few"""
+        if len(self.latency.recent) < MIN_LATENCY_SAMPLES:
+            return self.expected_latency_ms
+        return float(np.percentile(np.array(self.latency.recent), 95))
+
+    def record(self, elapsed_ms: float, usage: Any = None, failed: bool = False) -> None:
+        """Record one call, including scheduler queueing, and its token usage"""
+        self.latency.record(elapsed_ms, failed)
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def stats(self) -> Dict[str, Any]:
+        successes = self.latency.calls - self.latency.errors
+        return {
+            "model": self.model,
+            "latency": self.latency.snapshot(),
+            "estimated_latency_ms": round(self.estimated_latency_ms(), 2),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "completion_tokens_per_call": round(self.completion_tokens / successes, 1) if successes else None,
+            "scheduler": self.scheduler.stats()
+        }
+
+
+class ModelRouter:
+    """Choose the model tier for each completion"""
+
+    def __init__(
+        self,
+        quality: ModelTier,
+        fast: Optional[ModelTier] = None,
+        fast_max_input_tokens: int = 400,
+        fast_max_sections: int = 1
+    ):
+        """
+        Args:
+            quality: Large model for long or multi-topic inputs
+            fast: Small, fast model (None routes everything to ``quality``)
+            fast_max_input_tokens: Largest input (estimated tokens) sent to the fast tier
+            fast_max_sections: Most sections (headings) an input may have for the fast tier
+        """
+        self.quality = quality
+        self.fast = fast
+        self.fast_max_input_tokens = fast_max_input_tokens
+        self.fast_max_sections = fast_max_sections
+        self.tiers = [tier for tier in (fast, quality) if tier is not None]
+        self.decisions: Counter = Counter()
+        self.spillovers: Counter = Counter()
+
+    def version(self) -> List[Any]:
+        """Configuration that determines which model answers; part of cache keys"""
+        return [
+            [tier.name, tier.model, tier.max_tokens, tier.temperature] for tier in self.tiers
+        ] + [self.fast_max_input_tokens, self.fast_max_sections]
+
+    def route(
+        self,
+        input_tokens: int,
+        sections: int = 1,
+        artifacts: AbstractSet[str] = FULL_ARTIFACTS,
+        latency_slo_ms: Optional[float] = None,
+        estimated_tokens: float = 0.0
+    ) -> List[ModelTier]:
+        """
+        Order the tiers for one completion
+
+        Args:
+            input_tokens: Estimated tokens of the notes in the prompt
+            sections: Number of topics (headings) in the notes
+            artifacts: Study materials the completion has to produce
+            latency_slo_ms: Latency target; a tier expected to miss it is
+                avoided if the other one is faster
+            estimated_tokens: Request token estimate, to check admission
+
+        Returns:
+            Tiers to try in order; later ones are used only on overload
+        """
+        if self.fast is None:
+            self.decisions["quality:only_tier"] += 1
+            return [self.quality]
+
+        limit = self.fast_max_input_tokens * (2 if artifacts <= LIGHT_ARTIFACTS else 1)
+        if input_tokens <= limit and sections <= self.fast_max_sections:
+            preferred, other, reason = self.fast, self.quality, "small_input"
+        else:
+            preferred, other, reason = self.quality, self.fast, "large_input"
+
+        if (latency_slo_ms is not None
+                and preferred.estimated_latency_ms() > latency_slo_ms
+                and other.estimated_latency_ms() < preferred.estimated_latency_ms()):
+            preferred, other, reason = other, preferred, "latency_slo"
+
+        if preferred.scheduler.saturated(estimated_tokens) and not other.scheduler.saturated(estimated_tokens):
+            preferred, other, reason = other, preferred, "overload"
+
+        self.decisions[f"{preferred.name}:{reason}"] += 1
+        return [preferred, other]
+
+    def record_spillover(self, source: ModelTier, target: ModelTier, error: Exception) -> None:
+        """Count a call retried on another tier after an overload error"""
+        logger.warning(f"{source.name} tier ({source.model}) overloaded: {error!r}; retrying on {target.name}")
+        self.spillovers[f"{source.name}->{target.name}"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tiers": {tier.name: tier.stats() for tier in self.tiers},
+            "decisions": dict(self.decisions),
+            "spillovers": dict(self.spillovers),
+            "fast_max_input_tokens": self.fast_max_input_tokens,
+            "fast_max_sections": self.fast_max_sections
+        }
@@ -0,0 +1,222 @@
+"""
+Prompt compaction for OCR content
+
+Shrinks OCR text before it is sent to the LLM: normalizes whitespace,
+drops OCR noise and low-confidence fragments, strips boilerplate repeated
+across the pages of multi-page input (headers, footers, page numbers),
+keeping the first copy, removes near-duplicate
+lines using shingled hashing, and finally cuts the least reliable blocks
+to fit a token budget.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from app.services.text_chunker import estimate_tokens
+
+_DIGITS = re.compile(r"\d+")
+_WORD = re.compile(r"\w+")
+# Page number lines: "3", "- 3 -", "p. 3 of 10", "3/10", or a footer mentioning "Page 3"
+_PAGE_NUMBER = re.compile(r"^[\s\-–—]*(?:(?:page|pg|p)\.?\s*)?(\d+)(?:\s*(?:/|of)\s*\d+)?[\s\-–—]*$", re.IGNORECASE)
+_PAGE_LABEL = re.compile(r"\b(?:page|pg)\.?\s*(\d+)\b", re.IGNORECASE)
+
+# Character n-grams, so a misread letter only changes a few shingles
+SHINGLE_SIZE = 5
+# Lines longer than this are content, never boilerplate
+BOILERPLATE_MAX_WORDS = 6
+
+
+class PromptCompactor:
+    """Deduplicate, denoise and budget OCR text blocks for LLM prompts"""
+
+    def __init__(
+        self,
+        token_budget: int,
+        near_duplicate_threshold: float = 0.8,
+        boilerplate_min_repeats: int = 3,
+        min_confidence: float = 0.2
+    ):
+        """
+        Args:
+            token_budget: Maximum estimated tokens of the compacted text
+            near_duplicate_threshold: Shingle Jaccard similarity at which
+                two lines count as duplicates
+            boilerplate_min_repeats: Occurrences after which a short line of
+                multi-page input is treated as a repeated header/footer
+            min_confidence: Text blocks below this OCR confidence are dropped
+        """
+        self.token_budget = token_budget
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.boilerplate_min_repeats = boilerplate_min_repeats
+        self.min_confidence = min_confidence
+
+    def compact(self, content: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Compact OCR content items
+
+        Args:
+            content: OCR items ({"type": "heading"|"text", "text", "confidence",
+                optionally "page"}); other item types (e.g. diagrams) are ignored
+
+        Returns:
+            Dictionary with the kept ``items`` (normalized, in document
+            order), the prompt ``text`` and token/drop statistics
+        """
+        blocks = []
+        original_text = []
+        for item in content:
+            if item.get("type") not in ("text", "heading") or not item.get("text"):
+                continue
+            original_text.append(item["text"])
+            blocks.append({**item, "text": normalize_line(item["text"])})
+
+        dropped: Counter = Counter()
+        blocks = self._drop_noise(blocks, dropped)
+        blocks = self._drop_boilerplate(blocks, dropped)
+        blocks = self._drop_near_duplicates(blocks, dropped)
+        blocks = self._fit_budget(blocks, dropped)
+
+        text = "\n".join(block["text"] for block in blocks)
+        original_tokens = estimate_tokens("\n".join(original_text))
+        compacted_tokens = estimate_tokens(text)
+        return {
+            "items": blocks,
+            "text": text,
+            "stats": {
+                "original_tokens": original_tokens,
+                "compacted_tokens": compacted_tokens,
+                "tokens_saved": original_tokens - compacted_tokens,
+                "blocks_kept": len(blocks),
+                "blocks_dropped": dict(dropped)
+            }
+        }
+
+    def _drop_noise(self, blocks: List[Dict[str, Any]], dropped: Counter) -> List[Dict[str, Any]]:
+        """Remove empty blocks, OCR garbage and low-confidence text (short headings such as "OS" are kept)"""
+        kept = []
+        for block in blocks:
+            text = block["text"]
+            alnum = sum(c.isalnum() for c in text)
+            too_short = alnum < 3 if block["type"] == "text" else alnum == 0
+            if too_short or alnum < len(text.replace(" ", "")) * 0.5:
+                dropped["noise"] += 1
+            elif block["type"] == "text" and block.get("confidence", 1.0) < self.min_confidence:
+                dropped["low_confidence"] += 1
+            else:
+                kept.append(block)
+        return kept
+
+    def _drop_boilerplate(self, blocks: List[Dict[str, Any]], dropped: Counter) -> List[Dict[str, Any]]:
+        """
+        Remove repeats of short lines recurring across pages, ignoring numbers
+        (page 1, page 2, ...); the first copy is kept
+
+        Single-page input is left alone: a heading such as "Example" repeated
+        on one page is content, and map-reduce chunking splits on it.
+        """
+        if count_pages(blocks) < 2:
+            return blocks
+        keys = [boilerplate_key(block["text"]) for block in blocks]
+        counts = Counter(key for key in keys if key)
+        seen: Set[str] = set()
+        kept = []
+        for block, key in zip(blocks, keys):
+            if key and counts[key] >= self.boilerplate_min_repeats and key in seen:
+                dropped["boilerplate"] += 1
+            else:
+                kept.append(block)
+            if key:
+                seen.add(key)
+        return kept
+
+    def _drop_near_duplicates(self, blocks: List[Dict[str, Any]], dropped: Counter) -> List[Dict[str, Any]]:
+        """
+        Keep one text block per group of near-identical lines
+
+        Candidates are found through an inverted index over shingle hashes;
+        the index also yields the shingle overlap, so the Jaccard similarity
+        is computed without set operations. Of two duplicates the one with
+        the higher OCR confidence is kept, at the earlier position. Headings
+        are structure and always kept.
+        """
+        kept: List[Dict[str, Any]] = []
+        sizes: List[int] = []
+        index: Dict[int, List[int]] = {}
+
+        for block in blocks:
+            if block["type"] == "heading":
+                kept.append(block)
+                sizes.append(0)
+                continue
+            shingles = shingle_hashes(block["text"])
+            overlaps = Counter(i for shingle in shingles for i in index.get(shingle, ()))
+            duplicate_of = next(
+                (i for i, overlap in sorted(overlaps.items())
+                 if overlap / (len(shingles) + sizes[i] - overlap) >= self.near_duplicate_threshold),
+                None
+            )
+            if duplicate_of is None:
+                for shingle in shingles:
+                    index.setdefault(shingle, []).append(len(kept))
+                kept.append(block)
+                sizes.append(len(shingles))
+                continue
+
+            dropped["near_duplicate"] += 1
+            if block.get("confidence", 1.0) > kept[duplicate_of].get("confidence", 1.0):
+                kept[duplicate_of] = {**block, "type": kept[duplicate_of]["type"]}
+        return kept
+
+    def _fit_budget(self, blocks: List[Dict[str, Any]], dropped: Counter) -> List[Dict[str, Any]]:
+        """Drop the least reliable text blocks (headings last) until the text fits"""
+        tokens = [estimate_tokens(block["text"]) + 1 for block in blocks]
+        total = sum(tokens)
+        if total <= self.token_budget:
+            return blocks
+
+        order = sorted(
+            range(len(blocks)),
+            key=lambda i: (blocks[i]["type"] == "heading", blocks[i].get("confidence", 1.0))
+        )
+        removed = set()
+        for i in order:
+            if total <= self.token_budget:
+                break
+            removed.add(i)
+            total -= tokens[i]
+            dropped["over_budget"] += 1
+        return [block for i, block in enumerate(blocks) if i not in removed]
+
+
+def normalize_line(text: str) -> str:
+    """Unicode NFKC with whitespace collapsed"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def count_pages(blocks: List[Dict[str, Any]]) -> int:
+    """Pages of the input: distinct ``page`` fields, else distinct page-number lines"""
+    pages = {block["page"] for block in blocks if block.get("page") is not None}
+    if not pages:
+        for block in blocks:
+            match = _PAGE_NUMBER.match(block["text"]) or _PAGE_LABEL.search(block["text"])
+            if match:
+                pages.add(int(match.group(1)))
+    return max(1, len(pages))
+
+
+def boilerplate_key(text: str) -> Optional[str]:
+    """Case- and number-insensitive key for short lines, None for content lines"""
+    words = _WORD.findall(_DIGITS.sub("0", text.lower()))
+    if not words or len(words) > BOILERPLATE_MAX_WORDS:
+        return None
+    return " ".join(words)
+
+
+def shingle_hashes(text: str) -> Set[int]:
+    """Hashes of overlapping character n-grams of the lowercased words (the whole line if shorter)"""
+    letters = " ".join(_WORD.findall(text.lower()))
+    if len(letters) <= SHINGLE_SIZE:
+        return {hash(letters)}
+    return {hash(letters[i:i + SHINGLE_SIZE]) for i in range(len(letters) - SHINGLE_SIZE + 1)}
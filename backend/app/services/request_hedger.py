@@ -0,0 +1,141 @@
+"""
+Hedged LLM requests
+
+Cuts tail latency by duplicating a call that has not returned within an
+adaptive threshold (a quantile of recent latencies) and keeping whichever
+copy succeeds first; the other copy is cancelled. Hedges are drawn from a
+per-minute budget so the extra quota spent stays bounded.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import numpy as np
+
+from app.services.llm_scheduler import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RequestHedger:
+    """Issue a backup call when the first one is slower than usual"""
+
+    def __init__(
+        self,
+        quantile: float = 0.9,
+        initial_delay_ms: float = 5000.0,
+        min_delay_ms: float = 500.0,
+        budget_per_minute: float = 6,
+        min_samples: int = 20,
+        window: int = 200,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            quantile: Hedge once a call runs longer than this quantile of recent calls
+            initial_delay_ms: Threshold until ``min_samples`` calls are observed
+            min_delay_ms: Lower bound for the threshold
+            budget_per_minute: Hedges allowed per minute (0 disables hedging)
+            min_samples: Observed calls needed before the quantile is used
+            window: Recent latencies kept per key
+            clock: Monotonic time source, injectable for tests
+        """
+        self.quantile = quantile
+        self.initial_delay_ms = initial_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self.min_samples = min_samples
+        self.window = window
+        self.budget = TokenBucket(budget_per_minute, clock=clock) if budget_per_minute > 0 else None
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def threshold_ms(self, key: str) -> float:
+        """Time after which a call for ``key`` is hedged"""
+        recent = self._latencies.get(key)
+        if recent is None or len(recent) < self.min_samples:
+            return self.initial_delay_ms
+        return max(self.min_delay_ms, float(np.percentile(np.array(recent), self.quantile * 100)))
+
+    async def run(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[T]],
+        can_hedge: Optional[Callable[[], bool]] = None
+    ) -> T:
+        """
+        Run ``call``, starting a second copy if it is slow
+
+        Args:
+            key: Latency population the call belongs to (e.g. a model tier)
+            call: Zero-argument coroutine function; called again for the hedge
+            can_hedge: Checked before hedging, e.g. to skip when the upstream
+                is already saturated
+
+        Returns:
+            The result of the first copy to succeed (the primary's error if both fail)
+        """
+        self.requests += 1
+        primary = asyncio.ensure_future(self._timed(key, call))
+        hedge: Optional["asyncio.Future[T]"] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.threshold_ms(key) / 1000)
+            if done:
+                return primary.result()
+            if can_hedge is not None and not can_hedge():
+                return await primary
+            if self.budget is None or self.budget.delay(1) > 0:
+                self.budget_exhausted += 1
+                return await primary
+
+            self.budget.take(1)
+            self.hedged += 1
+            hedge = asyncio.ensure_future(self._timed(key, call))
+            winner = await self._first_success(primary, hedge)
+            if winner is hedge:
+                self.hedge_wins += 1
+            return winner.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    @staticmethod
+    async def _first_success(primary: "asyncio.Future[T]", hedge: "asyncio.Future[T]") -> "asyncio.Future[T]":
+        """The first copy to finish without an error, preferring the primary on ties"""
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in (primary, hedge):
+                if task in done and task.exception() is None:
+                    return task
+        return primary
+
+    async def _timed(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Run one copy, recording its latency if it succeeds"""
+        started = time.perf_counter()
+        result = await call()
+        self._latencies.setdefault(key, deque(maxlen=self.window)).append((time.perf_counter() - started) * 1000)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge rate, win rate and the current thresholds"""
+        return {
+            "enabled": self.budget is not None,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "win_rate": round(self.hedge_wins / self.hedged, 4) if self.hedged else 0.0,
+            "budget_exhausted": self.budget_exhausted,
+            "budget_available": round(self.budget.level, 2) if self.budget is not None else 0,
+            "threshold_ms": {key: round(self.threshold_ms(key), 1) for key in self._latencies}
+        }
@@ -0,0 +1,88 @@
+"""
+Single-flight request coalescing
+
+Concurrent calls that share a key wait on one in-flight execution instead
+of each doing the same work. Used for Groq enhancements and for OCR of
+byte-identical uploads during classroom bursts.
+"""
+
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls with the same key into one execution"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._waiters: Dict["asyncio.Future[Any]", int] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` for ``key`` unless an identical call is already in flight
+
+        The shared execution runs as its own task, so a caller that is
+        cancelled (e.g. a client disconnect) does not cancel it for the
+        other waiters; once every waiter has been cancelled it is
+        cancelled too, as nobody needs its result. Followers receive a
+        deep copy of the result so callers can mutate what they get back.
+
+        Args:
+            key: Identity of the work (e.g. a cache key or content hash)
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            The result of the shared execution
+        """
+        task = self._in_flight.get(key)
+        leader = task is None
+
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f"[{self.name}] joined in-flight call {key[:12]}")
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                logger.debug(f"[{self.name}] last waiter of {key[:12]} left, cancelling it")
+                task.cancel()
+                # New callers start afresh instead of joining the cancelled run
+                if self._in_flight.get(key) is task:
+                    del self._in_flight[key]
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+        return result if leader else copy.deepcopy(result)
+
+    def stats(self) -> Dict[str, int]:
+        """Execution and coalescing counters"""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
+
+    def _finish(self, key: str, task: "asyncio.Future[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark failures as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
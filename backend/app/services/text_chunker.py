@@ -0,0 +1,100 @@
+"""
+Token-budgeted chunking of OCR content
+
+Splits lecture content into chunks at heading boundaries, sized by a
+cheap token estimate, for map-reduce enhancement of long inputs.
+"""
+
+import math
+import re
+from typing import Any, Dict, List
+
+# Rough average for English text with LLaMA-family tokenizers
+CHARS_PER_TOKEN = 4.0
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_into_chunks(content: List[Dict[str, Any]], max_tokens: int) -> List[str]:
+    """
+    Split OCR text/heading items into chunks of at most ``max_tokens``
+
+    Each heading starts a new section; whole sections are packed into a
+    chunk while they fit. Sections larger than the budget are split
+    between items, and single oversized items between sentences (or
+    words, as a last resort).
+
+    Args:
+        content: OCR content items ({"type": "heading"|"text", "text": ...})
+        max_tokens: Token budget per chunk
+
+    Returns:
+        List of chunk texts, in document order
+    """
+    sections: List[List[str]] = []
+    for item in content:
+        if item.get("type") not in ("text", "heading") or not item.get("text"):
+            continue
+        if item["type"] == "heading" or not sections:
+            sections.append([])
+        sections[-1].extend(_split_oversized(item["text"], max_tokens))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for section in sections:
+        section_tokens = sum(estimate_tokens(line) for line in section)
+
+        # Keep sections whole when they fit in the remaining budget
+        if current and current_tokens + section_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+
+        for line in section:
+            line_tokens = estimate_tokens(line)
+            if current and current_tokens + line_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += line_tokens
+
+    if current:
+        chunks.append("\n".join(current))
+
+    return chunks
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Split a single text item that exceeds the budget"""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces: List[str] = []
+    current = ""
+    for unit in _units(text, max_tokens):
+        candidate = f"{current} {unit}".strip()
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _units(text: str, max_tokens: int) -> List[str]:
+    """Sentences, with any sentence over budget broken into words"""
+    units: List[str] = []
+    for sentence in _SENTENCE_END.split(text):
+        if estimate_tokens(sentence) <= max_tokens:
+            units.append(sentence)
+        else:
+            units.extend(sentence.split())
+    return units
@@ -1,5 +1,6 @@
 
 import os
+import hashlib
 import tempfile
 import shutil
 import json
@@ -36,6 +37,70 @@ async def create_temp_file(file: UploadFile) -> str:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create temporary file: {str(e)}")
 
+async def save_upload(file: UploadFile, directory: str, name: str) -> str:
+    """
+    Keep an uploaded file beyond the request (e.g. as the input of a background job)
+    
+    Args:
+        file: Uploaded file object
+        directory: Directory to store it in (created if missing)
+        name: File name without extension; the upload's extension is kept
+        
+    Returns:
+        Path to the stored file
+    """
+    try:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        suffix = Path(file.filename).suffix if file.filename else '.tmp'
+        path = Path(directory) / f"{name}{suffix}"
+        
+        await file.seek(0)
+        async with aiofiles.open(path, 'wb') as f:
+            await f.write(await file.read())
+        
+        return str(path)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to store uploaded file: {str(e)}")
+
+def private_copy(file_path: str) -> str:
+    """
+    Copy of a file that the caller owns and deletes
+    
+    A hard link where possible (no data is copied); the contents stay
+    readable through it after the original path is deleted.
+    
+    Args:
+        file_path: File to copy
+        
+    Returns:
+        Path to the copy, next to the system temporary files
+    """
+    fd, copy_path = tempfile.mkstemp(suffix=Path(file_path).suffix)
+    os.close(fd)
+    os.unlink(copy_path)
+    try:
+        os.link(file_path, copy_path)
+    except OSError:
+        shutil.copyfile(file_path, copy_path)
+    return copy_path
+
+def file_digest(file_path: str) -> str:
+    """
+    SHA-256 digest of a file's contents
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Hex digest, identical for byte-identical uploads
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 async def save_output_json(data: Dict[str, Any], filename: str) -> str:
     """
     Save JSON data to output directory
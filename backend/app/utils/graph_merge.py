@@ -0,0 +1,189 @@
+"""
+Merge per-block knowledge graphs into one canonical graph
+
+Every text block of a lecture gets its own small graph from the LLM, so
+the same concept shows up once per block ("ac", "avc", ...), sometimes
+under a variant ID or label ("AVC_", "Average Variable Cost"). Nodes are
+keyed by aliases: the slug of their label, the label without its
+parenthesised part, that part itself when it is an abbreviation of the
+label (or the label one of it), and the node ID when it abbreviates the
+label. Other parentheticals are qualifiers ("Paging (memory)") and shared
+qualifiers never merge nodes. A union-find over those aliases merges every
+node that shares one, in time linear in the size of the input graphs.
+
+The merged graph lists each node once and stores edges as two parallel
+arrays of node indices, which is much smaller than repeating string IDs.
+
+The Streamlit app keeps a small copy in ``streamlit_helpers.py``.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Set
+
+_PARENTHESISED = re.compile(r"\(([^()]*)\)")
+_NON_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(text: str) -> str:
+    """Lowercase alphanumerics joined by underscores ("AVC_" -> "avc")"""
+    return _NON_SLUG.sub("_", str(text).lower()).strip("_")
+
+
+def _initials(text: str) -> str:
+    return "".join(word[0] for word in slugify(text).split("_") if word)
+
+
+def node_aliases(node: Dict[str, Any]) -> Set[str]:
+    """
+    Keys under which a node is merged with nodes from other blocks
+
+    "Average Variable Cost (AVC)" gives ``average_variable_cost_avc``,
+    ``average_variable_cost`` and ``avc``, as does "AVC (Average Variable
+    Cost)"; "Paging (memory)" gives ``paging_memory`` and ``paging`` only.
+    The node ID is an alias only if the node has no label or the ID is one
+    of those keys or the label's initials, so generic IDs such as ``n1``
+    never merge unrelated nodes.
+    """
+    label = node.get("label") or ""
+    base = _PARENTHESISED.sub(" ", label)
+    aliases = {slugify(label), slugify(base)}
+    for inner in _PARENTHESISED.findall(label):
+        # Only abbreviations name the same concept; other parentheticals qualify it
+        if slugify(inner) == _initials(base) or _initials(inner) == slugify(base):
+            aliases.add(slugify(inner))
+    aliases.discard("")
+
+    node_id = slugify(node.get("id") or "")
+    if node_id and (not aliases or node_id in aliases or node_id == _initials(base)):
+        aliases.add(node_id)
+    return aliases
+
+
+class UnionFind:
+    """Disjoint sets over hashable keys, with path halving and union by size"""
+
+    def __init__(self):
+        self.parent: Dict[Any, Any] = {}
+        self.size: Dict[Any, int] = {}
+
+    def add(self, key: Any) -> None:
+        if key not in self.parent:
+            self.parent[key] = key
+            self.size[key] = 1
+
+    def find(self, key: Any) -> Any:
+        parent = self.parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def union(self, a: Any, b: Any) -> Any:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+def merge_graphs(graphs: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merge graphs of the form ``{"nodes": [{"id", "label"}], "edges": [{"from", "to"}]}``
+
+    Args:
+        graphs: Per-block graphs; malformed graphs, nodes and edges are skipped
+
+    Returns:
+        ``{"nodes": [...], "edges": {"source": [...], "target": [...]}, "stats": {...}}``
+        where ``source``/``target`` are indices into ``nodes``. Edges keep
+        a parallel ``label`` array when any input edge is labelled. Each
+        node keeps the longest label seen for it and the fields of its
+        first occurrence; self-loops and duplicate edges are dropped.
+    """
+    graphs = [graph for graph in graphs if isinstance(graph, dict)]
+    sets = UnionFind()
+
+    # Pass 1: union each node's aliases; remember one alias per node occurrence
+    occurrences = []  # (graph index, node, alias)
+    for graph_index, graph in enumerate(graphs):
+        for node in graph.get("nodes") or []:
+            if not isinstance(node, dict):
+                continue
+            aliases = node_aliases(node)
+            if not aliases:
+                continue
+            first, *rest = aliases
+            sets.add(first)
+            for alias in rest:
+                sets.add(alias)
+                sets.union(first, alias)
+            occurrences.append((graph_index, node, first))
+
+    # Pass 2: one canonical node per set, in order of first appearance
+    nodes: List[Dict[str, Any]] = []
+    index_of_root: Dict[Any, int] = {}
+    local_ids: List[Dict[str, int]] = [{} for _ in graphs]
+    used_ids: Set[str] = set()
+    for graph_index, node, alias in occurrences:
+        root = sets.find(alias)
+        index = index_of_root.get(root)
+        label = str(node.get("label") or node.get("id") or alias)
+        if index is None:
+            node_id = slugify(node.get("id") or "") or alias
+            unique_id, suffix = node_id, 2
+            while unique_id in used_ids:
+                unique_id, suffix = f"{node_id}_{suffix}", suffix + 1
+            used_ids.add(unique_id)
+            index = index_of_root[root] = len(nodes)
+            nodes.append({**node, "id": unique_id, "label": label})
+        elif len(label) > len(nodes[index]["label"]):
+            nodes[index]["label"] = label
+        if node.get("id") is not None:
+            local_ids[graph_index].setdefault(str(node["id"]), index)
+
+    def resolve(graph_index: int, node_id: Any) -> Optional[int]:
+        """A block's own node ID first, then any alias known from other blocks"""
+        if node_id is None:
+            return None
+        index = local_ids[graph_index].get(str(node_id))
+        if index is None and slugify(node_id) in sets.parent:
+            index = index_of_root.get(sets.find(slugify(node_id)))
+        return index
+
+    # Pass 3: remap edges to node indices
+    sources: List[int] = []
+    targets: List[int] = []
+    labels: List[Optional[str]] = []
+    seen_edges = set()
+    input_edges = 0
+    for graph_index, graph in enumerate(graphs):
+        for edge in graph.get("edges") or []:
+            if not isinstance(edge, dict):
+                continue
+            input_edges += 1
+            source, target = resolve(graph_index, edge.get("from")), resolve(graph_index, edge.get("to"))
+            if source is None or target is None or source == target or (source, target) in seen_edges:
+                continue
+            seen_edges.add((source, target))
+            sources.append(source)
+            targets.append(target)
+            labels.append(edge.get("label"))
+
+    edges: Dict[str, List[Any]] = {"source": sources, "target": targets}
+    if any(label is not None for label in labels):
+        edges["label"] = labels
+
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "stats": {
+            "graphs": len(graphs),
+            "input_nodes": len(occurrences),
+            "input_edges": input_edges,
+            "nodes": len(nodes),
+            "edges": len(sources)
+        }
+    }
@@ -0,0 +1,215 @@
+"""
+Robust JSON extraction from LLM output
+
+Finds the JSON value in a model response that may be wrapped in prose,
+code fences or ``<<<JSON ... JSON>>>`` markers, in time linear in the
+size of the response. Candidates are found with a single bracket scan
+that honours strings and escapes; malformed candidates get bounded
+repairs (trailing commas, truncated output).
+
+The Streamlit app keeps a small copy in ``streamlit_helpers.py``.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+START_MARKER = "<<<JSON"
+END_MARKER = "JSON>>>"
+
+# Deeper nesting is treated as noise rather than handed to the decoder
+MAX_DEPTH = 256
+
+# Characters that change the scanner state; everything else is skipped by the regex engine
+_SPECIAL = re.compile(r'[\[\]{}"\\,]')
+_CLOSER = {"{": "}", "[": "]"}
+
+_MISSING = object()
+
+
+def extract_json(text: Optional[str], expect: Optional[type] = None) -> Any:
+    """
+    Extract the first JSON value from a model response
+
+    Args:
+        text: Raw model output
+        expect: ``dict`` or ``list`` to only accept objects or arrays
+
+    Returns:
+        The decoded value, or None if no (repairable) JSON was found
+    """
+    if not text:
+        return None
+
+    start = text.find(START_MARKER)
+    if start != -1:
+        end = text.find(END_MARKER, start + len(START_MARKER))
+        inner = text[start + len(START_MARKER):end if end != -1 else len(text)]
+        value = _scan(inner, expect)
+        if value is not _MISSING:
+            return value
+
+    value = _loads(text.strip(), expect)
+    if value is not _MISSING:
+        return value
+
+    # The usual case, one value wrapped in prose or code fences, decodes in one go
+    value = _loads(_outermost_span(text, expect), expect)
+    if value is not _MISSING:
+        return value
+
+    value = _scan(text, expect)
+    return None if value is _MISSING else value
+
+
+def remove_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing bracket, outside of strings"""
+    out: List[str] = []
+    last = 0
+    in_string = False
+    skip_to = 0
+    pending_comma = -1
+
+    for match in _SPECIAL.finditer(text):
+        i = match.start()
+        if i < skip_to:
+            continue
+        char = match.group()
+        if in_string:
+            if char == "\\":
+                skip_to = i + 2
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+            pending_comma = -1
+        elif char == ",":
+            pending_comma = i
+        elif char in "}]":
+            if pending_comma != -1 and not text[pending_comma + 1:i].strip():
+                out.append(text[last:pending_comma])
+                last = pending_comma + 1
+            pending_comma = -1
+        else:
+            pending_comma = -1
+
+    out.append(text[last:])
+    return "".join(out)
+
+
+def _outermost_span(text: str, expect: Optional[type]) -> str:
+    """Text from the first opener to the last matching closer"""
+    openers = "{" if expect is dict else "[" if expect is list else "{["
+    starts = [i for i in (text.find(opener) for opener in openers) if i != -1]
+    if not starts:
+        return ""
+    start = min(starts)
+    end = text.rfind(_CLOSER[text[start]])
+    return text[start:end + 1] if end > start else ""
+
+
+def _scan(text: str, expect: Optional[type]) -> Any:
+    """
+    Single pass over ``text`` returning the first decodable bracketed value
+
+    Every character is visited once by the scanner and belongs to at most
+    one candidate passed to the decoder, so the work is linear overall.
+    Candidates are decoded as slices: decoding in place (``raw_decode``)
+    would make every failure cost a line count from the start of ``text``.
+    """
+    openers = "{" if expect is dict else "[" if expect is list else "{["
+    stack: List[str] = []
+    candidate_start = -1
+    in_string = False
+    skip_to = 0
+    # Last point where a complete element ended (just before a comma) and the closers needed there
+    last_cut: Optional[Tuple[int, str]] = None
+
+    for match in _SPECIAL.finditer(text):
+        i = match.start()
+        if i < skip_to:
+            continue
+        char = match.group()
+
+        if not stack:
+            if char in openers:
+                stack.append(char)
+                candidate_start = i
+                in_string = False
+                last_cut = None
+            continue
+
+        if in_string:
+            if char == "\\":
+                skip_to = i + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+            if len(stack) > MAX_DEPTH:
+                stack.clear()
+        elif char in "}]":
+            if _CLOSER[stack[-1]] != char:
+                # Mismatched bracket: not JSON, look for the next candidate
+                stack.clear()
+                continue
+            stack.pop()
+            if not stack:
+                value = _loads_repaired(text[candidate_start:i + 1], expect)
+                if value is not _MISSING:
+                    return value
+        elif char == ",":
+            last_cut = (i, "".join(_CLOSER[opener] for opener in reversed(stack)))
+
+    if stack:
+        return _repair_truncated(text[candidate_start:], stack, in_string, last_cut, candidate_start, expect)
+    return _MISSING
+
+
+def _repair_truncated(
+    fragment: str,
+    stack: List[str],
+    in_string: bool,
+    last_cut: Optional[Tuple[int, str]],
+    offset: int,
+    expect: Optional[type]
+) -> Any:
+    """
+    Close a value cut off mid-stream (e.g. by max_tokens)
+
+    The partial last element is dropped (e.g. a flashcard without its
+    answer); only a value without any complete element is closed as-is.
+    """
+    if last_cut is not None:
+        cut, cut_closers = last_cut
+        value = _loads_repaired(fragment[:cut - offset] + cut_closers, expect)
+        if value is not _MISSING:
+            return value
+
+    head = fragment + ('"' if in_string else "")
+    head = head.rstrip()
+    if head.endswith(","):
+        head = head[:-1]
+    elif head.endswith(":"):
+        head += " null"
+    return _loads_repaired(head + "".join(_CLOSER[opener] for opener in reversed(stack)), expect)
+
+
+def _loads_repaired(candidate: str, expect: Optional[type]) -> Any:
+    value = _loads(candidate, expect)
+    if value is _MISSING:
+        value = _loads(remove_trailing_commas(candidate), expect)
+    return value
+
+
+def _loads(candidate: str, expect: Optional[type]) -> Any:
+    try:
+        value = json.loads(candidate)
+    except (ValueError, RecursionError):
+        return _MISSING
+    if expect is not None and not isinstance(value, expect):
+        return _MISSING
+    return value
@@ -0,0 +1,112 @@
+"""
+Incremental JSON parsing for streamed LLM output
+
+Scans a JSON document as it arrives and returns the elements of a
+top-level array (e.g. ``"flashcards"``) as soon as each element closes,
+without waiting for the rest of the document. Text before the opening
+brace and after the closing brace (model chatter, code fences) is ignored.
+"""
+
+import json
+from typing import Any, List, Optional
+
+
+class JSONArrayStreamParser:
+    """Emit the object elements of one top-level array while the JSON streams in"""
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: Name of the top-level array whose elements are emitted
+        """
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        # One entry per open container: [kind, key of the current member]
+        self._stack: List[List[Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._last_key: Optional[str] = None
+        self._element_start: Optional[int] = None
+        self._document_start: Optional[int] = None
+        self._document_end: Optional[int] = None
+
+    def feed(self, fragment: str) -> List[Any]:
+        """
+        Add a fragment of the document
+
+        Args:
+            fragment: Next piece of the streamed text
+
+        Returns:
+            Array elements completed by this fragment, in order
+        """
+        self.text += fragment
+        completed = []
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            char = text[i]
+
+            if self._document_end is not None:
+                break
+            if self._document_start is None:
+                if char != "{":
+                    continue
+                self._document_start = i
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._expect_key:
+                        self._last_key = json.loads(text[self._string_start:i + 1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                if self._in_target_array() and self._element_start is None:
+                    self._element_start = i
+                if self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][1] = self._last_key
+                self._stack.append([char, None])
+                self._expect_key = char == "{"
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self._document_end = i + 1
+                if self._element_start is not None and self._in_target_array():
+                    try:
+                        completed.append(json.loads(text[self._element_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._element_start = None
+                self._expect_key = False
+            elif char == ":":
+                self._expect_key = False
+            elif char == ",":
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == "{"
+
+        self._pos = len(text)
+        return completed
+
+    def document(self) -> Optional[str]:
+        """The complete top-level JSON object, or None if it has not closed yet"""
+        if self._document_end is None:
+            return None
+        return self.text[self._document_start:self._document_end]
+
+    def _in_target_array(self) -> bool:
+        """True when the innermost open container is the target array"""
+        return (
+            len(self._stack) == 2
+            and self._stack[-1][0] == "["
+            and self._stack[0][1] == self.key
+        )
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON extraction from LLM output
+
+Times ``extract_json`` on adversarial model outputs of a given size and,
+for comparison, the greedy regex approach it replaced (``\\{.*\\}`` /
+``\\[.*\\]`` followed by ``json.loads``). The regex backtracks
+quadratically on unbalanced input, so it is only run on small sizes.
+
+Usage:
+    python loadtest/bench_json_extract.py --size-kb 100
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.json_extract import extract_json  # noqa: E402
+
+CARD = {"question": "What is a process?", "answer": "A program in execution {with state}", "category": "definition"}
+
+
+def adversarial_outputs(size: int) -> Dict[str, str]:
+    """Model outputs of about ``size`` characters that are hard to parse"""
+    cards = json.dumps({"flashcards": [CARD] * max(1, size // 110)})
+    return {
+        # Only openers: the greedy regex tries every start and backtracks to each
+        "unbalanced_braces": "{" * size,
+        # Prose full of braces before the real object
+        "prose_then_json": ("Using {braces} in text [like this], " * (size // 72)) + cards,
+        # Output cut off by max_tokens
+        "truncated": cards[:size],
+        # Valid object followed by a second one (greedy regex spans both)
+        "two_objects": cards[:size // 2].rsplit("},", 1)[0] + "}]} and also " + json.dumps({"extra": True}),
+        # Very long string full of escaped quotes and brackets
+        "escaped_string": json.dumps({"summary": '\\"[{' * (size // 4)}),
+        # Deep nesting
+        "deep_nesting": "[" * (size // 2) + "]" * (size // 2),
+    }
+
+
+def legacy_extract(text: str) -> Optional[Any]:
+    """The previous approach: greedy regex over the whole response, then json.loads"""
+    for pattern in (r"\{.*\}", r"\[.*\]"):
+        match = re.search(pattern, text, re.DOTALL)
+        if match:
+            try:
+                return json.loads(match.group(0))
+            except (ValueError, RecursionError):
+                continue
+    return None
+
+
+def time_call(fn: Callable[[str], Any], text: str, repeat: int) -> float:
+    """Best of ``repeat`` runs in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction from LLM output")
+    parser.add_argument("--size-kb", type=int, default=100)
+    parser.add_argument("--legacy-size-kb", type=int, default=4, help="Size for the regex baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    size = args.size_kb * 1024
+    legacy_size = args.legacy_size_kb * 1024
+    legacy_outputs = adversarial_outputs(legacy_size)
+
+    print(f"📏 extract_json at {args.size_kb} KB vs. greedy regex at {args.legacy_size_kb} KB (best of {args.repeat})")
+    for name, text in adversarial_outputs(size).items():
+        elapsed = time_call(extract_json, text, args.repeat)
+        found = extract_json(text) is not None
+        legacy = time_call(legacy_extract, legacy_outputs[name], 1)
+        legacy_found = legacy_extract(legacy_outputs[name]) is not None
+        print(
+            f"   {name:18} extract_json {elapsed:8.2f} ms (found={found!s:5})   "
+            f"regex {legacy:8.2f} ms (found={legacy_found})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Groq chat-completions API
+
+Serves ``POST /openai/v1/chat/completions`` (JSON and streaming) with a
+configurable latency model, token throughput, injected 429/5xx errors,
+optional server-side RPM limits and canned JSON bodies, so the Groq
+integration can be load-tested offline.
+
+Usage:
+    python loadtest/fake_groq_server.py --port 8900 --ttft-ms 300 --tokens-per-second 250
+    GROQ_BASE_URL=http://127.0.0.1:8900 GROQ_API_KEY=fake uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_BODY = {
+    "flashcards": [
+        {"question": "What is a process?", "answer": "A program in execution", "category": "definition"},
+        {"question": "What does the scheduler do?", "answer": "Decides which process runs next", "category": "concept"},
+        {"question": "What is a context switch?", "answer": "Saving one process's state and loading another's", "category": "concept"},
+        {"question": "What is a PCB?", "answer": "The process control block holding a process's state", "category": "definition"}
+    ],
+    "summary": "Processes are programs in execution; the scheduler multiplexes them on the CPU through context switches.",
+    "key_concepts": ["Process", "Scheduler", "Context switch", "PCB"],
+    "study_questions": ["Why are context switches expensive?", "Compare preemptive and cooperative scheduling."],
+    "knowledge_map": {
+        "nodes": [
+            {"id": "process", "label": "Process", "type": "main"},
+            {"id": "scheduler", "label": "Scheduler", "type": "concept"},
+            {"id": "pcb", "label": "PCB", "type": "concept"}
+        ],
+        "edges": [
+            {"from": "scheduler", "to": "process", "label": "selects"},
+            {"from": "process", "to": "pcb", "label": "described by"}
+        ]
+    },
+    "difficulty_level": "intermediate",
+    "estimated_study_time": "20-25 minutes"
+}
+
+CHARS_PER_TOKEN = 4.0
+
+
+@dataclass
+class FakeGroqConfig:
+    """Behaviour of the fake server"""
+    ttft_ms: float = 300.0  # Median time to first token
+    latency_distribution: str = "lognormal"  # fixed | uniform | lognormal
+    latency_spread: float = 0.5  # Sigma (lognormal) or +/- fraction (uniform)
+    tokens_per_second: float = 250.0  # Completion token throughput per request
+    error_rate_429: float = 0.0
+    error_rate_5xx: float = 0.0
+    requests_per_minute: Optional[int] = None  # Enforce an RPM limit with 429s
+    retry_after_seconds: float = 1.0
+    body: Dict[str, Any] = field(default_factory=lambda: DEFAULT_BODY)
+    seed: Optional[int] = None
+
+
+class FakeGroqState:
+    """Counters and the rolling RPM window"""
+
+    def __init__(self, config: FakeGroqConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.requests = 0
+        self.streamed = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def first_token_delay(self) -> float:
+        """Sample the time to first token in seconds"""
+        config = self.config
+        median = config.ttft_ms / 1000
+        if config.latency_distribution == "fixed":
+            return median
+        if config.latency_distribution == "uniform":
+            return self.random.uniform(median * (1 - config.latency_spread), median * (1 + config.latency_spread))
+        return self.random.lognormvariate(0.0, config.latency_spread) * median
+
+    def rpm_exhausted(self) -> bool:
+        """Count a request against the RPM window"""
+        limit = self.config.requests_per_minute
+        if not limit:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 60:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        return self._window_count > limit
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+        limit = self.config.requests_per_minute
+        if not limit:
+            return {}
+        reset = max(0.0, 60 - (time.monotonic() - self._window_start))
+        return {
+            "x-ratelimit-limit-requests": str(limit),
+            "x-ratelimit-remaining-requests": str(max(0, limit - self._window_count)),
+            "x-ratelimit-reset-requests": f"{reset:.2f}s"
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "streamed": self.streamed,
+            "rate_limited": self.rate_limited,
+            "server_errors": self.server_errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight
+        }
+
+
+def create_app(config: Optional[FakeGroqConfig] = None) -> FastAPI:
+    """Build the fake chat-completions app"""
+    state = FakeGroqState(config or FakeGroqConfig())
+    app = FastAPI(title="Fake Groq API")
+    app.state.fake = state
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        state.requests += 1
+        model = payload.get("model", "fake-model")
+
+        if state.rpm_exhausted() or state.random.random() < state.config.error_rate_429:
+            state.rate_limited += 1
+            headers = {**state.rate_limit_headers(), "retry-after": str(state.config.retry_after_seconds)}
+            return _error(429, "rate_limit_exceeded", "Rate limit reached", headers)
+        if state.random.random() < state.config.error_rate_5xx:
+            state.server_errors += 1
+            return _error(503, "service_unavailable", "Service temporarily unavailable")
+
+        content = json.dumps(state.config.body)
+        prompt_tokens = sum(len(m.get("content") or "") for m in payload.get("messages", [])) / CHARS_PER_TOKEN
+        completion_tokens = len(content) / CHARS_PER_TOKEN
+        usage = {
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "total_tokens": int(prompt_tokens + completion_tokens)
+        }
+        headers = state.rate_limit_headers()
+
+        if payload.get("stream"):
+            state.streamed += 1
+            return StreamingResponse(
+                _stream(state, model, content, completion_tokens),
+                media_type="text/event-stream",
+                headers=headers
+            )
+
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            delay = state.first_token_delay() + completion_tokens / state.config.tokens_per_second
+            await asyncio.sleep(delay)
+        finally:
+            state.in_flight -= 1
+
+        return JSONResponse(headers=headers, content={
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+                "logprobs": None
+            }],
+            "usage": usage
+        })
+
+    @app.get("/stats")
+    async def stats():
+        return state.stats()
+
+    return app
+
+
+async def _stream(state: FakeGroqState, model: str, content: str, completion_tokens: float) -> AsyncIterator[str]:
+    """Server-sent chunks paced at the configured token throughput"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    step = max(1, int(CHARS_PER_TOKEN))  # About one token per chunk
+
+    def chunk(delta: Dict[str, str], finish_reason: Optional[str] = None) -> str:
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }) + "\n\n"
+
+    state.in_flight += 1
+    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+    try:
+        await asyncio.sleep(state.first_token_delay())
+        yield chunk({"role": "assistant", "content": ""})
+        # Sleep in small batches; per-token sleeps would be dominated by timer overhead
+        per_batch = 10 / state.config.tokens_per_second
+        for i in range(0, len(content), step):
+            yield chunk({"content": content[i:i + step]})
+            if (i // step) % 10 == 9:
+                await asyncio.sleep(per_batch)
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+    finally:
+        state.in_flight -= 1
+
+
+def _error(status: int, code: str, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        headers=headers or {},
+        content={"error": {"message": message, "type": code, "code": code}}
+    )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fake Groq chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Median time to first token")
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=250.0)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=None)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--body-file", help="JSON file returned as the completion content")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeGroqConfig:
+    config = FakeGroqConfig(
+        ttft_ms=args.ttft_ms,
+        latency_distribution=args.latency_distribution,
+        latency_spread=args.latency_spread,
+        tokens_per_second=args.tokens_per_second,
+        error_rate_429=args.error_rate_429,
+        error_rate_5xx=args.error_rate_5xx,
+        requests_per_minute=args.requests_per_minute,
+        retry_after_seconds=args.retry_after,
+        seed=args.seed
+    )
+    if args.body_file:
+        config.body = json.loads(Path(args.body_file).read_text(encoding="utf-8"))
+    return config
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    print(f"🧪 Fake Groq API on http://{args.host}:{args.port} (set GROQ_BASE_URL to this address)")
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness for the Groq integration
+
+Drives either ``GroqService`` in-process or a running backend over HTTP at
+a fixed concurrency and reports latency percentiles, throughput and the
+fallback rate (responses served from mock content instead of the model).
+
+Usage:
+    # GroqService against a running fake server
+    python loadtest/run_load.py service --groq-base-url http://127.0.0.1:8900 -n 200 -c 32
+
+    # GroqService against an in-process fake server (no sockets); the local
+    # RPM/TPM buckets are lifted unless --scheduler-rpm/--scheduler-tpm are given
+    python loadtest/run_load.py service --in-process --ttft-ms 400 --error-rate-429 0.1 -n 200 -c 32
+
+    # Tail latency with request hedging against a heavy-tailed latency model
+    python loadtest/run_load.py service --in-process --latency-spread 1.0 --hedge --hedge-budget 60 -n 200 -c 16
+
+    # A running backend (started with GROQ_BASE_URL pointing at the fake server)
+    python loadtest/run_load.py http --url http://127.0.0.1:8000/api/groq/enhance -n 200 -c 32
+    python loadtest/run_load.py http --url http://127.0.0.1:8000/api/extract --image notes.jpg -n 50 -c 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local scheduler limits for --in-process runs, high enough that the client is
+# measured rather than the production 30 RPM / 12000 TPM throttle. Server-side
+# limits are simulated by the fake server (--requests-per-minute, 429 rates).
+IN_PROCESS_SCHEDULER_RPM = 100_000
+IN_PROCESS_SCHEDULER_TPM = 100_000_000
+
+
+def make_document(index: int, unique: bool = True) -> Dict[str, Any]:
+    """OCR payload for one request; unique documents bypass the response cache"""
+    suffix = f" (student {index})" if unique else ""
+    return {
+        "lecture_id": f"load_{index}",
+        "course": "Operating Systems",
+        "topic": "Process Management",
+        "date": "2024-01-01",
+        "content": [
+            {"type": "heading", "text": "PROCESS MANAGEMENT"},
+            {"type": "text", "text": f"A process is a program in execution{suffix}", "confidence": 0.9},
+            {"type": "text", "text": "The scheduler selects the next process to run on the CPU", "confidence": 0.9},
+            {"type": "text", "text": "A context switch saves and restores process state in the PCB", "confidence": 0.9}
+        ]
+    }
+
+
+async def run_load(
+    request: Callable[[int], Awaitable[bool]],
+    total: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """
+    Issue ``total`` requests with at most ``concurrency`` outstanding
+
+    Args:
+        request: Coroutine function taking a request index and returning
+            True if the response was a fallback
+        total: Number of requests
+        concurrency: Concurrent workers
+
+    Returns:
+        Summary statistics (see ``summarize``)
+    """
+    latencies: List[float] = []
+    fallbacks = 0
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, fallbacks, errors
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                if await request(index):
+                    fallbacks += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, fallbacks, errors, time.perf_counter() - started, concurrency)
+
+
+def summarize(latencies: List[float], fallbacks: int, errors: int, elapsed: float, concurrency: int) -> Dict[str, Any]:
+    """Latency percentiles, throughput and fallback/error rates"""
+    count = len(latencies)
+    values = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "requests": count,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(float(np.percentile(values, 50)), 1),
+        "p95_ms": round(float(np.percentile(values, 95)), 1),
+        "p99_ms": round(float(np.percentile(values, 99)), 1),
+        "max_ms": round(float(values.max()), 1),
+        "fallbacks": fallbacks,
+        "fallback_rate": round(fallbacks / count, 4) if count else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0
+    }
+
+
+def build_service(
+    base_url: Optional[str],
+    cache: bool,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    **overrides: Any
+):
+    """
+    A fresh GroqService pointed at the fake server
+
+    Args:
+        base_url: Fake server address
+        cache: Keep the LLM response cache enabled
+        transport: Serve requests through this transport (e.g. an in-process app)
+        overrides: Settings to change first (e.g. groq_requests_per_minute=600)
+    """
+    from app.config import settings
+
+    settings.groq_api_key = settings.groq_api_key or "fake-key"
+    settings.groq_base_url = base_url
+    settings.llm_cache_enabled = cache
+    for name, value in overrides.items():
+        if value is not None:
+            setattr(settings, name, value)
+
+    from app.services.groq_service import GroqService
+    from app.services.llm_cache import LLMResponseCache
+
+    service = GroqService()
+    if not cache:
+        service.cache = LLMResponseCache(None, ttl_seconds=0, max_memory_entries=1, max_disk_entries=1)
+    if transport is not None:
+        from groq import AsyncGroq
+        service.client = AsyncGroq(
+            api_key=settings.groq_api_key,
+            base_url=base_url,
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=transport, timeout=settings.groq_timeout_seconds)
+        )
+    return service
+
+
+async def run_service(args: argparse.Namespace) -> Dict[str, Any]:
+    transport, fake_state = None, None
+    base_url = args.groq_base_url
+    scheduler_rpm, scheduler_tpm = args.scheduler_rpm, args.scheduler_tpm
+    if args.in_process:
+        from loadtest.fake_groq_server import config_from_args, create_app
+
+        fake_app = create_app(config_from_args(args))
+        fake_state = fake_app.state.fake
+        transport = httpx.ASGITransport(app=fake_app)
+        base_url = "http://fake-groq"
+        scheduler_rpm = scheduler_rpm or IN_PROCESS_SCHEDULER_RPM
+        scheduler_tpm = scheduler_tpm or IN_PROCESS_SCHEDULER_TPM
+
+    service = build_service(
+        base_url, args.cache, transport,
+        groq_requests_per_minute=scheduler_rpm,
+        groq_tokens_per_minute=scheduler_tpm,
+        groq_max_concurrency=args.scheduler_concurrency,
+        groq_hedging_enabled=args.hedge or None,
+        groq_hedge_budget_per_minute=args.hedge_budget
+    )
+
+    async def request(index: int) -> bool:
+        document = make_document(index, unique=not args.repeat)
+        if args.stream:
+            result = None
+            async for event in service.stream_enhancement(document):
+                if event["event"] == "complete":
+                    result = event["data"]
+        else:
+            result = await service.enhance_ocr_content(document)
+        return not result["groq_enhanced"]
+
+    try:
+        summary = await run_load(request, args.requests, args.concurrency)
+    finally:
+        await service.aclose()
+
+    summary["fallback_reasons"] = dict(service.fallbacks)
+    summary["scheduler"] = {
+        tier.name: {key: value for key, value in tier.scheduler.stats().items() if key != "queue_wait"}
+        for tier in service.router.tiers
+    }
+    summary["model_routing"] = dict(service.router.decisions)
+    if service.hedger is not None:
+        summary["hedging"] = {
+            key: value for key, value in service.hedger.stats().items() if key != "threshold_ms"
+        }
+    if fake_state is not None:
+        summary["fake_server"] = fake_state.stats()
+    return summary
+
+
+async def run_http(args: argparse.Namespace) -> Dict[str, Any]:
+    image = open(args.image, "rb").read() if args.image else None
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        async def request(index: int) -> bool:
+            if image is not None:
+                response = await client.post(
+                    args.url,
+                    params={"enable_groq": "true", "save_output": "false"},
+                    files={"file": (os.path.basename(args.image), image, "image/jpeg")}
+                )
+            else:
+                response = await client.post(
+                    args.url,
+                    params={"save_output": "false"},
+                    json=make_document(index, unique=not args.repeat)
+                )
+            response.raise_for_status()
+            return response.json().get("groq_enhanced") is False
+
+        return await run_load(request, args.requests, args.concurrency)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    from loadtest.fake_groq_server import parse_args as fake_server_args
+
+    parser = argparse.ArgumentParser(description="Load-test the Groq integration")
+    subparsers = parser.add_subparsers(dest="target", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-n", "--requests", type=int, default=100)
+    common.add_argument("-c", "--concurrency", type=int, default=16)
+    common.add_argument("--repeat", action="store_true", help="Send identical documents (exercises cache/coalescing)")
+    common.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    service = subparsers.add_parser("service", parents=[common], help="Drive GroqService in-process")
+    service.add_argument("--groq-base-url", default="http://127.0.0.1:8900")
+    service.add_argument("--in-process", action="store_true", help="Serve the fake API in-process instead")
+    service.add_argument("--stream", action="store_true", help="Use the streaming enhancement path")
+    service.add_argument("--cache", action="store_true", help="Keep the LLM response cache enabled")
+    service.add_argument("--scheduler-rpm", type=int,
+                         help="Override groq_requests_per_minute (lifted by default with --in-process)")
+    service.add_argument("--scheduler-tpm", type=int,
+                         help="Override groq_tokens_per_minute (lifted by default with --in-process)")
+    service.add_argument("--scheduler-concurrency", type=int, help="Override groq_max_concurrency")
+    service.add_argument("--hedge", action="store_true", help="Enable request hedging")
+    service.add_argument("--hedge-budget", type=int, help="Override groq_hedge_budget_per_minute")
+    # Fake server behaviour for --in-process
+    fake_defaults = fake_server_args([])
+    service.add_argument("--ttft-ms", type=float, default=fake_defaults.ttft_ms)
+    service.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"],
+                         default=fake_defaults.latency_distribution)
+    service.add_argument("--latency-spread", type=float, default=fake_defaults.latency_spread)
+    service.add_argument("--tokens-per-second", type=float, default=fake_defaults.tokens_per_second)
+    service.add_argument("--error-rate-429", type=float, default=0.0)
+    service.add_argument("--error-rate-5xx", type=float, default=0.0)
+    service.add_argument("--requests-per-minute", type=int, default=None)
+    service.add_argument("--retry-after", type=float, default=fake_defaults.retry_after)
+    service.add_argument("--body-file", default=None)
+    service.add_argument("--seed", type=int, default=None)
+
+    http = subparsers.add_parser("http", parents=[common], help="Drive a running backend endpoint")
+    http.add_argument("--url", default="http://127.0.0.1:8000/api/groq/enhance")
+    http.add_argument("--image", help="Upload this image (for /api/extract)")
+    http.add_argument("--timeout", type=float, default=120.0)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    runner = run_service if args.target == "service" else run_http
+    summary = asyncio.run(runner(args))
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"📊 {summary['requests']} requests at concurrency {summary['concurrency']} in {summary['elapsed_s']}s")
+    print(f"   throughput: {summary['throughput_rps']} req/s")
+    print(f"   latency:    p50 {summary['p50_ms']} ms | p95 {summary['p95_ms']} ms | p99 {summary['p99_ms']} ms | max {summary['max_ms']} ms")
+    print(f"   fallbacks:  {summary['fallbacks']} ({summary['fallback_rate']:.1%})   errors: {summary['errors']} ({summary['error_rate']:.1%})")
+    for key in ("fallback_reasons", "scheduler", "model_routing", "hedging", "fake_server"):
+        if key in summary:
+            print(f"   {key}: {summary[key]}")
+
+
+if __name__ == "__main__":
+    main()
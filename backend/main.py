@@ -7,8 +7,13 @@ import logging
 from pathlib import Path
 
 from app.api.router import api_router
+from app.api.endpoints.ocr import extract_pipeline
+from app.config import settings as app_settings
+from app.core.admission import AdmissionMiddleware, admission_controller
 from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.services.groq_service import groq_service
+from app.services.job_runner import job_runner
 
 # Initialize settings and logger
 settings = get_settings()
@@ -23,6 +28,11 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Shed heavy requests early when their expected wait exceeds the SLO
+# (added first so CORS headers are also set on its 503 responses)
+if app_settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +52,18 @@ app.mount("/outputs", StaticFiles(directory="outputs"), name="outputs")
 # Include API router
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("startup")
+async def startup_event():
+    """Start the background job workers"""
+    await job_runner.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop job workers (their jobs are queued again), the extract pipeline and pooled upstream connections"""
+    await job_runner.stop()
+    await extract_pipeline.stop()
+    await groq_service.aclose()
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -55,7 +77,9 @@ async def root():
             "diagram_detect": "/api/diagram-detect", 
             "extract_all": "/api/extract",
             "groq_enhance": "/api/groq/enhance",
-            "groq_health": "/api/groq/health"
+            "groq_enhance_stream": "/api/groq/enhance/stream",
+            "groq_health": "/api/groq/health",
+            "jobs": "/api/jobs"
         }
     }
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Production server: load the models once, then fork workers
+
+The app (EasyOCR, torch, the spell dictionary) is imported in the master
+process and shared copy-on-write by the forked workers, so 8 workers cost
+far less than 8 model loads. Unlike ``run_server.py`` there is no reload.
+
+Usage:
+    python serve.py --workers 8 --port 8000
+    python serve.py --workers 8 --max-requests 5000 --max-memory-mb 1500
+
+Signals (to the master):
+    SIGTERM / SIGINT  stop gracefully
+    SIGHUP            recycle all workers, one at a time
+    SIGUSR1           log per-worker memory now
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.core.prefork import PreforkServer, WorkerLimits
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Preforked EduBridge API server")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.server_workers)
+    parser.add_argument("--max-requests", type=int, default=settings.worker_max_requests)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.worker_max_requests_jitter)
+    parser.add_argument("--max-age", type=float, default=settings.worker_max_age_seconds, help="Seconds")
+    parser.add_argument("--max-memory-mb", type=float, default=settings.worker_max_memory_mb)
+    parser.add_argument("--graceful-timeout", type=float, default=settings.worker_graceful_timeout)
+    parser.add_argument("--report-interval", type=float, default=settings.worker_memory_report_seconds)
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args()
+
+
+def limit_torch_threads(workers: int):
+    """Split the CPU cores between workers instead of each torch using all of them"""
+    def apply() -> None:
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    return apply
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+
+    # Loads every model once, in the master
+    from main import app
+    from app.services.groq_service import groq_service
+    from app.services.job_runner import job_runner
+
+    server = PreforkServer(
+        app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        limits=WorkerLimits(
+            max_requests=args.max_requests,
+            max_requests_jitter=args.max_requests_jitter,
+            max_age_seconds=args.max_age,
+            max_memory_mb=args.max_memory_mb
+        ),
+        graceful_timeout=args.graceful_timeout,
+        report_interval=args.report_interval,
+        # SQLite connections must not be shared across fork()
+        pre_fork=[job_runner.store.close, groq_service.cache.close],
+        post_fork=[job_runner.store.reopen, groq_service.cache.reopen, limit_torch_threads(args.workers)],
+        log_level=args.log_level
+    )
+    return server.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
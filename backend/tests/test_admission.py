@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+
+from app.core.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    ClassPolicy,
+    classify_request
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_controller(clock=None) -> AdmissionController:
+    return AdmissionController(
+        {"ocr": ClassPolicy(capacity=2, slo_seconds=3.0, service_seconds=2.0)},
+        clock=clock or FakeClock()
+    )
+
+
+class TestAdmissionController:
+    """Test cases for wait-based admission"""
+
+    def test_request_classes(self):
+        assert classify_request("POST", "/api/ocr") == "ocr"
+        assert classify_request("POST", "/api/extract") == "ocr"
+        assert classify_request("GET", "/api/extract/pipeline") == "light"
+        assert classify_request("POST", "/api/diagram-detect") == "diagram"
+        assert classify_request("POST", "/api/groq/enhance/stream") == "llm"
+        assert classify_request("GET", "/api/groq/health") == "light"
+        assert classify_request("GET", "/api/outputs/") == "light"
+        assert classify_request("GET", "/health") == "light"
+
+    def test_rejects_once_expected_wait_exceeds_slo(self):
+        controller = make_controller()
+        waits = []
+        for _ in range(5):
+            ticket, wait = controller.try_admit("ocr")
+            assert ticket is not None
+            waits.append(wait)
+        # Two run at once; each further request waits for another 1s (2s / 2 workers)
+        assert waits == [0.0, 0.0, 1.0, 2.0, 3.0]
+
+        ticket, wait = controller.try_admit("ocr")
+        assert ticket is None and wait == 4.0
+        assert controller.retry_after("ocr", wait) == 1
+        stats = controller.stats()["ocr"]
+        assert (stats["in_flight"], stats["queued"], stats["admitted"], stats["rejected"]) == (5, 3, 5, 1)
+
+    def test_release_frees_capacity(self):
+        controller = make_controller()
+        tickets = [controller.try_admit("ocr")[0] for _ in range(5)]
+        assert controller.try_admit("ocr")[0] is None
+
+        controller.release(tickets[0])
+        assert controller.try_admit("ocr")[0] is not None
+
+    def test_service_time_is_learned_without_queueing_time(self):
+        clock = FakeClock()
+        controller = make_controller(clock)
+        first, _ = controller.try_admit("ocr")
+        controller.try_admit("ocr")
+        queued, _ = controller.try_admit("ocr")
+        assert queued.ahead == 1
+
+        clock.now += 4.0
+        controller.release(first)
+        assert controller.stats()["ocr"]["service_seconds"] == 2.4
+
+        # 6s in total, of which half a service time was spent waiting
+        clock.now += 2.0
+        controller.release(queued)
+        assert controller.stats()["ocr"]["service_seconds"] == round(2.4 + 0.2 * (4.0 - 2.4), 3)
+
+    def test_errors_do_not_lower_the_estimate(self):
+        clock = FakeClock()
+        controller = make_controller(clock)
+        ticket, _ = controller.try_admit("ocr")
+        clock.now += 0.01
+        controller.release(ticket, learn=False)
+
+        stats = controller.stats()["ocr"]
+        assert (stats["in_flight"], stats["service_seconds"]) == (0, 2.0)
+
+    def test_unknown_class_is_always_admitted(self):
+        ticket, wait = make_controller().try_admit("llm")
+        assert ticket is not None and wait == 0.0
+
+
+class TestAdmissionMiddleware:
+    """Test cases for shedding requests at the ASGI layer"""
+
+    def test_sheds_heavy_requests_but_not_light_ones(self):
+        controller = AdmissionController({"ocr": ClassPolicy(capacity=1, slo_seconds=0.5, service_seconds=1.0)})
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["path"] == "/api/ocr":
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        transport = httpx.ASGITransport(app=AdmissionMiddleware(app, controller))
+
+        async def scenario():
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                running = asyncio.create_task(client.post("/api/ocr"))
+                while controller.stats()["ocr"]["in_flight"] == 0:
+                    await asyncio.sleep(0.01)
+
+                shed = await client.post("/api/ocr")
+                light = await client.get("/api/outputs/")
+                release.set()
+                first = await running
+                return shed, light, first
+
+        shed, light, first = asyncio.run(scenario())
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "1"
+        assert shed.json()["endpoint_class"] == "ocr"
+        assert light.status_code == 200
+        assert first.status_code == 200
+        assert controller.stats()["ocr"]["in_flight"] == 0
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+
+from app.core.cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    CancellationToken,
+    RequestCancelled,
+    cancel_on_disconnect
+)
+from app.core.executors import run_in_executor, run_on_private_copy
+from app.core.staged_pipeline import Stage, StagedPipeline
+from app.services.single_flight import SingleFlight
+
+
+async def call_disconnecting(app, path: str, body: bytes, disconnect_after: float):
+    """Send a POST to an ASGI app and drop the connection after a delay"""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234), "server": ("test", 80)
+    }
+    await app(scope, receive, send)
+    return next(message["status"] for message in sent if message["type"] == "http.response.start")
+
+
+class TestCancellationToken:
+    """Test cases for cooperative request cancellation"""
+
+    def test_cancel_interrupts_running_work(self):
+        token = CancellationToken()
+
+        async def scenario():
+            asyncio.get_running_loop().call_later(0.02, token.cancel, "client disconnected")
+            with pytest.raises(RequestCancelled, match="client disconnected"):
+                await token.run(asyncio.sleep(5))
+
+        started = time.perf_counter()
+        asyncio.run(scenario())
+        assert time.perf_counter() - started < 1
+
+    def test_checks_between_steps(self):
+        token = CancellationToken()
+        token.raise_if_cancelled()
+        token.cancel()
+        with pytest.raises(RequestCancelled):
+            token.raise_if_cancelled()
+
+        async def never_started():
+            raise AssertionError("should not run")
+
+        with pytest.raises(RequestCancelled):
+            asyncio.run(token.run(never_started()))
+
+    def test_queued_executor_work_is_withdrawn(self):
+        pool = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+        ran = []
+        token = CancellationToken()
+
+        async def scenario():
+            busy = asyncio.ensure_future(run_in_executor(pool, release.wait))
+            queued = asyncio.ensure_future(token.run(run_in_executor(pool, ran.append, "queued")))
+            await asyncio.sleep(0.02)
+            token.cancel()
+            with pytest.raises(RequestCancelled):
+                await queued
+            release.set()
+            await busy
+            await run_in_executor(pool, time.sleep, 0)
+
+        asyncio.run(scenario())
+        assert ran == []
+
+    def test_shared_run_outlives_the_cancelled_leaders_upload(self, tmp_path):
+        upload = tmp_path / "upload.png"
+        upload.write_bytes(b"page")
+        pool = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+        read_paths = []
+        in_flight = SingleFlight("test")
+        leader = CancellationToken()
+
+        def read(path):
+            read_paths.append(path)
+            with open(path, "rb") as f:
+                return f.read()
+
+        async def handler(token):
+            # Like /api/ocr: the upload is deleted once the handler stops waiting
+            try:
+                return await token.run(in_flight.do("page", lambda: run_on_private_copy(pool, read, str(upload))))
+            finally:
+                if upload.exists():
+                    os.unlink(upload)
+
+        async def scenario():
+            busy = asyncio.ensure_future(run_in_executor(pool, release.wait))
+            first = asyncio.ensure_future(handler(leader))
+            await asyncio.sleep(0.02)
+            follower = asyncio.ensure_future(in_flight.do("page", lambda: run_on_private_copy(pool, read, str(upload))))
+            await asyncio.sleep(0.02)
+
+            leader.cancel()
+            with pytest.raises(RequestCancelled):
+                await first
+            assert not upload.exists()
+
+            release.set()
+            await busy
+            return await follower
+
+        assert asyncio.run(scenario()) == b"page"
+        assert len(read_paths) == 1 and not os.path.exists(read_paths[0])
+
+    def test_cancelled_pipeline_item_stops_its_stage(self):
+        finished = []
+
+        async def slow_llm(item):
+            await asyncio.sleep(5)
+            finished.append(item)
+            return item
+
+        pipeline = StagedPipeline("test", [Stage("llm", slow_llm)])
+        token = CancellationToken()
+
+        async def scenario():
+            asyncio.get_running_loop().call_later(0.05, token.cancel)
+            with pytest.raises(RequestCancelled):
+                await token.run(pipeline.submit(["page"]))
+            await asyncio.sleep(0.01)
+            stats = pipeline.stats()["stages"][0]
+            await pipeline.stop()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert finished == []
+        assert (stats["cancelled"], stats["busy"]) == (1, 0)
+
+
+class TestCancelOnDisconnect:
+    """Test cases for cancelling endpoint work when the client goes away"""
+
+    def make_app(self, work_seconds: float, done: list) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/work")
+        async def work(request: Request, payload: dict):
+            try:
+                async with cancel_on_disconnect(request) as cancellation:
+                    await cancellation.run(asyncio.sleep(work_seconds))
+                done.append(payload["id"])
+                return {"ok": True}
+            except RequestCancelled:
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+
+        return app
+
+    def test_disconnect_cancels_the_work(self):
+        done = []
+        app = self.make_app(work_seconds=5, done=done)
+
+        started = time.perf_counter()
+        status = asyncio.run(call_disconnecting(app, "/work", b'{"id": 1}', disconnect_after=0.05))
+        assert status == CLIENT_CLOSED_REQUEST
+        assert done == []
+        assert time.perf_counter() - started < 1
+
+    def test_connected_client_gets_its_result(self):
+        done = []
+        app = self.make_app(work_seconds=0.01, done=done)
+
+        status = asyncio.run(call_disconnecting(app, "/work", b'{"id": 2}', disconnect_after=5))
+        assert status == 200
+        assert done == [2]
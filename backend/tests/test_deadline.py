@@ -0,0 +1,80 @@
+import pytest
+
+from app.core.deadline import (
+    CONNECTIONS,
+    DENOISE,
+    GROQ,
+    SPELL_CORRECTION,
+    UPSCALE,
+    Deadline,
+    StepCosts
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestStepCosts:
+    """Test cases for learned step cost estimates"""
+
+    def test_defaults_until_enough_samples(self):
+        costs = StepCosts({"ocr": 4.0}, quantile=0.5)
+        for _ in range(StepCosts.MIN_SAMPLES - 1):
+            costs.record("ocr", 1.0)
+        assert costs.estimate("ocr") == 4.0
+        assert costs.estimate("unknown") == 0.0
+
+        costs.record("ocr", 1.0)
+        assert costs.estimate("ocr") == 1.0
+
+    def test_estimate_is_a_high_quantile_of_recent_timings(self):
+        costs = StepCosts({}, quantile=0.9, window=10)
+        for seconds in [5.0] * 10 + [float(i) for i in range(1, 11)]:
+            costs.record("groq", seconds)
+        # Only the last 10 timings are kept
+        assert costs.estimate("groq") == pytest.approx(9.1)
+
+        stats = costs.stats()["groq"]
+        assert stats == {"estimate_ms": 9100.0, "samples": 10}
+
+
+class TestDeadline:
+    """Test cases for degrading work to fit a latency budget"""
+
+    OPTIONAL = {DENOISE: 1.0, UPSCALE: 2.0, SPELL_CORRECTION: 0.5, CONNECTIONS: 0.5, GROQ: 4.0}
+
+    def test_no_degradation_when_the_work_fits(self):
+        deadline = Deadline(10_000, clock=FakeClock())
+        assert deadline.plan(1.0, self.OPTIONAL) == []
+        assert deadline.degradations == []
+
+    def test_steps_are_given_up_in_order_until_the_work_fits(self):
+        clock = FakeClock()
+        deadline = Deadline(6_000, clock=clock)
+
+        # 9s of work for 6s: denoise and upscaling go first
+        assert deadline.plan(1.0, self.OPTIONAL) == [DENOISE, UPSCALE]
+        assert deadline.skips(UPSCALE) and not deadline.skips(GROQ)
+
+        # Later stages re-plan with what is left of the budget
+        clock.now += 3.0
+        assert deadline.plan(0.0, {CONNECTIONS: 0.5, GROQ: 4.0}) == [CONNECTIONS, GROQ]
+        assert deadline.degradations == [DENOISE, UPSCALE, CONNECTIONS, GROQ]
+
+    def test_overrun_budget_skips_everything_optional(self):
+        clock = FakeClock()
+        deadline = Deadline(100, clock=clock)
+        clock.now += 1.0
+        assert deadline.remaining() == pytest.approx(-0.9)
+
+        assert deadline.plan(0.0, {SPELL_CORRECTION: 0.1, GROQ: 4.0}) == [SPELL_CORRECTION, GROQ]
+
+    def test_without_budget_nothing_is_skipped(self):
+        deadline = Deadline()
+        assert not deadline.limited
+        assert deadline.plan(1000.0, self.OPTIONAL) == []
@@ -0,0 +1,75 @@
+import pytest
+import cv2
+import numpy as np
+
+from app.core.detector_registry import DetectorRegistry, detector_registry
+from app.core.diagram_detector import detect_connections_json, detect_diagrams_json
+from tests.test_layout import make_page
+
+
+class CountingDetector:
+    """Minimal backend used to exercise the registry"""
+
+    created = 0
+
+    def __init__(self):
+        CountingDetector.created += 1
+
+    def detect_boxes(self, image_path, regions=None):
+        return [{"x": 0, "y": 0, "w": 10, "h": 10, "shape": "rectangle", "confidence": 0.9}]
+
+
+class TestDetectorRegistry:
+    """Test cases for the pluggable diagram detector registry"""
+
+    def test_backends_are_singletons(self):
+        registry = DetectorRegistry(default_backend="counting")
+        registry.register("counting", CountingDetector)
+        CountingDetector.created = 0
+
+        assert registry.get() is registry.get("counting")
+        registry.detect("page.png")
+        registry.detect("page.png")
+        assert CountingDetector.created == 1
+
+    def test_timings_are_recorded(self):
+        registry = DetectorRegistry(default_backend="counting")
+        registry.register("counting", CountingDetector)
+
+        registry.detect("page.png")
+        stats = registry.stats()["counting"]
+        assert stats["calls"] == 1
+        assert stats["errors"] == 0
+        assert stats["p50_ms"] is not None
+
+    def test_unknown_backend(self):
+        with pytest.raises(KeyError):
+            detector_registry.resolve("does_not_exist")
+
+    def test_builtin_backends(self, tmp_path):
+        assert {"opencv", "lite", "mock"} <= set(detector_registry.names())
+
+        image_path = str(tmp_path / "page.png")
+        cv2.imwrite(image_path, make_page())
+
+        for backend in ("opencv", "lite", "mock"):
+            boxes = detect_diagrams_json(image_path, backend=backend)
+            assert boxes, backend
+            assert {"x", "y", "w", "h", "shape", "confidence"} <= set(boxes[0])
+
+    def test_connections_join_boxes(self, tmp_path):
+        image = np.full((400, 600, 3), 255, dtype=np.uint8)
+        cv2.rectangle(image, (50, 150), (150, 250), (0, 0, 0), 3)
+        cv2.rectangle(image, (450, 150), (550, 250), (0, 0, 0), 3)
+        cv2.line(image, (150, 200), (450, 200), (0, 0, 0), 3)
+        image_path = str(tmp_path / "diagram.png")
+        cv2.imwrite(image_path, image)
+
+        boxes = [
+            {"x": 50, "y": 150, "w": 100, "h": 100, "shape": "square", "confidence": 0.9},
+            {"x": 450, "y": 150, "w": 100, "h": 100, "shape": "square", "confidence": 0.9}
+        ]
+        connections = detect_connections_json(image_path, boxes)
+        assert connections
+        assert all(connection["connects"] == [0, 1] for connection in connections)
+        assert detect_connections_json(image_path, []) == []
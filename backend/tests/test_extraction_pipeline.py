@@ -0,0 +1,176 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.core.diagram_detector import detect_diagrams_json
+from app.core.executors import diagram_executor, run_in_executor
+from app.dependencies import get_processing_options
+from app.models.requests import ProcessingMode
+from app.services.extraction_pipeline import combine_extraction, run_extraction_stages
+
+OCR_RESULT = {
+    "lecture_id": "lec_042",
+    "course": "Operating Systems",
+    "topic": "Scheduling",
+    "date": "2024-01-01",
+    "content": [{"type": "heading", "text": "Round robin"}, {"type": "text", "text": "Time slices", "confidence": 0.9}]
+}
+
+
+@pytest.fixture
+def page(tmp_path):
+    """White page with two boxes drawn on it"""
+    image = np.full((600, 800, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (50, 50), (300, 250), (0, 0, 0), 3)
+    cv2.rectangle(image, (400, 300), (700, 550), (0, 0, 0), 3)
+    path = tmp_path / "page.png"
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def slow_ocr(image_path: str, delay: float = 0.3):
+    """Blocking stand-in for ``process_image``"""
+    time.sleep(delay)
+    return OCR_RESULT
+
+
+class TestExtractionPipeline:
+    """Test cases for concurrent OCR and diagram detection"""
+
+    def test_output_matches_sequential_run(self, page):
+        ocr_pool = ThreadPoolExecutor(max_workers=1)
+        sequential = combine_extraction(slow_ocr(page, 0), detect_diagrams_json(page, backend="opencv"))
+
+        ocr_result, boxes = asyncio.run(run_extraction_stages(
+            lambda: run_in_executor(ocr_pool, slow_ocr, page),
+            lambda: run_in_executor(diagram_executor, detect_diagrams_json, page, regions=None, backend="opencv")
+        ))
+
+        assert boxes
+        assert combine_extraction(ocr_result, boxes) == sequential
+
+    def test_stages_overlap(self):
+        ocr_pool = ThreadPoolExecutor(max_workers=1)
+
+        def slow_diagrams():
+            time.sleep(0.3)
+            return [{"x": 1, "y": 2, "w": 3, "h": 4}]
+
+        started = time.perf_counter()
+        asyncio.run(run_extraction_stages(
+            lambda: run_in_executor(ocr_pool, slow_ocr, "page.png"),
+            lambda: run_in_executor(diagram_executor, slow_diagrams)
+        ))
+        # Close to max(OCR, diagrams) rather than their 0.6s sum
+        assert time.perf_counter() - started < 0.5
+
+    def test_default_extract_path_overlaps_ocr_and_diagrams(self, page, monkeypatch):
+        # Imported here: the endpoint module loads the EasyOCR model
+        from app.api.endpoints import ocr
+        from app.config import settings
+
+        spans = {}
+
+        def timed(name, result):
+            def stage(*args, **kwargs):
+                started = time.perf_counter()
+                time.sleep(0.3)
+                spans[name] = (started, time.perf_counter())
+                return result
+            return stage
+
+        monkeypatch.setattr(ocr, "read_text", timed("ocr", [{"text": "Round robin", "confidence": 0.9}]))
+        monkeypatch.setattr(ocr, "detect_diagrams_json", timed("diagrams", []))
+        monkeypatch.setattr(settings, "enable_layout_routing", False)
+        monkeypatch.setattr(settings, "enable_spell_correction", False)
+
+        async def scenario():
+            try:
+                return await ocr.run_extraction(page, enable_groq=False, detector="opencv")
+            finally:
+                await ocr.extract_pipeline.stop()
+
+        assert settings.enable_staged_pipeline
+        result = asyncio.run(scenario())
+
+        assert result["content"][-1]["type"] == "diagram"
+        (ocr_start, ocr_end), (diagrams_start, diagrams_end) = spans["ocr"], spans["diagrams"]
+        assert ocr_start < diagrams_end and diagrams_start < ocr_end
+
+    def test_per_request_path_skips_optional_steps_for_the_deadline(self, page, monkeypatch):
+        # Imported here: the endpoint module loads the EasyOCR model
+        from app.api.endpoints import ocr
+        from app.config import settings
+        from app.core.deadline import Deadline
+
+        calls = {}
+
+        def fake_process_image(image_path, output_file, regions, preprocess, threshold, denoise, scale_factor, spell):
+            calls["ocr"] = (denoise, scale_factor, spell)
+            return OCR_RESULT
+
+        def fake_connections(*args):
+            calls["connections"] = True
+            return []
+
+        monkeypatch.setattr(ocr, "process_image", fake_process_image)
+        monkeypatch.setattr(ocr, "detect_connections_json", fake_connections)
+        monkeypatch.setattr(settings, "enable_staged_pipeline", False)
+        monkeypatch.setattr(settings, "enable_layout_routing", False)
+        monkeypatch.setattr(settings, "enable_spell_correction", True)
+
+        result = asyncio.run(ocr.run_extraction(page, enable_groq=False, detector="opencv", deadline=Deadline(1)))
+
+        assert result["degradations"] == ["denoise", "upscale", "spell_correction", "connections"]
+        assert calls == {"ocr": (False, settings.deadline_ocr_scale_factor, False)}
+        assert result["content"][-1]["boxes"]
+
+    def test_ocr_error_is_raised_after_both_stages_finish(self):
+        diagrams_done = []
+
+        async def failing_ocr():
+            raise RuntimeError("OCR failed")
+
+        async def diagrams():
+            await asyncio.sleep(0.05)
+            diagrams_done.append(True)
+            return []
+
+        with pytest.raises(RuntimeError, match="OCR failed"):
+            asyncio.run(run_extraction_stages(failing_ocr, diagrams))
+        assert diagrams_done == [True]
+
+    def test_combined_document_layout(self):
+        combined = combine_extraction(OCR_RESULT, [{"x": 1, "y": 2, "w": 3, "h": 4}])
+
+        assert combined["lecture_id"] == "lec_042"
+        assert combined["content"][:2] == OCR_RESULT["content"]
+        assert combined["content"][-1]["type"] == "diagram"
+        assert combined["content"][-1]["boxes"] == [{"x": 1, "y": 2, "w": 3, "h": 4}]
+
+    def test_ocr_only_document_has_no_diagram_entry(self):
+        combined = combine_extraction(OCR_RESULT, None)
+        assert combined["content"] == OCR_RESULT["content"]
+
+
+class TestProcessingOptions:
+    """Test cases for per-request processing options"""
+
+    def test_defaults_run_the_full_analysis(self):
+        options = asyncio.run(get_processing_options(confidence_threshold=None))
+        assert options.mode == ProcessingMode.FULL_ANALYSIS
+        assert options.confidence_threshold is None
+        assert options.generate_flashcards and options.generate_knowledge_map and options.preprocess_image
+
+    def test_languages_without_a_loaded_model_are_rejected(self):
+        with pytest.raises(HTTPException) as unloaded:
+            asyncio.run(get_processing_options(language="spa", confidence_threshold=None))
+        with pytest.raises(HTTPException) as unknown:
+            asyncio.run(get_processing_options(language="xx", confidence_threshold=None))
+        assert unloaded.value.status_code == unknown.value.status_code == 400
+        assert "not loaded" in unloaded.value.detail
@@ -0,0 +1,119 @@
+import time
+
+from app.utils.graph_merge import merge_graphs, node_aliases, slugify
+
+
+def cost_graph(*extra_nodes):
+    return {
+        "nodes": [
+            {"id": "ac", "label": "Average Cost (AC)"},
+            {"id": "avc", "label": "Average Variable Cost (AVC)"},
+            {"id": "mc", "label": "Marginal Cost (MC)"},
+            *extra_nodes
+        ],
+        "edges": [{"from": "mc", "to": "ac"}, {"from": "mc", "to": "avc"}]
+    }
+
+
+def labels(graph):
+    return [node["label"] for node in graph["nodes"]]
+
+
+def edge_pairs(graph):
+    ids = [node["id"] for node in graph["nodes"]]
+    return {(ids[s], ids[t]) for s, t in zip(graph["edges"]["source"], graph["edges"]["target"])}
+
+
+class TestNodeAliases:
+    """Test cases for the keys nodes are merged on"""
+
+    def test_label_variants_and_abbreviation(self):
+        assert slugify("AVC_") == "avc"
+        assert node_aliases({"id": "avc", "label": "Average Variable Cost (AVC)"}) == {
+            "average_variable_cost_avc", "average_variable_cost", "avc"
+        }
+
+    def test_only_abbreviations_in_parentheses_are_aliases(self):
+        assert node_aliases({"id": "tlb", "label": "TLB (Translation Lookaside Buffer)"}) == {
+            "tlb_translation_lookaside_buffer", "tlb", "translation_lookaside_buffer"
+        }
+        assert node_aliases({"id": "paging", "label": "Paging (memory)"}) == {"paging_memory", "paging"}
+
+    def test_initials_id_is_an_alias_but_generic_id_is_not(self):
+        assert "avc" in node_aliases({"id": "AVC_", "label": "Average Variable Cost"})
+        assert "n1" not in node_aliases({"id": "n1", "label": "Supply"})
+        assert node_aliases({"id": "n1"}) == {"n1"}
+
+
+class TestMergeGraphs:
+    """Test cases for merging per-block graphs"""
+
+    def test_duplicate_nodes_across_blocks_are_merged(self):
+        merged = merge_graphs([cost_graph(), cost_graph({"id": "tc", "label": "Total Cost"})])
+
+        assert [node["id"] for node in merged["nodes"]] == ["ac", "avc", "mc", "tc"]
+        assert edge_pairs(merged) == {("mc", "ac"), ("mc", "avc")}
+        assert merged["stats"] == {"graphs": 2, "input_nodes": 7, "input_edges": 4, "nodes": 4, "edges": 2}
+
+    def test_synonyms_are_merged_transitively(self):
+        graphs = [
+            {"nodes": [{"id": "avc", "label": "AVC"}], "edges": []},
+            {"nodes": [{"id": "average_variable_cost", "label": "Average Variable Cost (AVC)"}], "edges": []},
+            {"nodes": [{"id": "x", "label": "Average variable cost"}, {"id": "y", "label": "Output"}],
+             "edges": [{"from": "y", "to": "x", "label": "drives"}]}
+        ]
+        merged = merge_graphs(graphs)
+
+        assert labels(merged) == ["Average Variable Cost (AVC)", "Output"]
+        assert merged["edges"] == {"source": [1], "target": [0], "label": ["drives"]}
+
+    def test_generic_ids_do_not_merge_unrelated_nodes(self):
+        graphs = [
+            {"nodes": [{"id": "n1", "label": "Supply"}], "edges": []},
+            {"nodes": [{"id": "n1", "label": "Demand"}, {"id": "n2", "label": "Price"}],
+             "edges": [{"from": "n1", "to": "n2"}]}
+        ]
+        merged = merge_graphs(graphs)
+
+        assert [node["id"] for node in merged["nodes"]] == ["n1", "n1_2", "n2"]
+        assert edge_pairs(merged) == {("n1_2", "n2")}
+
+    def test_shared_qualifier_does_not_merge_nodes(self):
+        graphs = [
+            {"nodes": [{"id": "paging", "label": "Paging (memory)"}, {"id": "frames", "label": "Frames"}],
+             "edges": [{"from": "paging", "to": "frames"}]},
+            {"nodes": [{"id": "segmentation", "label": "Segmentation (memory)"}, {"id": "segments", "label": "Segments"}],
+             "edges": [{"from": "segmentation", "to": "segments"}]},
+            {"nodes": [{"id": "tlb", "label": "Translation Lookaside Buffer (TLB)"}, {"id": "x", "label": "TLB"}],
+             "edges": [{"from": "paging", "to": "tlb"}]}
+        ]
+        merged = merge_graphs(graphs)
+
+        assert labels(merged) == [
+            "Paging (memory)", "Frames", "Segmentation (memory)", "Segments", "Translation Lookaside Buffer (TLB)"
+        ]
+        assert edge_pairs(merged) == {("paging", "frames"), ("segmentation", "segments"), ("paging", "tlb")}
+
+    def test_malformed_input_is_skipped(self):
+        graphs = [
+            None,
+            "not a graph",
+            {"nodes": ["bad", {"id": "ac", "label": "Average Cost"}, {"label": ""}],
+             "edges": [{"from": "ac", "to": "missing"}, {"from": "ac", "to": "ac"}, "bad"]}
+        ]
+        merged = merge_graphs(graphs)
+
+        assert labels(merged) == ["Average Cost"]
+        assert merged["edges"] == {"source": [], "target": []}
+
+    def test_large_lecture_merges_in_linear_time(self):
+        graphs = [
+            cost_graph(*({"id": f"c{i}_{j}", "label": f"Concept {i % 50} {j}"} for j in range(20)))
+            for i in range(1000)
+        ]
+
+        started = time.perf_counter()
+        merged = merge_graphs(graphs)
+        assert time.perf_counter() - started < 2.0
+        assert merged["stats"]["input_nodes"] == 23000
+        assert merged["stats"]["nodes"] == 3 + 50 * 20
@@ -0,0 +1,610 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import httpx
+from groq import RateLimitError
+
+from app.services.groq_service import GroqService
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_scheduler import LLMScheduler
+
+
+ENHANCED = {
+    "flashcards": [{"question": "What is a process?", "answer": "A program in execution", "category": "definition"}],
+    "summary": "Processes and scheduling.",
+    "key_concepts": ["process"],
+    "study_questions": ["Why schedule?"],
+    "knowledge_map": {"nodes": [], "edges": []},
+    "difficulty_level": "beginner",
+    "estimated_study_time": "10 minutes"
+}
+
+OCR_DATA = {
+    "lecture_id": "lec_001",
+    "course": "Operating Systems",
+    "topic": "Process Management",
+    "date": "2024-01-01",
+    "content": [{"type": "text", "text": "A process is a program in execution", "confidence": 0.9}]
+}
+
+
+def raw_response(parsed):
+    """Stand-in for ``AsyncAPIResponse``, whose ``parse()`` is a coroutine"""
+    async def parse():
+        return parsed
+    return SimpleNamespace(headers={}, parse=parse)
+
+
+class FakeCompletions:
+    """Async stand-in for ``client.chat.completions`` with a fixed latency"""
+
+    def __init__(self, latency: float = 0.2, body: dict = None):
+        self.latency = latency
+        self.body = body or ENHANCED
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.with_raw_response = self
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        message = SimpleNamespace(content=json.dumps(self.respond(kwargs)))
+        completion = SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return raw_response(completion)
+
+    def respond(self, kwargs):
+        return self.body
+
+
+def make_service(completions: FakeCompletions) -> GroqService:
+    service = GroqService()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    service.cache = LLMResponseCache(None, ttl_seconds=60, max_memory_entries=16, max_disk_entries=16)
+    for tier in service.router.tiers:
+        tier.scheduler = LLMScheduler(requests_per_minute=6000, tokens_per_minute=10 ** 7, max_concurrency=8)
+    return service
+
+
+class TestGroqServiceConcurrency:
+    """Test cases for non-blocking Groq calls"""
+
+    def test_enhancement_does_not_block_event_loop(self):
+        service = make_service(FakeCompletions(latency=0.3))
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            tick_task = asyncio.create_task(ticker())
+            result = await service.enhance_ocr_content(OCR_DATA)
+            tick_task.cancel()
+            return result, ticks
+
+        result, ticks = asyncio.run(scenario())
+        assert result["groq_enhanced"] is True
+        assert result["flashcards"] == ENHANCED["flashcards"]
+        # The loop kept running other work while the completion was pending
+        assert ticks > 10
+
+    def test_concurrency_is_bounded(self):
+        completions = FakeCompletions(latency=0.05)
+        service = make_service(completions)
+        for tier in service.router.tiers:
+            tier.scheduler.max_concurrency = 1
+
+        async def scenario():
+            documents = [
+                dict(OCR_DATA, content=[{"type": "text", "text": f"Page {i} notes", "confidence": 0.9}])
+                for i in range(6)
+            ]
+            return await asyncio.gather(*(service.enhance_ocr_content(doc) for doc in documents))
+
+        results = asyncio.run(scenario())
+        assert all(result["groq_enhanced"] for result in results)
+        assert completions.calls == 6
+        assert completions.max_in_flight == 2
+
+    def test_timeout_falls_back_to_mock_content(self, monkeypatch):
+        monkeypatch.setattr("app.services.groq_service.settings.groq_timeout_seconds", 0.05)
+        service = make_service(FakeCompletions(latency=1.0))
+
+        result = asyncio.run(service.enhance_ocr_content(OCR_DATA))
+        assert result["groq_enhanced"] is False
+        assert service.fallbacks["error"] == 1
+
+
+class PromptRecorder(FakeCompletions):
+    def respond(self, kwargs):
+        self.prompt = kwargs["messages"][-1]["content"]
+        return self.body
+
+
+class TestGroqServiceCompaction:
+    """Test cases for prompt compaction before enhancement"""
+
+    def test_prompt_is_compacted_and_savings_reported(self):
+        completions = PromptRecorder(latency=0.01)
+        service = make_service(completions)
+        line = {"type": "text", "text": "A process is a program in execution", "confidence": 0.9}
+        content = []
+        for page in (1, 2, 3):
+            content += [dict(line), {"type": "text", "text": f"Operating Systems - Page {page}", "confidence": 0.9}]
+        notes = dict(OCR_DATA, content=content)
+
+        result = asyncio.run(service.enhance_ocr_content(notes))
+
+        assert completions.prompt.count("A process is a program in execution") == 1
+        assert completions.prompt.count("Operating Systems - Page") == 1
+        assert result["prompt_compaction"]["tokens_saved"] > 0
+        assert result["content"] == notes["content"]
+
+
+class TestGroqServiceCache:
+    """Test cases for cached enhancements"""
+
+    def test_repeated_enhancement_is_served_from_cache(self):
+        completions = FakeCompletions(latency=0.01)
+        service = make_service(completions)
+
+        first = asyncio.run(service.enhance_ocr_content(OCR_DATA))
+        # Same notes with different whitespace and lecture metadata
+        repeat = dict(OCR_DATA, lecture_id="lec_002", content=[
+            {"type": "text", "text": "A  process is a program\nin execution", "confidence": 0.8}
+        ])
+        second = asyncio.run(service.enhance_ocr_content(repeat))
+
+        assert completions.calls == 1
+        assert first["groq_cached"] is False
+        assert second["groq_cached"] is True
+        assert second["lecture_id"] == "lec_002"
+        assert second["flashcards"] == first["flashcards"]
+
+    def test_different_topic_is_not_shared(self):
+        completions = FakeCompletions(latency=0.01)
+        service = make_service(completions)
+
+        asyncio.run(service.enhance_ocr_content(OCR_DATA))
+        asyncio.run(service.enhance_ocr_content(dict(OCR_DATA, topic="Scheduling")))
+        assert completions.calls == 2
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        completions = FakeCompletions(latency=0.05)
+        service = make_service(completions)
+
+        async def scenario():
+            documents = [dict(OCR_DATA, lecture_id=f"student_{i}") for i in range(30)]
+            return await asyncio.gather(*(service.enhance_ocr_content(doc) for doc in documents))
+
+        results = asyncio.run(scenario())
+        assert completions.calls == 1
+        assert [r["lecture_id"] for r in results] == [f"student_{i}" for i in range(30)]
+        assert all(r["flashcards"] == ENHANCED["flashcards"] for r in results)
+
+
+class TestGroqServiceArtifacts:
+    """Test cases for enhancements limited to the requested study materials"""
+
+    def test_unrequested_artifacts_are_neither_asked_for_nor_returned(self):
+        completions = PromptRecorder(latency=0.01)
+        service = make_service(completions)
+
+        result = asyncio.run(service.enhance_ocr_content(
+            OCR_DATA, artifacts={"flashcards", "summary", "key_concepts", "study_questions"}
+        ))
+
+        assert "knowledge_map" not in completions.prompt
+        assert '"flashcards"' in completions.prompt
+        assert "knowledge_map" not in result
+        assert result["flashcards"] == ENHANCED["flashcards"]
+
+    def test_results_are_cached_per_artifact_set(self):
+        completions = FakeCompletions(latency=0.01)
+        service = make_service(completions)
+
+        asyncio.run(service.enhance_ocr_content(OCR_DATA))
+        partial = asyncio.run(service.enhance_ocr_content(OCR_DATA, artifacts={"summary"}))
+        again = asyncio.run(service.enhance_ocr_content(OCR_DATA, artifacts={"summary"}))
+
+        assert completions.calls == 2
+        assert (partial["groq_cached"], again["groq_cached"]) == (False, True)
+        assert "flashcards" not in again and "summary" in again
+
+    def test_fallback_keeps_only_requested_artifacts(self):
+        service = make_service(FakeCompletions())
+        service.client = None
+
+        result = asyncio.run(service.enhance_ocr_content(OCR_DATA, artifacts={"flashcards", "summary"}))
+        assert result["groq_enhanced"] is False
+        assert "flashcards" in result and "knowledge_map" not in result and "key_concepts" not in result
+
+
+class FlashcardCompletions(FakeCompletions):
+    """Answers with more cards than requested and records the request"""
+
+    def respond(self, kwargs):
+        self.request = kwargs
+        cards = [{"question": f"Q{i}?", "answer": f"A{i}", "category": "concept"} for i in range(10)]
+        return {"flashcards": cards + [{"question": "No answer"}]}
+
+
+class TestGroqServiceFlashcards:
+    """Test cases for flashcard-only generation"""
+
+    def test_minimal_prompt_sized_to_cards(self, monkeypatch):
+        monkeypatch.setattr("app.services.groq_service.settings.groq_flashcard_tokens", 50)
+        completions = FlashcardCompletions(latency=0.01)
+        service = make_service(completions)
+        service.router.fast.model = "small-model"
+
+        result = asyncio.run(service.generate_flashcards("A process is a program in execution", num_cards=3))
+
+        assert [card["question"] for card in result["flashcards"]] == ["Q0?", "Q1?", "Q2?"]
+        assert result["groq_enhanced"] is True
+        assert result["model"] == "small-model"
+        assert completions.request["model"] == "small-model"
+        assert completions.request["max_tokens"] < 50 * 4
+        prompt = completions.request["messages"][-1]["content"]
+        assert "knowledge_map" not in prompt and "summary" not in prompt
+
+    def test_results_are_cached_per_card_count(self):
+        completions = FlashcardCompletions(latency=0.01)
+        service = make_service(completions)
+
+        asyncio.run(service.generate_flashcards("A process is a program in execution", num_cards=3))
+        again = asyncio.run(service.generate_flashcards("A process is a program in execution", num_cards=3))
+        asyncio.run(service.generate_flashcards("A process is a program in execution", num_cards=4))
+
+        assert again["groq_cached"] is True
+        assert completions.calls == 2
+
+    def test_unavailable_service_falls_back(self):
+        service = make_service(FlashcardCompletions())
+        service.client = None
+
+        result = asyncio.run(service.generate_flashcards("Some notes", num_cards=1))
+        assert result["groq_enhanced"] is False
+        assert len(result["flashcards"]) == 1
+
+
+class BatchCompletions(FakeCompletions):
+    """Answers batched prompts per document id and single prompts with ``ENHANCED``"""
+
+    def __init__(self, skip: tuple = (), malformed: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.skip = skip
+        self.malformed = malformed
+        self.batch_sizes = []
+
+    def respond(self, kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        ids = re.findall(r"=== DOCUMENT (\w+) ===", prompt)
+        if not ids:
+            self.batch_sizes.append(1)
+            return self.body
+        self.batch_sizes.append(len(ids))
+        if self.malformed:
+            return {"documents": "none"}
+        return {"documents": [
+            dict(ENHANCED, id=document_id, summary=f"Summary of {document_id}")
+            for document_id in ids if document_id not in self.skip
+        ]}
+
+
+def notes(count: int, words: int = 8):
+    return [
+        dict(OCR_DATA, lecture_id=f"student_{i}", content=[
+            {"type": "text", "text": f"Student {i} notes: " + " ".join(f"term{i}_{w}" for w in range(words)), "confidence": 0.9}
+        ])
+        for i in range(count)
+    ]
+
+
+class TestGroqServiceBatching:
+    """Test cases for packing short documents into shared completions"""
+
+    def test_short_documents_share_one_completion(self):
+        completions = BatchCompletions(latency=0.01)
+        service = make_service(completions)
+        documents = notes(5)
+
+        results = asyncio.run(service.enhance_batch(documents))
+
+        assert completions.batch_sizes == [5]
+        assert [r["lecture_id"] for r in results] == [f"student_{i}" for i in range(5)]
+        assert [r["summary"] for r in results] == [f"Summary of doc{i + 1}" for i in range(5)]
+        assert all(r["groq_enhanced"] and not r["groq_cached"] for r in results)
+        assert service.batch_totals == {"batches": 1, "documents": 5, "individual_fallbacks": 0}
+
+        # Batch results are cached for batches only: a single enhancement asks for more
+        again = asyncio.run(service.enhance_batch(documents))
+        assert all(r["groq_cached"] for r in again)
+        assert [r["summary"] for r in again] == [r["summary"] for r in results]
+        assert completions.calls == 1
+
+        single = asyncio.run(service.enhance_ocr_content(documents[2]))
+        assert single["groq_cached"] is False
+        assert single["summary"] == ENHANCED["summary"]
+        assert completions.calls == 2
+
+    def test_identical_documents_are_sent_once(self):
+        completions = BatchCompletions(latency=0.01)
+        service = make_service(completions)
+        documents = notes(2) + [dict(notes(1)[0], lecture_id="copy")]
+
+        results = asyncio.run(service.enhance_batch(documents))
+
+        assert completions.batch_sizes == [2]
+        assert results[2]["lecture_id"] == "copy"
+        assert results[2]["groq_cached"] is True
+        assert results[2]["summary"] == results[0]["summary"]
+
+    def test_batches_respect_document_and_size_limits(self, monkeypatch):
+        monkeypatch.setattr("app.services.groq_service.settings.groq_batch_max_documents", 3)
+        completions = BatchCompletions(latency=0.01)
+        service = make_service(completions)
+        documents = notes(7) + notes(1, words=600)
+
+        results = asyncio.run(service.enhance_batch(documents))
+
+        # Seven short documents in batches of 3, 3 and 1; the long one alone
+        assert sorted(completions.batch_sizes) == [1, 1, 3, 3]
+        assert all(r["groq_enhanced"] for r in results)
+
+    def test_documents_missing_from_response_are_enhanced_individually(self):
+        completions = BatchCompletions(skip=("doc2",), latency=0.01)
+        service = make_service(completions)
+
+        results = asyncio.run(service.enhance_batch(notes(3)))
+
+        assert completions.batch_sizes == [3, 1]
+        assert results[1]["summary"] == ENHANCED["summary"]
+        assert results[2]["summary"] == "Summary of doc3"
+        assert service.batch_totals["individual_fallbacks"] == 1
+
+    def test_unparsable_batch_falls_back_to_individual_calls(self):
+        completions = BatchCompletions(malformed=True, latency=0.01)
+        service = make_service(completions)
+
+        results = asyncio.run(service.enhance_batch(notes(3)))
+
+        assert sorted(completions.batch_sizes) == [1, 1, 1, 3]
+        assert all(r["summary"] == ENHANCED["summary"] for r in results)
+
+    def test_unavailable_service_falls_back(self):
+        service = make_service(BatchCompletions())
+        service.client = None
+
+        results = asyncio.run(service.enhance_batch(notes(2)))
+        assert [r["groq_enhanced"] for r in results] == [False, False]
+
+
+class OverloadedModel(FakeCompletions):
+    """Rejects every call to one model with a 429"""
+
+    def __init__(self, model: str, **kwargs):
+        super().__init__(**kwargs)
+        self.overloaded_model = model
+        self.models = []
+
+    async def create(self, **kwargs):
+        self.models.append(kwargs["model"])
+        if kwargs["model"] == self.overloaded_model:
+            request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+            response = httpx.Response(429, headers={"retry-after": "0"}, request=request)
+            raise RateLimitError("rate limited", response=response, body=None)
+        return await super().create(**kwargs)
+
+
+class TestGroqServiceRouting:
+    """Test cases for model tier selection"""
+
+    def test_short_notes_use_the_fast_model(self):
+        completions = PromptRecorder(latency=0.01)
+        service = make_service(completions)
+
+        asyncio.run(service.enhance_ocr_content(OCR_DATA))
+        assert service.router.fast.latency.calls == 1
+        assert service.router.quality.latency.calls == 0
+
+    def test_multi_topic_lectures_use_the_large_model(self):
+        service = make_service(PromptRecorder(latency=0.01))
+        content = [
+            {"type": "heading", "text": "Processes"},
+            {"type": "text", "text": "A process is a program in execution", "confidence": 0.9},
+            {"type": "heading", "text": "Threads"},
+            {"type": "text", "text": "Threads share the address space of their process", "confidence": 0.9}
+        ]
+
+        asyncio.run(service.enhance_ocr_content(dict(OCR_DATA, content=content)))
+        assert service.router.quality.latency.calls == 1
+        assert service.router.decisions["quality:large_input"] == 1
+
+    def test_overloaded_tier_spills_over(self):
+        service = make_service(FakeCompletions())
+        completions = OverloadedModel(service.router.fast.model, latency=0.01)
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        for tier in service.router.tiers:
+            tier.scheduler.max_retries = 0
+
+        result = asyncio.run(service.enhance_ocr_content(OCR_DATA))
+
+        assert result["groq_enhanced"] is True
+        assert completions.models == [service.router.fast.model, service.router.quality.model]
+        assert service.router.spillovers["fast->quality"] == 1
+        assert service.router.fast.latency.errors == 1
+
+
+class MapReduceCompletions(FakeCompletions):
+    """Answers map prompts with per-part artifacts and the reduce prompt with a summary"""
+
+    def respond(self, kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "summaries of consecutive sections" in prompt:
+            return {"summary": "Whole lecture.", "study_questions": ["Compare parts?"],
+                    "difficulty_level": "advanced", "estimated_study_time": "40 minutes"}
+        part = prompt.split("part ")[1].split(" of")[0]
+        return {
+            "flashcards": [
+                {"question": f"Question {part}?", "answer": "A", "category": "concept"},
+                {"question": "What is a process?", "answer": "A program in execution", "category": "definition"}
+            ],
+            "section_summary": f"Part {part}.",
+            "key_concepts": ["Process", f"Concept {part}"],
+            "study_questions": ["Shared question?"],
+            "knowledge_map": {
+                "nodes": [{"id": "p", "label": "Process"}, {"id": "c", "label": f"Concept {part}"}],
+                "edges": [{"from": "p", "to": "c", "label": "includes"}]
+            }
+        }
+
+
+class TestGroqServiceMapReduce:
+    """Test cases for map-reduce enhancement of long lectures"""
+
+    def long_lecture(self, sections: int = 4):
+        content = []
+        for i in range(sections):
+            content.append({"type": "heading", "text": f"SECTION {i}: PART {'ABCDEFGH'[i]}"})
+            text = " ".join(f"term{i}x{j}" for j in range(500))
+            content.append({"type": "text", "text": text, "confidence": 0.9})
+        return dict(OCR_DATA, content=content)
+
+    def test_long_input_is_chunked_and_merged(self, monkeypatch):
+        monkeypatch.setattr("app.services.groq_service.settings.groq_map_reduce_threshold_tokens", 1000)
+        monkeypatch.setattr("app.services.groq_service.settings.groq_chunk_tokens", 1600)
+        monkeypatch.setattr("app.services.groq_service.settings.groq_map_concurrency", 3)
+        completions = MapReduceCompletions(latency=0.02)
+        service = make_service(completions)
+
+        result = asyncio.run(service.enhance_ocr_content(self.long_lecture(4)))
+
+        # Four map calls (one per section) and one reduce call
+        assert completions.calls == 5
+        assert 1 < completions.max_in_flight <= 3
+        assert result["summary"] == "Whole lecture."
+        assert result["difficulty_level"] == "advanced"
+
+        questions = [card["question"] for card in result["flashcards"]]
+        assert questions.count("What is a process?") == 1
+        assert len(questions) == 5
+
+        labels = [node["label"] for node in result["knowledge_map"]["nodes"]]
+        assert labels.count("Process") == 1
+        assert len(result["knowledge_map"]["edges"]) == 4
+        assert result["study_questions"][:2] == ["Compare parts?", "Shared question?"]
+
+    def test_short_input_uses_single_call(self):
+        completions = FakeCompletions(latency=0.01)
+        service = make_service(completions)
+        asyncio.run(service.enhance_ocr_content(OCR_DATA))
+        assert completions.calls == 1
+
+
+class StreamingCompletions(FakeCompletions):
+    """Streams ENHANCED as small deltas with a delay between them"""
+
+    def __init__(self, delta_delay: float = 0.005, text: str = None, fail_at: int = None):
+        super().__init__(latency=0.0)
+        self.delta_delay = delta_delay
+        self.text = text or json.dumps(ENHANCED)
+        self.fail_at = fail_at
+
+    async def create(self, **kwargs):
+        assert kwargs["stream"] is True
+        self.calls += 1
+        text = self.text
+
+        async def chunks():
+            for i in range(0, len(text), 8):
+                await asyncio.sleep(self.delta_delay)
+                if self.fail_at is not None and i >= self.fail_at:
+                    raise RuntimeError("connection reset")
+                delta = SimpleNamespace(content=text[i:i + 8])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+        return raw_response(chunks())
+
+
+class TestGroqServiceStreaming:
+    """Test cases for streamed enhancements"""
+
+    def collect(self, service):
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            events = []
+            async for event in service.stream_enhancement(OCR_DATA):
+                events.append((loop.time() - start, event))
+            return events
+
+        return asyncio.run(scenario())
+
+    def test_flashcards_arrive_before_completion(self):
+        completions = StreamingCompletions()
+        service = make_service(completions)
+
+        events = self.collect(service)
+
+        kinds = [event["event"] for _, event in events]
+        assert kinds == ["flashcard"] * len(ENHANCED["flashcards"]) + ["complete"]
+        first_card_at, complete_at = events[0][0], events[-1][0]
+        assert first_card_at < complete_at / 2
+        assert events[0][1]["data"] == ENHANCED["flashcards"][0]
+
+        result = events[-1][1]["data"]
+        assert result["groq_enhanced"] is True
+        assert result["summary"] == ENHANCED["summary"]
+
+    def test_streamed_result_is_cached(self):
+        completions = StreamingCompletions()
+        service = make_service(completions)
+
+        self.collect(service)
+        events = self.collect(service)
+
+        assert completions.calls == 1
+        assert events[-1][1]["data"]["groq_cached"] is True
+        assert events[0][1]["event"] == "flashcard"
+
+    def test_truncated_stream_is_repaired(self):
+        text = json.dumps(ENHANCED)
+        service = make_service(StreamingCompletions(text=text[:text.index("study_questions") + 3]))
+
+        events = self.collect(service)
+
+        result = events[-1][1]["data"]
+        assert result["groq_enhanced"] is True
+        assert result["flashcards"] == ENHANCED["flashcards"]
+        assert result["key_concepts"] == ENHANCED["key_concepts"]
+
+    def test_failure_after_flashcards_ends_with_an_error(self):
+        text = json.dumps(ENHANCED)
+        service = make_service(StreamingCompletions(fail_at=text.index("}]") + 8))
+
+        events = [event for _, event in self.collect(service)]
+
+        emitted = [event["data"] for event in events if event["event"] == "flashcard"]
+        assert emitted and emitted == ENHANCED["flashcards"][:len(emitted)]
+        assert events[-1] == {"event": "error", "data": {"error": "connection reset", "flashcards_emitted": len(emitted)}}
+        assert service.fallbacks["error"] == 0
+
+    def test_unavailable_service_streams_fallback(self):
+        service = make_service(StreamingCompletions())
+        service.client = None
+
+        events = self.collect(service)
+        assert events[-1][1]["data"]["groq_enhanced"] is False
+        assert service.fallbacks["unavailable"] == 1
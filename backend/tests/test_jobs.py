@@ -0,0 +1,210 @@
+import asyncio
+
+import pytest
+
+from app.services.job_runner import JobRunner
+from app.services.job_store import JobStore, sqlite_path_from_url
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestJobStore:
+    """Test cases for persisted jobs"""
+
+    def test_database_url(self):
+        assert sqlite_path_from_url("sqlite:///./edubridge.db") == "./edubridge.db"
+        assert sqlite_path_from_url("sqlite:////var/data/jobs.db") == "/var/data/jobs.db"
+        assert sqlite_path_from_url("sqlite://") == ":memory:"
+        with pytest.raises(ValueError):
+            sqlite_path_from_url("postgresql://localhost/edubridge")
+
+    def test_lifecycle(self):
+        clock = FakeClock()
+        store = JobStore(clock=clock)
+        first = store.create("extract", {"enable_groq": True}, "uploads/jobs/a.png")
+        clock.now += 1
+        second = store.create("extract", {"enable_groq": False})
+
+        claimed = store.claim_next()
+        assert claimed["id"] == first["id"]
+        assert claimed["status"] == "running" and claimed["attempts"] == 1
+
+        store.set_stage(first["id"], "ocr")
+        store.succeed(first["id"], {"content": []})
+        job = store.get(first["id"])
+        assert (job["status"], job["stage"], job["result"]) == ("succeeded", "ocr", {"content": []})
+        assert job["params"] == {"enable_groq": True}
+
+        assert store.claim_next()["id"] == second["id"]
+        assert store.claim_next() is None
+        assert store.counts() == {"succeeded": 1, "running": 1}
+
+    def test_cancel_and_retry(self):
+        store = JobStore()
+        queued = store.create("extract", {})
+        assert store.request_cancel(queued["id"])["status"] == "cancelled"
+        assert store.claim_next() is None
+
+        assert store.retry(queued["id"])["status"] == "queued"
+        running = store.claim_next()
+        assert store.request_cancel(running["id"])["cancel_requested"] is True
+        assert store.heartbeat([running["id"]]) == [running["id"]]
+
+        store.fail(running["id"], "boom")
+        retried = store.retry(running["id"])
+        assert (retried["status"], retried["error"], retried["cancel_requested"]) == ("queued", None, False)
+        assert store.claim_next()["attempts"] == 2
+
+    def test_jobs_survive_restart(self, tmp_path):
+        path = str(tmp_path / "jobs" / "edubridge.db")
+        job = JobStore(path).create("extract", {"detector": "opencv"})
+
+        reopened = JobStore(path)
+        assert reopened.get(job["id"])["params"] == {"detector": "opencv"}
+        assert reopened.claim_next()["id"] == job["id"]
+
+    def test_reopen_after_close(self, tmp_path):
+        store = JobStore(str(tmp_path / "edubridge.db"))
+        job = store.create("extract", {})
+        store.close()
+
+        store.reopen()
+        assert store.get(job["id"])["status"] == "queued"
+
+    def test_stale_running_jobs_are_recovered(self):
+        clock = FakeClock()
+        store = JobStore(clock=clock)
+        alive, dead, cancelled = (store.create("extract", {}) for _ in range(3))
+        for _ in range(3):
+            store.claim_next()
+        store.request_cancel(cancelled["id"])
+
+        clock.now += 100
+        store.heartbeat([alive["id"]])
+        assert store.recover(stale_seconds=60) == 1
+        assert [store.get(job["id"])["status"] for job in (alive, dead, cancelled)] == ["running", "queued", "cancelled"]
+
+    def test_purge_removes_old_finished_jobs(self):
+        clock = FakeClock()
+        store = JobStore(clock=clock)
+        old = store.create("extract", {}, "uploads/jobs/old.png")
+        store.claim_next()
+        store.succeed(old["id"], {})
+        pending = store.create("extract", {})
+
+        clock.now += 3600
+        purged = store.purge(older_than_seconds=60)
+        assert [job["input_path"] for job in purged] == ["uploads/jobs/old.png"]
+        assert store.get(old["id"]) is None
+        assert store.get(pending["id"]) is not None
+
+
+def make_runner(**overrides) -> JobRunner:
+    options = dict(workers=2, poll_interval=0.05, heartbeat_interval=0.05)
+    options.update(overrides)
+    return JobRunner(JobStore(), **options)
+
+
+async def wait_until_finished(runner: JobRunner, job_id: str, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while runner.store.get(job_id)["status"] not in ("succeeded", "failed", "cancelled"):
+        assert asyncio.get_running_loop().time() < deadline
+        await runner.wait_for_update(job_id, 0.05)
+    return runner.store.get(job_id)
+
+
+class TestJobRunner:
+    """Test cases for running jobs in the background"""
+
+    def test_job_runs_with_progress(self):
+        runner = make_runner()
+        stages = []
+
+        async def handler(job, progress):
+            for stage in ("layout", "ocr", "enhancing"):
+                progress(stage)
+                stages.append(runner.store.get(job["id"])["stage"])
+                await asyncio.sleep(0.01)
+            return {"pages": job["params"]["pages"]}
+
+        runner.register("extract", handler)
+
+        async def scenario():
+            await runner.start()
+            job = runner.submit("extract", {"pages": 3})
+            finished = await wait_until_finished(runner, job["id"])
+            await runner.stop()
+            return finished
+
+        finished = asyncio.run(scenario())
+        assert stages == ["layout", "ocr", "enhancing"]
+        assert (finished["status"], finished["result"]) == ("succeeded", {"pages": 3})
+
+    def test_failure_is_recorded(self):
+        runner = make_runner()
+
+        async def handler(job, progress):
+            raise RuntimeError("OCR failed")
+
+        runner.register("extract", handler)
+
+        async def scenario():
+            await runner.start()
+            job = runner.submit("extract", {})
+            finished = await wait_until_finished(runner, job["id"])
+            await runner.stop()
+            return finished
+
+        finished = asyncio.run(scenario())
+        assert (finished["status"], finished["error"]) == ("failed", "OCR failed")
+
+    def test_running_job_can_be_cancelled(self):
+        runner = make_runner()
+
+        async def handler(job, progress):
+            progress("ocr")
+            await asyncio.sleep(10)
+            return {}
+
+        runner.register("extract", handler)
+
+        async def scenario():
+            await runner.start()
+            job = runner.submit("extract", {})
+            while runner.store.get(job["id"])["stage"] != "ocr":
+                await asyncio.sleep(0.01)
+            runner.cancel(job["id"])
+            finished = await wait_until_finished(runner, job["id"])
+            await runner.stop()
+            return finished
+
+        assert asyncio.run(scenario())["status"] == "cancelled"
+
+    def test_stop_requeues_running_jobs(self):
+        runner = make_runner()
+
+        async def handler(job, progress):
+            await asyncio.sleep(10)
+            return {}
+
+        runner.register("extract", handler)
+
+        async def scenario():
+            await runner.start()
+            job = runner.submit("extract", {})
+            while runner.store.get(job["id"])["status"] != "running":
+                await asyncio.sleep(0.01)
+            await runner.stop()
+            return runner.store.get(job["id"])
+
+        assert asyncio.run(scenario())["status"] == "queued"
+
+    def test_unknown_kind_is_rejected(self):
+        with pytest.raises(KeyError):
+            make_runner().submit("transcode", {})
@@ -0,0 +1,83 @@
+import json
+import time
+
+from app.utils.json_extract import extract_json, remove_trailing_commas
+
+
+CONTENT = {
+    "flashcards": [
+        {"question": "What is {a} process?", "answer": "A program \"in\" execution [running]"},
+        {"question": "What is a PCB?", "answer": "Process control block"}
+    ],
+    "summary": "Processes and schedulers"
+}
+
+
+class TestExtractJSON:
+    """Test cases for extracting JSON from model output"""
+
+    def test_plain_json(self):
+        assert extract_json(json.dumps(CONTENT)) == CONTENT
+
+    def test_prose_and_code_fences_are_skipped(self):
+        text = "Sure! Use {braces} sparingly.\n```json\n" + json.dumps(CONTENT) + "\n```\nHope this {helps}."
+        assert extract_json(text, expect=dict) == CONTENT
+
+    def test_first_of_two_objects(self):
+        text = json.dumps(CONTENT) + "\nand another: " + json.dumps({"extra": True})
+        assert extract_json(text, expect=dict) == CONTENT
+
+    def test_markers_are_preferred(self):
+        text = 'Input was {"x": 1}. <<<JSON\n' + json.dumps(CONTENT) + "\nJSON>>> done"
+        assert extract_json(text, expect=dict) == CONTENT
+
+    def test_expected_type(self):
+        text = 'Cards [1, 2] follow: {"a": [3]}'
+        assert extract_json(text, expect=dict) == {"a": [3]}
+        assert extract_json(text, expect=list) == [1, 2]
+        assert extract_json("[1, 2]", expect=dict) is None
+
+    def test_no_json(self):
+        assert extract_json("") is None
+        assert extract_json(None) is None
+        assert extract_json("no json {here} at all", expect=dict) is None
+
+    def test_trailing_commas_are_repaired(self):
+        text = 'Result: {"flashcards": [{"question": "a, ]"},], "summary": "s",}'
+        assert extract_json(text, expect=dict) == {"flashcards": [{"question": "a, ]"}], "summary": "s"}
+
+    def test_truncated_output_is_closed(self):
+        document = json.dumps(CONTENT)
+        cut = document.index("What is a PCB") + 5
+        assert extract_json(document[:cut], expect=dict) == {"flashcards": [CONTENT["flashcards"][0]]}
+
+    def test_truncated_after_complete_element(self):
+        assert extract_json('{"flashcards": [{"q": 1}, {"q": 2},', expect=dict) == {"flashcards": [{"q": 1}, {"q": 2}]}
+        assert extract_json('{"summary": "cut off mid str', expect=dict) == {"summary": "cut off mid str"}
+        assert extract_json('{"summary":', expect=dict) == {"summary": None}
+
+    def test_escaped_quotes_do_not_end_strings(self):
+        text = 'x {"a": "\\"}{\\\\", "b": [1]} y'
+        assert extract_json(text, expect=dict) == {"a": '"}{\\', "b": [1]}
+
+    def test_adversarial_100kb_outputs_are_linear(self):
+        size = 100 * 1024
+        cards = json.dumps({"flashcards": [CONTENT["flashcards"][0]] * (size // 100)})
+        outputs = [
+            "{" * size,
+            "[" * (size // 2) + "]" * (size // 2),
+            "Using {braces} in text [like this], " * (size // 36) + cards,
+            cards[:size // 2],
+        ]
+        for text in outputs:
+            started = time.perf_counter()
+            extract_json(text, expect=dict)
+            # The greedy regex this replaced takes seconds on the first input
+            assert time.perf_counter() - started < 1.0
+
+
+class TestRemoveTrailingCommas:
+    """Test cases for the trailing comma repair"""
+
+    def test_commas_inside_strings_are_kept(self):
+        assert remove_trailing_commas('{"a": ",]", "b": [1, 2 , ] ,}') == '{"a": ",]", "b": [1, 2  ] }'
@@ -0,0 +1,45 @@
+import json
+
+from app.utils.json_stream import JSONArrayStreamParser
+
+
+DOCUMENT = json.dumps({
+    "summary": "Braces {in} strings and \"quotes\" are not structure",
+    "flashcards": [
+        {"question": "What is [a] process?", "answer": "A program in execution", "category": "definition"},
+        {"question": "Nested?", "answer": "Yes", "tags": {"levels": [1, 2]}}
+    ],
+    "knowledge_map": {"nodes": [{"id": "process"}], "edges": []}
+})
+
+
+class TestJSONArrayStreamParser:
+    """Test cases for incremental flashcard parsing"""
+
+    def test_elements_are_emitted_when_they_close(self):
+        parser = JSONArrayStreamParser("flashcards")
+        emitted_at = []
+        for i in range(0, len(DOCUMENT), 5):
+            for card in parser.feed(DOCUMENT[i:i + 5]):
+                emitted_at.append((i + 5, card))
+
+        cards = [card for _, card in emitted_at]
+        assert cards == json.loads(DOCUMENT)["flashcards"]
+        # The first card is available long before the document is complete
+        assert emitted_at[0][0] < DOCUMENT.index("Nested")
+        assert json.loads(parser.document()) == json.loads(DOCUMENT)
+
+    def test_other_arrays_are_ignored(self):
+        parser = JSONArrayStreamParser("flashcards")
+        assert parser.feed('{"nodes": [{"id": 1}], "flashcards": []}') == []
+
+    def test_text_around_the_object_is_skipped(self):
+        parser = JSONArrayStreamParser("flashcards")
+        cards = parser.feed('Here you go "quoted": ```json\n{"flashcards": [{"question": "Q"}]}\n``` done')
+        assert cards == [{"question": "Q"}]
+        assert json.loads(parser.document()) == {"flashcards": [{"question": "Q"}]}
+
+    def test_incomplete_document(self):
+        parser = JSONArrayStreamParser("flashcards")
+        parser.feed('{"flashcards": [{"question": "Q"')
+        assert parser.document() is None
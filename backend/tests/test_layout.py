@@ -0,0 +1,92 @@
+import pytest
+import cv2
+import numpy as np
+
+from app.core.layout_analyzer import LayoutAnalyzer, smooth_runs, profile_spans, crop_region
+
+
+def make_page(columns: int = 1) -> np.ndarray:
+    """Synthetic lecture page: title, paragraph(s) of text and a flowchart"""
+    page = np.full((1600, 1200), 255, dtype=np.uint8)
+    cv2.putText(page, "PROCESS MANAGEMENT", (100, 120), cv2.FONT_HERSHEY_SIMPLEX, 2.2, 0, 5)
+
+    column_width = 1000 // columns
+    for col in range(columns):
+        x = 100 + col * (column_width + 40)
+        for line in range(6):
+            cv2.putText(page, "a process is a program" if columns > 1 else "a process is a program in execution",
+                        (x, 260 + line * 45), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+
+    cv2.rectangle(page, (150, 700), (450, 850), 0, 3)
+    cv2.rectangle(page, (700, 700), (1000, 850), 0, 3)
+    cv2.line(page, (450, 775), (700, 775), 0, 3)
+    cv2.rectangle(page, (400, 1000), (750, 1150), 0, 3)
+    cv2.line(page, (300, 850), (500, 1000), 0, 3)
+    return page
+
+
+class TestLayoutPrimitives:
+    """Test cases for RLSA and projection profile helpers"""
+
+    def test_smooth_runs_fills_short_gaps_only(self):
+        row = np.array([[1, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0]], dtype=np.uint8)
+        smoothed = smooth_runs(row, 3, axis=1)
+        # Gap of 2 is filled, gap of 5 is kept, trailing border run is untouched
+        assert smoothed.tolist() == [[1, 1, 1, 1, 0, 0, 0, 0, 0, 1, 0, 0]]
+
+    def test_smooth_runs_vertical(self):
+        column = np.array([[1], [0], [1], [0], [0], [0], [0], [1]], dtype=np.uint8)
+        smoothed = smooth_runs(column, 3, axis=0)
+        assert smoothed[:, 0].tolist() == [1, 1, 1, 0, 0, 0, 0, 1]
+
+    def test_profile_spans_merges_small_gaps(self):
+        profile = np.array([0, 3, 4, 0, 2, 0, 0, 0, 5, 5])
+        assert profile_spans(profile) == [(1, 3), (4, 5), (8, 10)]
+        assert profile_spans(profile, min_gap=2) == [(1, 5), (8, 10)]
+
+    def test_crop_region_clamps_to_image(self):
+        image = np.zeros((100, 200), dtype=np.uint8)
+        crop, origin = crop_region(image, [190, 90, 220, 120], pad=5)
+        assert origin == (185, 85)
+        assert crop.shape == (15, 15)
+
+
+class TestLayoutAnalyzer:
+    """Test cases for page segmentation"""
+
+    def setup_method(self):
+        self.analyzer = LayoutAnalyzer()
+
+    def test_title_text_and_diagram_regions(self):
+        layout = self.analyzer.analyze(make_page())
+
+        assert layout["layout_type"] == "mixed"
+        assert layout["image_size"] == [1200, 1600]
+
+        kinds = [region["type"] for region in layout["text_regions"]]
+        assert kinds == ["title", "text"]
+
+        title = layout["text_regions"][0]["bbox"]
+        assert title[1] < 100 < title[3]
+
+        assert len(layout["diagram_regions"]) == 1
+        x1, y1, x2, y2 = layout["diagram_regions"][0]["bbox"]
+        assert x1 <= 150 and y1 <= 700 and x2 >= 1000 and y2 >= 1150
+
+    def test_two_text_columns(self):
+        layout = self.analyzer.analyze(make_page(columns=2))
+        body = [r["bbox"] for r in layout["text_regions"] if r["type"] == "text"]
+
+        assert len(body) == 2
+        left, right = sorted(body)
+        assert left[2] < right[0]
+
+    def test_blank_page(self):
+        layout = self.analyzer.analyze(np.full((600, 800), 255, dtype=np.uint8))
+        assert layout["layout_type"] == "empty"
+        assert layout["text_regions"] == []
+        assert layout["diagram_regions"] == []
+
+    def test_missing_file(self):
+        with pytest.raises(FileNotFoundError):
+            self.analyzer.analyze_file("nonexistent_file.jpg")
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+from app.services.llm_cache import LLMResponseCache, make_cache_key, normalize_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(tmp_path, clock, **overrides):
+    options = dict(ttl_seconds=60, max_memory_entries=2, max_disk_entries=100, clock=clock)
+    options.update(overrides)
+    return LLMResponseCache(str(tmp_path / "cache.sqlite3"), **options)
+
+
+class TestLLMResponseCache:
+    """Test cases for the two-level LLM response cache"""
+
+    def test_keys_ignore_whitespace_differences(self):
+        assert normalize_text("  a\n b\tc ") == "a b c"
+        assert make_cache_key("x", 1) == make_cache_key("x", 1)
+        assert make_cache_key("x", 1) != make_cache_key("x", 2)
+
+    def test_hit_and_miss_counters(self, tmp_path):
+        cache = make_cache(tmp_path, FakeClock())
+
+        assert cache.get("k") is None
+        cache.set("k", {"summary": "s"})
+        assert cache.get("k") == {"summary": "s"}
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_returned_values_are_copies(self, tmp_path):
+        cache = make_cache(tmp_path, FakeClock())
+        cache.set("k", {"flashcards": []})
+        cache.get("k")["flashcards"].append("mutated")
+        assert cache.get("k") == {"flashcards": []}
+
+    def test_memory_lru_falls_back_to_disk(self, tmp_path):
+        cache = make_cache(tmp_path, FakeClock())
+        for key in ("a", "b", "c"):
+            cache.set(key, {"key": key})
+
+        assert cache.stats()["memory_entries"] == 2
+        assert cache.get("a") == {"key": "a"}
+        assert cache.disk_hits == 1
+
+    def test_entries_expire(self, tmp_path):
+        clock = FakeClock()
+        cache = make_cache(tmp_path, clock)
+        cache.set("k", {"v": 1})
+
+        clock.now += 61
+        assert cache.get("k") is None
+
+    def test_persists_across_instances(self, tmp_path):
+        clock = FakeClock()
+        make_cache(tmp_path, clock).set("k", {"v": 1})
+        assert make_cache(tmp_path, clock).get("k") == {"v": 1}
+
+    def test_disk_size_eviction(self, tmp_path):
+        clock = FakeClock()
+        cache = make_cache(tmp_path, clock, max_disk_entries=10)
+        for i in range(LLMResponseCache.EVICTION_INTERVAL):
+            clock.now += 1
+            cache.set(f"k{i}", {"i": i})
+
+        assert cache.stats()["disk_entries"] == 10
+        # The most recently written entries survive
+        cache._memory.clear()
+        assert cache.get(f"k{LLMResponseCache.EVICTION_INTERVAL - 1}") is not None
+        assert cache.get("k0") is None
+
+    def test_async_access_keeps_sqlite_off_the_event_loop(self, tmp_path):
+        clock = FakeClock()
+        cache = make_cache(tmp_path, clock)
+        threads = []
+        for name in ("_disk_get", "_store"):
+            method = getattr(cache, name)
+
+            def traced(*args, method=method):
+                threads.append(threading.current_thread())
+                return method(*args)
+
+            setattr(cache, name, traced)
+
+        async def scenario():
+            await cache.aset("k", {"summary": "s"})
+            hit = await cache.aget("k")
+            cache._memory.clear()
+            return hit, await cache.aget("k"), await cache.aget("missing")
+
+        hit, from_disk, missing = asyncio.run(scenario())
+        assert hit == from_disk == {"summary": "s"} and missing is None
+        # One write and two disk lookups; the memory hit never touched SQLite
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+        assert (cache.memory_hits, cache.disk_hits, cache.misses) == (1, 1, 1)
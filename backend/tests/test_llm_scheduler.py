@@ -0,0 +1,196 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from groq import BadRequestError, RateLimitError
+
+from app.services.llm_scheduler import LLMScheduler, Priority, TokenBucket, parse_duration
+
+
+def status_error(error_class, status: int, headers: dict = None):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return error_class("upstream error", response=response, body=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimitParsing:
+    """Test cases for rate-limit header handling"""
+
+    def test_parse_duration(self):
+        assert parse_duration("2m59.56s") == pytest.approx(179.56)
+        assert parse_duration("7.66s") == pytest.approx(7.66)
+        assert parse_duration("120ms") == pytest.approx(0.12)
+        assert parse_duration("12") == 12.0
+        assert parse_duration("soon") is None
+        assert parse_duration(None) is None
+
+    def test_token_bucket_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)
+        bucket.take(60)
+        assert bucket.delay(30) == pytest.approx(30.0)
+        clock.now = 30.0
+        assert bucket.delay(30) == 0.0
+
+    def test_headers_set_the_buckets(self):
+        scheduler = LLMScheduler(requests_per_minute=30, tokens_per_minute=12000, max_concurrency=4)
+        scheduler.observe_headers({"x-ratelimit-remaining-tokens": "150", "x-ratelimit-remaining-requests": "2"})
+        assert scheduler.tokens.level == pytest.approx(150, abs=1)
+        assert scheduler.requests.level == pytest.approx(2, abs=0.1)
+        assert scheduler.tokens.delay(1000) > 0
+
+        # The server's count wins in both directions, up to the bucket capacity
+        scheduler.observe_headers({"x-ratelimit-remaining-tokens": "9000"})
+        assert scheduler.tokens.level == pytest.approx(9000, abs=1)
+        scheduler.observe_headers({"x-ratelimit-remaining-tokens": "50000"})
+        assert scheduler.tokens.level == 12000
+
+    def test_header_sync_is_not_refunded_again_and_keeps_in_flight_reservations(self):
+        clock = FakeClock()
+        scheduler = LLMScheduler(requests_per_minute=100, tokens_per_minute=12000, max_concurrency=4, clock=clock)
+        finish_first, finish_second = asyncio.Event(), asyncio.Event()
+
+        async def first():
+            await finish_first.wait()
+            # The server has counted this call's real usage, not the one still running
+            return SimpleNamespace(headers={"x-ratelimit-remaining-tokens": "11500"})
+
+        async def second():
+            await finish_second.wait()
+            return SimpleNamespace(headers={"x-ratelimit-remaining-tokens": "11000"})
+
+        async def scenario():
+            running = asyncio.ensure_future(scheduler.submit(second, estimated_tokens=2000))
+            response = asyncio.ensure_future(scheduler.submit(first, estimated_tokens=2000))
+            await asyncio.sleep(0)
+            assert scheduler.tokens.level == 8000
+            finish_first.set()
+            headers = (await response).headers
+            levels = [scheduler.tokens.level]
+            scheduler.settle(2000, 500, headers)
+            levels.append(scheduler.tokens.level)
+
+            finish_second.set()
+            scheduler.settle(2000, 500, (await running).headers)
+            levels.append(scheduler.tokens.level)
+            return levels
+
+        # 11500 reported minus the 2000 still reserved; settling refunds nothing more
+        assert asyncio.run(scenario()) == [9500, 9500, 11000]
+
+    def test_unused_completion_tokens_are_refunded(self):
+        clock = FakeClock()
+        scheduler = LLMScheduler(requests_per_minute=100, tokens_per_minute=12000, max_concurrency=4, clock=clock)
+
+        async def call():
+            return "ok"
+
+        async def scenario():
+            for _ in range(6):
+                await scheduler.submit(call, estimated_tokens=2000)
+                scheduler.settle(2000, 400)
+
+        asyncio.run(scenario())
+        # Six calls reserving 2000 tokens would have emptied the bucket without refunds
+        assert scheduler.tokens.level == pytest.approx(12000 - 6 * 400)
+        scheduler.settle(2000, None)
+        assert scheduler.tokens.level == pytest.approx(12000 - 6 * 400)
+
+
+class TestLLMScheduler:
+    """Test cases for admission, priorities and retries"""
+
+    def make_scheduler(self, **overrides):
+        options = dict(requests_per_minute=600, tokens_per_minute=100000, max_concurrency=1,
+                       max_retries=3, base_delay=0.01, max_delay=0.05)
+        options.update(overrides)
+        return LLMScheduler(**options)
+
+    def test_interactive_requests_go_before_bulk(self):
+        scheduler = self.make_scheduler()
+        order = []
+
+        async def job(name):
+            order.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        async def scenario():
+            first = asyncio.create_task(scheduler.submit(lambda: job("running"), 10))
+            await asyncio.sleep(0)
+            bulk = [asyncio.create_task(scheduler.submit(lambda i=i: job(f"bulk{i}"), 10, Priority.BULK))
+                    for i in range(3)]
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(scheduler.submit(lambda: job("interactive"), 10))
+            await asyncio.gather(first, interactive, *bulk)
+
+        asyncio.run(scenario())
+        assert order == ["running", "interactive", "bulk0", "bulk1", "bulk2"]
+        stats = scheduler.stats()
+        assert stats["queue_wait"]["bulk"]["calls"] == 3
+        assert stats["active"] == 0 and stats["queued"] == 0
+
+    def test_rate_limited_call_is_retried(self):
+        scheduler = self.make_scheduler()
+        attempts = 0
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise status_error(RateLimitError, 429, {"retry-after": "0.02"})
+            return "ok"
+
+        assert asyncio.run(scheduler.submit(call, 10)) == "ok"
+        assert attempts == 3
+        assert scheduler.retries == 2
+        assert scheduler.rate_limited == 2
+
+    def test_retries_are_bounded(self):
+        scheduler = self.make_scheduler(max_retries=2)
+
+        async def call():
+            raise status_error(RateLimitError, 429)
+
+        with pytest.raises(RateLimitError):
+            asyncio.run(scheduler.submit(call, 10))
+        assert scheduler.retries == 2
+        assert scheduler.failures == 1
+
+    def test_client_errors_are_not_retried(self):
+        scheduler = self.make_scheduler()
+        attempts = 0
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            raise status_error(BadRequestError, 400)
+
+        with pytest.raises(BadRequestError):
+            asyncio.run(scheduler.submit(call, 10))
+        assert attempts == 1
+
+    def test_queue_timeout(self):
+        scheduler = self.make_scheduler(queue_timeout=0.05)
+
+        async def slow():
+            await asyncio.sleep(0.3)
+
+        async def scenario():
+            running = asyncio.create_task(scheduler.submit(slow, 10))
+            await asyncio.sleep(0)
+            with pytest.raises(asyncio.TimeoutError):
+                await scheduler.submit(slow, 10)
+            await running
+
+        asyncio.run(scenario())
+        assert scheduler.stats()["queue_wait"]["interactive"]["errors"] == 1
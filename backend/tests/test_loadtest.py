@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+from loadtest.fake_groq_server import FakeGroqConfig, create_app
+from loadtest.run_load import build_service, make_document, run_load
+
+
+@pytest.fixture(autouse=True)
+def restore_settings():
+    """build_service points the global settings at the fake server"""
+    saved = settings.model_dump()
+    yield
+    for name, value in saved.items():
+        setattr(settings, name, value)
+
+
+def fake_service(config: FakeGroqConfig):
+    app = create_app(config)
+    service = build_service(
+        "http://fake-groq", cache=False, transport=httpx.ASGITransport(app=app),
+        groq_requests_per_minute=100000, groq_tokens_per_minute=10 ** 8
+    )
+    for tier in service.router.tiers:
+        tier.scheduler.base_delay = 0.01
+    return service, app.state.fake
+
+
+FAST = dict(ttft_ms=10, latency_distribution="fixed", tokens_per_second=100000, seed=7)
+
+
+class TestFakeGroqServer:
+    """Test cases for the Groq stand-in and the load harness"""
+
+    def test_enhancement_goes_over_the_network_path(self):
+        service, fake = fake_service(FakeGroqConfig(**FAST))
+        result = asyncio.run(service.enhance_ocr_content(make_document(0)))
+        assert result["groq_enhanced"] is True
+        assert result["flashcards"][0]["question"] == "What is a process?"
+        assert fake.requests == 1
+
+    def test_injected_rate_limits_are_retried(self):
+        service, fake = fake_service(FakeGroqConfig(error_rate_429=0.3, retry_after_seconds=0.01, **FAST))
+
+        async def request(index):
+            result = await service.enhance_ocr_content(make_document(index))
+            return not result["groq_enhanced"]
+
+        summary = asyncio.run(run_load(request, total=20, concurrency=5))
+        assert summary["requests"] == 20
+        assert fake.rate_limited > 0
+        assert sum(tier.scheduler.rate_limited for tier in service.router.tiers) == fake.rate_limited
+        assert summary["fallbacks"] == service.fallbacks["error"]
+        assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+
+    def test_streaming(self):
+        service, fake = fake_service(FakeGroqConfig(**FAST))
+
+        async def scenario():
+            return [event async for event in service.stream_enhancement(make_document(0))]
+
+        events = asyncio.run(scenario())
+        assert [e["event"] for e in events].count("flashcard") == 4
+        assert events[-1]["data"]["groq_enhanced"] is True
+        assert fake.streamed == 1
@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+from groq import APITimeoutError, BadRequestError, InternalServerError
+
+from app.services.llm_scheduler import LLMScheduler
+from app.services.model_router import ModelRouter, ModelTier, is_overload_error
+
+
+def make_tier(name: str, expected_latency_ms: float) -> ModelTier:
+    return ModelTier(
+        name=name,
+        model=f"{name}-model",
+        max_tokens=1000,
+        temperature=0.5,
+        expected_latency_ms=expected_latency_ms,
+        scheduler=LLMScheduler(requests_per_minute=600, tokens_per_minute=10 ** 6, max_concurrency=2)
+    )
+
+
+def make_router(**overrides) -> ModelRouter:
+    options = dict(fast_max_input_tokens=400, fast_max_sections=1)
+    options.update(overrides)
+    return ModelRouter(make_tier("quality", 6000), make_tier("fast", 1000), **options)
+
+
+def names(tiers):
+    return [tier.name for tier in tiers]
+
+
+class TestModelRouter:
+    """Test cases for latency-tiered model selection"""
+
+    def test_small_single_topic_input_goes_to_fast_tier(self):
+        router = make_router()
+        assert names(router.route(300)) == ["fast", "quality"]
+        assert names(router.route(300, sections=3)) == ["quality", "fast"]
+        assert names(router.route(1000)) == ["quality", "fast"]
+        assert router.decisions == {"fast:small_input": 1, "quality:large_input": 2}
+
+    def test_light_artifacts_allow_larger_inputs_on_fast_tier(self):
+        router = make_router()
+        assert names(router.route(700, artifacts={"flashcards"})) == ["fast", "quality"]
+        assert names(router.route(700)) == ["quality", "fast"]
+
+    def test_latency_slo_prefers_the_faster_tier(self):
+        router = make_router()
+        assert names(router.route(1000, latency_slo_ms=2000)) == ["fast", "quality"]
+        assert router.decisions["fast:latency_slo"] == 1
+        # Both tiers meet a loose target: size decides
+        assert names(router.route(1000, latency_slo_ms=10000)) == ["quality", "fast"]
+
+    def test_observed_latency_replaces_estimate(self):
+        tier = make_tier("fast", 1000)
+        for _ in range(30):
+            tier.record(3000.0)
+        assert tier.estimated_latency_ms() == 3000.0
+
+    def test_saturated_tier_is_skipped(self):
+        router = make_router()
+        router.fast.scheduler._active = router.fast.scheduler.max_concurrency
+
+        assert names(router.route(100)) == ["quality", "fast"]
+        assert router.decisions["quality:overload"] == 1
+
+    def test_single_tier(self):
+        router = ModelRouter(make_tier("quality", 6000))
+        assert names(router.route(10)) == ["quality"]
+        assert names(router.route(10, latency_slo_ms=1)) == ["quality"]
+
+    def test_usage_is_recorded_per_tier(self):
+        tier = make_tier("fast", 1000)
+        usage = type("Usage", (), {"prompt_tokens": 120, "completion_tokens": 300})()
+        tier.record(800.0, usage)
+        tier.record(900.0, failed=True)
+
+        stats = tier.stats()
+        assert stats["prompt_tokens"] == 120
+        assert stats["completion_tokens_per_call"] == 300.0
+        assert stats["latency"]["errors"] == 1
+
+
+class TestOverloadErrors:
+    """Test cases for errors that move a call to the other tier"""
+
+    def status_error(self, error_class, status: int):
+        request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+        return error_class("upstream error", response=httpx.Response(status, request=request), body=None)
+
+    def test_classification(self):
+        request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+        assert is_overload_error(self.status_error(InternalServerError, 503))
+        assert is_overload_error(APITimeoutError(request))
+        assert is_overload_error(asyncio.TimeoutError())
+        assert not is_overload_error(self.status_error(BadRequestError, 400))
+        assert not is_overload_error(ValueError("bad JSON"))
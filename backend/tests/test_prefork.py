@@ -0,0 +1,164 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import httpx
+import psutil
+import pytest
+
+from app.core.prefork import WorkerLimits, memory_report, process_memory, recycle_reason
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Master serving a tiny ASGI app that answers with the PID of its worker
+SERVER_SCRIPT = textwrap.dedent("""
+    import os, sys
+    from app.core.prefork import PreforkServer, WorkerLimits
+
+    # Stands in for the models loaded once by the master
+    MODEL = bytearray(64 * 1024 * 1024)
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": str(os.getpid()).encode()})
+
+    server = PreforkServer(
+        app, host="127.0.0.1", port=int(sys.argv[1]), workers=2,
+        limits=WorkerLimits(max_requests=int(sys.argv[2])),
+        graceful_timeout=2, report_interval=0, log_level="warning"
+    )
+    sys.exit(server.run())
+""")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_workers(master: psutil.Process, count: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        children = master.children()
+        if len(children) == count:
+            return sorted(child.pid for child in children)
+        time.sleep(0.1)
+    raise AssertionError(f"expected {count} workers, found {len(master.children())}")
+
+
+def get_pid(port: int, timeout: float = 10.0) -> int:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return int(httpx.get(f"http://127.0.0.1:{port}/", timeout=2).text)
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.fixture
+def start_server():
+    processes = []
+
+    def start(max_requests: int = 0):
+        port = free_port()
+        process = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT, str(port), str(max_requests)], cwd=BACKEND_DIR)
+        processes.append(process)
+        return process, port
+
+    yield start
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+class TestMemoryReport:
+    """Test cases for per-process memory figures"""
+
+    def test_process_memory(self):
+        memory = process_memory(os.getpid())
+        assert memory["pid"] == os.getpid()
+        assert memory["rss_mb"] > 0
+        if memory["uss_mb"] is not None:
+            assert memory["shared_mb"] == pytest.approx(memory["rss_mb"] - memory["uss_mb"], abs=0.2)
+
+    def test_report_skips_exited_workers(self):
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+
+        report = memory_report(os.getpid(), [os.getpid(), finished.pid])
+        assert [worker["pid"] for worker in report["workers"]] == [os.getpid()]
+        assert report["master"]["pid"] == os.getpid()
+        assert report["workers_rss_mb"] == report["workers"][0]["rss_mb"]
+
+    def test_recycle_reason(self):
+        memory = {"rss_mb": 900.0, "uss_mb": 300.0}
+        assert recycle_reason(10, memory, WorkerLimits()) is None
+        assert recycle_reason(10, memory, WorkerLimits(max_memory_mb=500)) is None
+        assert recycle_reason(10, memory, WorkerLimits(max_memory_mb=250)) == "memory 300MB"
+        assert recycle_reason(7200, memory, WorkerLimits(max_age_seconds=3600)) == "age 7200s"
+        assert recycle_reason(10, {"rss_mb": 900.0, "uss_mb": None}, WorkerLimits(max_memory_mb=500)) == "memory 900MB"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="preforking needs fork()")
+class TestPreforkServer:
+    """Test cases for the preforking master"""
+
+    def test_workers_share_the_master_memory(self, start_server):
+        process, port = start_server()
+        master = psutil.Process(process.pid)
+        workers = wait_for_workers(master, 2)
+        assert get_pid(port) in workers
+
+        report = memory_report(process.pid, workers)
+        if report["sharing_ratio"] is not None:
+            # The 64MB allocated before forking is shared, not copied
+            assert report["workers_pss_mb"] < 0.75 * report["workers_rss_mb"]
+
+    def test_sighup_recycles_every_worker(self, start_server):
+        process, port = start_server()
+        master = psutil.Process(process.pid)
+        before = wait_for_workers(master, 2)
+        get_pid(port)
+
+        process.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            current = sorted(child.pid for child in master.children())
+            if len(current) == 2 and not set(current) & set(before):
+                break
+            time.sleep(0.1)
+        else:
+            pytest.fail("workers were not replaced")
+        assert get_pid(port) in current
+
+    def test_worker_is_replaced_after_max_requests(self, start_server):
+        process, port = start_server(max_requests=1)
+        master = psutil.Process(process.pid)
+        before = wait_for_workers(master, 2)
+
+        served = get_pid(port)
+        deadline = time.monotonic() + 10
+        while served in [child.pid for child in master.children()]:
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+        after = wait_for_workers(master, 2)
+        assert served in before and served not in after
+
+    def test_sigterm_stops_master_and_workers(self, start_server):
+        process, port = start_server()
+        workers = wait_for_workers(psutil.Process(process.pid), 2)
+        get_pid(port)
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+        assert not any(psutil.pid_exists(pid) and psutil.Process(pid).status() != psutil.STATUS_ZOMBIE for pid in workers)
@@ -0,0 +1,86 @@
+from app.services.prompt_compactor import PromptCompactor, count_pages, shingle_hashes
+
+
+def text(value, confidence=0.9, kind="text"):
+    return {"type": kind, "text": value, "confidence": confidence}
+
+
+def multi_page_notes(pages=4):
+    content = []
+    for page in range(1, pages + 1):
+        content.append(text("CS301  Operating   Systems - Lecture Notes", kind="heading"))
+        content.append(text(f"Topic {page}: scheduling policy number {page} decides which process runs"))
+        content.append(text("A process is a program in execution and has its own address space"))
+        content.append(text(f"Page {page} of {pages}"))
+        content.append(text("~~ |_ -- ;;"))
+    return content
+
+
+class TestPromptCompactor:
+    """Test cases for OCR prompt compaction"""
+
+    def test_boilerplate_duplicates_and_noise_are_removed(self):
+        result = PromptCompactor(token_budget=10000).compact(multi_page_notes())
+        lines = result["text"].split("\n")
+
+        # Headers and footers repeated on every page keep their first copy
+        assert [line for line in lines if line.startswith("Page ")] == ["Page 1 of 4"]
+        assert sum("Lecture Notes" in line for line in lines) == 1
+        assert lines.count("A process is a program in execution and has its own address space") == 1
+        assert sum(line.startswith("Topic ") for line in lines) == 4
+
+        stats = result["stats"]
+        assert stats["blocks_dropped"] == {"noise": 4, "boilerplate": 6, "near_duplicate": 3}
+        assert stats["compacted_tokens"] < stats["original_tokens"] / 2
+        assert stats["tokens_saved"] == stats["original_tokens"] - stats["compacted_tokens"]
+
+    def test_single_page_keeps_repeated_headings(self):
+        content = []
+        for topic in ("paging", "segmentation", "swapping"):
+            content.append(text("Example", kind="heading"))
+            content.append(text(f"A worked example of {topic} on a small address space"))
+        content.append(text("OS", kind="heading"))
+        content.append(text("IO"))
+
+        result = PromptCompactor(token_budget=10000).compact(content)
+        lines = result["text"].split("\n")
+        assert lines.count("Example") == 3
+        assert "OS" in lines and "IO" not in lines
+        assert count_pages(content) == 1
+        assert count_pages([text("- 1 -"), text("p. 2 of 9"), text("3/9")]) == 3
+
+    def test_near_duplicate_keeps_the_more_confident_reading(self):
+        content = [
+            text("The scheduler picks the next procss to run on the CPU", confidence=0.4),
+            text("Context switching saves registers"),
+            text("The scheduler picks the next process to run on the CPU", confidence=0.95),
+        ]
+        result = PromptCompactor(token_budget=10000, near_duplicate_threshold=0.6).compact(content)
+        assert result["text"].split("\n") == [
+            "The scheduler picks the next process to run on the CPU",
+            "Context switching saves registers"
+        ]
+
+    def test_budget_cuts_low_confidence_text_first(self):
+        content = [text("HEADING ONE", kind="heading")] + [
+            text(f"Sentence number {i} about a distinct subject {i * 7}", confidence=0.3 + i / 100)
+            for i in range(20)
+        ]
+        result = PromptCompactor(token_budget=60).compact(content)
+        assert result["stats"]["compacted_tokens"] <= 60
+        assert result["items"][0]["text"] == "HEADING ONE"
+        # The most confident sentences survive, in document order
+        kept = [item["confidence"] for item in result["items"][1:]]
+        assert kept == sorted(kept) and kept[-1] == content[-1]["confidence"]
+
+    def test_low_confidence_blocks_are_dropped(self):
+        result = PromptCompactor(token_budget=1000, min_confidence=0.3).compact([
+            text("Reliable line about deadlocks"), text("Garbled reading of a line", confidence=0.1)
+        ])
+        assert result["text"] == "Reliable line about deadlocks"
+        assert result["stats"]["blocks_dropped"] == {"low_confidence": 1}
+
+    def test_shingle_similarity(self):
+        a = shingle_hashes("a process is a program in execution")
+        assert a == shingle_hashes("A process is a program in  execution!")
+        assert a.isdisjoint(shingle_hashes("threads share an address space"))
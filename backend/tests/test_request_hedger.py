@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_scheduler import LLMScheduler
+from app.services.request_hedger import RequestHedger
+
+
+class SlowFirstCall:
+    """Coroutine function whose calls take the given latencies in turn"""
+
+    def __init__(self, *latencies: float, fail: tuple = ()):
+        self.latencies = list(latencies)
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        index = self.calls
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latencies[index])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if index in self.fail:
+            raise RuntimeError(f"call {index} failed")
+        return index
+
+
+def make_hedger(**overrides) -> RequestHedger:
+    options = dict(initial_delay_ms=50, min_delay_ms=10, budget_per_minute=10, min_samples=5)
+    options.update(overrides)
+    return RequestHedger(**options)
+
+
+class TestRequestHedger:
+    """Test cases for hedged calls"""
+
+    def test_fast_call_is_not_hedged(self):
+        hedger = make_hedger()
+        call = SlowFirstCall(0.01)
+
+        assert asyncio.run(hedger.run("fast", call)) == 0
+        assert call.calls == 1
+        assert hedger.hedged == 0
+
+    def test_slow_call_is_hedged_and_loser_cancelled(self):
+        hedger = make_hedger()
+        call = SlowFirstCall(1.0, 0.01)
+
+        async def scenario():
+            started = asyncio.get_running_loop().time()
+            result = await hedger.run("fast", call)
+            await asyncio.sleep(0)
+            return result, asyncio.get_running_loop().time() - started
+
+        result, elapsed = asyncio.run(scenario())
+        assert result == 1
+        assert elapsed < 0.5
+        assert call.cancelled == 1
+        assert hedger.stats()["win_rate"] == 1.0
+
+    def test_cancelled_copy_releases_its_scheduler_reservation(self):
+        hedger = make_hedger()
+        scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=600, max_concurrency=4)
+        call = SlowFirstCall(1.0, 0.01)
+
+        async def scenario():
+            result = await hedger.run("fast", lambda: scheduler.submit(call, estimated_tokens=200))
+            await asyncio.sleep(0)
+            return result
+
+        assert asyncio.run(scenario()) == 1
+        assert call.cancelled == 1
+        # Only the winning copy's reservation is still taken (plus a little refill)
+        assert 400 <= scheduler.tokens.level < 405
+        assert 59 <= scheduler.requests.level < 59.5
+        assert scheduler.stats()["active"] == 0
+
+    def test_primary_wins_when_hedge_is_slower(self):
+        hedger = make_hedger()
+        call = SlowFirstCall(0.1, 1.0)
+
+        assert asyncio.run(hedger.run("fast", call)) == 0
+        assert hedger.hedged == 1
+        assert hedger.hedge_wins == 0
+
+    def test_failed_copy_waits_for_the_other(self):
+        hedger = make_hedger()
+        assert asyncio.run(hedger.run("fast", SlowFirstCall(0.1, 0.2, fail=(0,)))) == 1
+
+        with pytest.raises(RuntimeError, match="call 0"):
+            asyncio.run(hedger.run("fast", SlowFirstCall(0.1, 0.2, fail=(0, 1))))
+
+    def test_budget_caps_hedges(self):
+        hedger = make_hedger(budget_per_minute=1)
+
+        async def scenario():
+            return await asyncio.gather(*(hedger.run("fast", SlowFirstCall(0.1, 0.01)) for _ in range(3)))
+
+        assert sorted(asyncio.run(scenario())) == [0, 0, 1]
+        assert hedger.hedged == 1
+        assert hedger.budget_exhausted == 2
+
+    def test_disabled_budget_and_saturation_skip_hedging(self):
+        assert asyncio.run(make_hedger(budget_per_minute=0).run("fast", SlowFirstCall(0.1, 0.01))) == 0
+        hedger = make_hedger()
+        assert asyncio.run(hedger.run("fast", SlowFirstCall(0.1, 0.01), can_hedge=lambda: False)) == 0
+        assert hedger.hedged == 0
+
+    def test_threshold_follows_recent_latencies(self):
+        hedger = make_hedger(quantile=0.9, min_delay_ms=1)
+        assert hedger.threshold_ms("fast") == 50
+
+        async def scenario():
+            for _ in range(5):
+                await hedger.run("fast", SlowFirstCall(0.02))
+
+        asyncio.run(scenario())
+        assert 15 <= hedger.threshold_ms("fast") < 50
+        assert hedger.threshold_ms("quality") == 50
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test cases for request coalescing"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"flashcards": ["card"]}
+
+        async def scenario():
+            return await asyncio.gather(*(flight.do("same", work) for _ in range(30)))
+
+        results = asyncio.run(scenario())
+        assert calls == 1
+        assert all(result == {"flashcards": ["card"]} for result in results)
+        # Followers get their own copies
+        results[1]["flashcards"].append("mutated")
+        assert results[2] == {"flashcards": ["card"]}
+        assert flight.stats() == {"executions": 1, "coalesced": 29, "in_flight": 0}
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight("test")
+
+        async def scenario():
+            return await asyncio.gather(
+                flight.do("a", lambda: asyncio.sleep(0.01, result="a")),
+                flight.do("b", lambda: asyncio.sleep(0.01, result="b"))
+            )
+
+        assert asyncio.run(scenario()) == ["a", "b"]
+        assert flight.executions == 2
+
+    def test_errors_reach_every_waiter_and_are_not_cached(self):
+        flight = SingleFlight("test")
+        attempts = 0
+
+        async def failing():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        async def scenario():
+            results = await asyncio.gather(
+                flight.do("k", failing), flight.do("k", failing), return_exceptions=True
+            )
+            assert all(isinstance(r, RuntimeError) for r in results)
+            with pytest.raises(RuntimeError):
+                await flight.do("k", failing)
+
+        asyncio.run(scenario())
+        assert attempts == 2
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = SingleFlight("test")
+
+        async def scenario():
+            leader = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(0.05, result="done")))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(0.05, result="other")))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(scenario()) == "done"
+
+    def test_execution_is_cancelled_when_every_waiter_left(self):
+        flight = SingleFlight("test")
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(True)
+            return "done"
+
+        async def scenario():
+            callers = [asyncio.create_task(flight.do("k", work)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.gather(*callers, return_exceptions=True)
+            await asyncio.sleep(0.08)
+            # A new call runs the work again rather than joining the cancelled run
+            return await flight.do("k", work)
+
+        assert asyncio.run(scenario()) == "done"
+        assert finished == [True]
+        assert flight.executions == 2
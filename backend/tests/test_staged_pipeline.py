@@ -0,0 +1,139 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.staged_pipeline import Stage, StagedPipeline
+
+
+def sleeper(seconds: float, tag: str):
+    """Blocking stage appending ``tag`` to the item"""
+    def run(item):
+        time.sleep(seconds)
+        return item + [tag]
+    return run
+
+
+def async_sleeper(seconds: float, tag: str):
+    async def run(item):
+        await asyncio.sleep(seconds)
+        return item + [tag]
+    return run
+
+
+async def submit_all(pipeline: StagedPipeline, count: int):
+    results = await asyncio.gather(*(pipeline.submit([i]) for i in range(count)))
+    await pipeline.stop()
+    return results
+
+
+class TestStagedPipeline:
+    """Test cases for stages joined by bounded queues"""
+
+    def test_items_pass_through_every_stage_in_order(self):
+        pipeline = StagedPipeline("test", [
+            Stage("decode", sleeper(0, "decode"), 2, ThreadPoolExecutor(2)),
+            Stage("llm", async_sleeper(0, "llm"), 4)
+        ])
+
+        results = asyncio.run(submit_all(pipeline, 5))
+        assert results == [[i, "decode", "llm"] for i in range(5)]
+
+    def test_throughput_is_set_by_slowest_stage(self):
+        pipeline = StagedPipeline("test", [
+            Stage("decode", sleeper(0.02, "decode"), 1, ThreadPoolExecutor(1)),
+            Stage("ocr", sleeper(0.05, "ocr"), 1, ThreadPoolExecutor(1)),
+            Stage("llm", async_sleeper(0.02, "llm"), 1)
+        ])
+
+        started = time.perf_counter()
+        asyncio.run(submit_all(pipeline, 12))
+        elapsed = time.perf_counter() - started
+
+        # Sequential stages would need 12 x 90ms; overlapped ~12 x 50ms
+        assert elapsed < 0.9
+        stats = pipeline.stats()
+        assert stats["bottleneck"] == "ocr"
+        assert [stage["processed"] for stage in stats["stages"]] == [12, 12, 12]
+
+    def test_slow_stage_pushes_back_upstream(self):
+        pipeline = StagedPipeline("test", [
+            Stage("decode", sleeper(0, "decode"), 1, ThreadPoolExecutor(1), queue_size=1),
+            Stage("llm", async_sleeper(0.03, "llm"), 1, queue_size=1)
+        ])
+
+        asyncio.run(submit_all(pipeline, 8))
+        decode, llm = pipeline.stats()["stages"]
+        assert decode["blocked_seconds"] > 0.05
+        assert llm["utilization"] > decode["utilization"]
+        assert pipeline.stats()["submit_blocked_seconds"] > 0
+
+    def test_failure_skips_later_stages(self):
+        later = []
+
+        async def parse(item):
+            if item[0] == 1:
+                raise ValueError("unreadable page")
+            return item
+
+        async def record(item):
+            later.append(item[0])
+            return item
+
+        pipeline = StagedPipeline("test", [Stage("parse", parse), Stage("record", record)])
+
+        async def scenario():
+            results = await asyncio.gather(*(pipeline.submit([i]) for i in range(3)), return_exceptions=True)
+            await pipeline.stop()
+            return results
+
+        results = asyncio.run(scenario())
+        assert isinstance(results[1], ValueError)
+        assert results[0] == [0] and results[2] == [2]
+        assert sorted(later) == [0, 2]
+        assert pipeline.stats()["stages"][0]["failed"] == 1
+
+    def test_progress_reports_each_stage(self):
+        seen = []
+        pipeline = StagedPipeline("test", [
+            Stage("decode", sleeper(0, "decode"), 1, ThreadPoolExecutor(1)),
+            Stage("ocr", async_sleeper(0, "ocr"))
+        ])
+
+        async def scenario():
+            result = await pipeline.submit([0], seen.append)
+            await pipeline.stop()
+            return result
+
+        asyncio.run(scenario())
+        assert seen == ["decode", "ocr"]
+
+    def test_cancelled_submission_is_skipped(self):
+        ran = []
+
+        async def slow(item):
+            await asyncio.sleep(0.1)
+            return item
+
+        async def record(item):
+            ran.append(item[0])
+            return item
+
+        pipeline = StagedPipeline("test", [Stage("slow", slow), Stage("record", record)])
+
+        async def scenario():
+            first = asyncio.create_task(pipeline.submit([0]))
+            second = asyncio.create_task(pipeline.submit([1]))
+            await asyncio.sleep(0.02)
+            second.cancel()
+            await first
+            await asyncio.sleep(0.15)
+            await pipeline.stop()
+
+        asyncio.run(scenario())
+        assert ran == [0]
+
+    def test_empty_pipeline_is_rejected(self):
+        with pytest.raises(ValueError):
+            StagedPipeline("test", [])
@@ -0,0 +1,39 @@
+from app.services.text_chunker import estimate_tokens, split_into_chunks
+
+
+def section(heading: str, paragraphs: int, words: int = 40):
+    items = [{"type": "heading", "text": heading}]
+    items += [{"type": "text", "text": " ".join(["word"] * words) + "."} for _ in range(paragraphs)]
+    return items
+
+
+class TestTextChunker:
+    """Test cases for heading-aware, token-budgeted chunking"""
+
+    def test_short_content_is_one_chunk(self):
+        content = section("INTRO", 2)
+        assert split_into_chunks(content, 1000) == ["\n".join(item["text"] for item in content)]
+
+    def test_chunks_respect_budget_and_headings(self):
+        content = section("CHAPTER 1", 3) + section("CHAPTER 2", 3) + section("CHAPTER 3", 3)
+        chunks = split_into_chunks(content, 160)
+
+        assert all(estimate_tokens(line) <= 160 for chunk in chunks for line in chunk.split("\n"))
+        # Every section fits the budget on its own, so each chunk starts at a heading
+        assert [chunk.split("\n")[0] for chunk in chunks] == ["CHAPTER 1", "CHAPTER 2", "CHAPTER 3"]
+
+    def test_small_sections_are_packed_together(self):
+        content = section("A", 1, words=5) + section("B", 1, words=5) + section("C", 1, words=5)
+        assert len(split_into_chunks(content, 1000)) == 1
+
+    def test_oversized_item_is_split(self):
+        text = " ".join(f"Sentence number {i} about scheduling." for i in range(200))
+        chunks = split_into_chunks([{"type": "text", "text": text}], 100)
+
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+        assert " ".join(chunks).split() == text.split()
+
+    def test_non_text_items_are_ignored(self):
+        content = [{"type": "diagram", "boxes": []}, {"type": "text", "text": "Only text"}]
+        assert split_into_chunks(content, 100) == ["Only text"]
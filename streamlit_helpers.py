@@ -0,0 +1,167 @@
+"""
+JSON extraction and knowledge graph merging for the Streamlit app
+
+Small local copies of ``backend/app/utils/json_extract.py`` and
+``backend/app/utils/graph_merge.py``, which cannot be imported from here
+(the root ``app`` directory is the Next.js app). The backend modules are
+the reference: they also repair truncated JSON and are covered by tests.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Set
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PARENTHESISED = re.compile(r"\(([^()]*)\)")
+_NON_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def extract_json(text: Optional[str], expect: Optional[type] = None) -> Any:
+    """
+    Extract the JSON value from a model response wrapped in prose,
+    code fences or ``<<<JSON ... JSON>>>`` markers
+
+    Args:
+        text: Raw model output
+        expect: ``dict`` or ``list`` to only accept objects or arrays
+
+    Returns:
+        The decoded value, or None if no JSON was found
+    """
+    if not text:
+        return None
+    start = text.find("<<<JSON")
+    if start != -1:
+        end = text.find("JSON>>>", start)
+        text = text[start + len("<<<JSON"):end if end != -1 else len(text)]
+
+    openers = "{" if expect is dict else "[" if expect is list else "{["
+    starts = [i for i in (text.find(opener) for opener in openers) if i != -1]
+    candidates = [text.strip()]
+    if starts:
+        first = min(starts)
+        span = text[first:text.rfind("}" if text[first] == "{" else "]") + 1]
+        candidates += [span, _TRAILING_COMMA.sub(r"\1", span)]
+
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except (ValueError, RecursionError):
+            continue
+        if expect is None or isinstance(value, expect):
+            return value
+    return None
+
+
+def slugify(text: str) -> str:
+    """Lowercase alphanumerics joined by underscores ("AVC_" -> "avc")"""
+    return _NON_SLUG.sub("_", str(text).lower()).strip("_")
+
+
+def _initials(text: str) -> str:
+    return "".join(word[0] for word in slugify(text).split("_") if word)
+
+
+def node_aliases(node: Dict[str, Any]) -> Set[str]:
+    """Keys under which a node is merged with nodes from other blocks (see the backend module)"""
+    label = node.get("label") or ""
+    base = _PARENTHESISED.sub(" ", label)
+    aliases = {slugify(label), slugify(base)}
+    for inner in _PARENTHESISED.findall(label):
+        # Only abbreviations name the same concept; other parentheticals qualify it
+        if slugify(inner) == _initials(base) or _initials(inner) == slugify(base):
+            aliases.add(slugify(inner))
+    aliases.discard("")
+
+    node_id = slugify(node.get("id") or "")
+    if node_id and (not aliases or node_id in aliases or node_id == _initials(base)):
+        aliases.add(node_id)
+    return aliases
+
+
+def merge_graphs(graphs: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merge per-block graphs into one, linking nodes that share an alias
+
+    Returns:
+        ``{"nodes": [...], "edges": {"source": [...], "target": [...]}, "stats": {...}}``
+        where ``source``/``target`` are indices into ``nodes``
+    """
+    graphs = [graph for graph in graphs if isinstance(graph, dict)]
+    parent: Dict[str, str] = {}
+
+    def find(key: str) -> str:
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    occurrences = []  # (graph index, node, alias)
+    for graph_index, graph in enumerate(graphs):
+        for node in graph.get("nodes") or []:
+            aliases = node_aliases(node) if isinstance(node, dict) else set()
+            if not aliases:
+                continue
+            first, *rest = aliases
+            parent.setdefault(first, first)
+            for alias in rest:
+                parent.setdefault(alias, alias)
+                parent[find(alias)] = find(first)
+            occurrences.append((graph_index, node, first))
+
+    nodes: List[Dict[str, Any]] = []
+    index_of_root: Dict[str, int] = {}
+    local_ids: List[Dict[str, int]] = [{} for _ in graphs]
+    used_ids: Set[str] = set()
+    for graph_index, node, alias in occurrences:
+        root = find(alias)
+        index = index_of_root.get(root)
+        label = str(node.get("label") or node.get("id") or alias)
+        if index is None:
+            node_id = slugify(node.get("id") or "") or alias
+            unique_id, suffix = node_id, 2
+            while unique_id in used_ids:
+                unique_id, suffix = f"{node_id}_{suffix}", suffix + 1
+            used_ids.add(unique_id)
+            index = index_of_root[root] = len(nodes)
+            nodes.append({**node, "id": unique_id, "label": label})
+        elif len(label) > len(nodes[index]["label"]):
+            nodes[index]["label"] = label
+        if node.get("id") is not None:
+            local_ids[graph_index].setdefault(str(node["id"]), index)
+
+    def resolve(graph_index: int, node_id: Any) -> Optional[int]:
+        if node_id is None:
+            return None
+        index = local_ids[graph_index].get(str(node_id))
+        if index is None and slugify(node_id) in parent:
+            index = index_of_root.get(find(slugify(node_id)))
+        return index
+
+    sources: List[int] = []
+    targets: List[int] = []
+    seen_edges = set()
+    input_edges = 0
+    for graph_index, graph in enumerate(graphs):
+        for edge in graph.get("edges") or []:
+            if not isinstance(edge, dict):
+                continue
+            input_edges += 1
+            source, target = resolve(graph_index, edge.get("from")), resolve(graph_index, edge.get("to"))
+            if source is None or target is None or source == target or (source, target) in seen_edges:
+                continue
+            seen_edges.add((source, target))
+            sources.append(source)
+            targets.append(target)
+
+    return {
+        "nodes": nodes,
+        "edges": {"source": sources, "target": targets},
+        "stats": {
+            "graphs": len(graphs),
+            "input_nodes": len(occurrences),
+            "input_edges": input_edges,
+            "nodes": len(nodes),
+            "edges": len(sources)
+        }
+    }